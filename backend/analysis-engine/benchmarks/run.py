@@ -0,0 +1,270 @@
+"""
+Analysis engine benchmark suite
+Times the analyzers and file hashing on synthetic inputs and compares throughput with a stored baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src"))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import numpy as np
+
+from synthetic import parse_size, write_fasta, write_fastq, write_mutation_pair, QUALITY_PROFILES
+
+# Input size per size class
+SIZE_CLASSES = {"xs": "64KB", "s": "4MB", "m": "256MB", "l": "4GB", "xl": "32GB"}
+# Mutation detection aligns one reference-length query; cap it to keep large classes tractable
+MUTATION_MAX_LENGTH = parse_size("64MB")
+CASES = ["fasta", "fastq", "mutation", "hash"]
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# Throughput drops (or peak RSS growth) beyond this fraction count as regressions
+DEFAULT_THRESHOLD = 0.2
+# Runs shorter than this are dominated by timer noise and are not compared on speed
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def prepare_inputs(case: str, size_class: str, data_dir: str, options: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Generate (or reuse) the synthetic input files of a benchmark case.
+
+    File names encode every generator parameter, so a cached file always
+    matches the requested inputs.
+
+    Returns:
+        Dict[str, str]: Paths of the generated files
+    """
+    size = parse_size(SIZE_CLASSES[size_class])
+    seed = options["seed"]
+    os.makedirs(data_dir, exist_ok=True)
+    if case == "mutation":
+        length = min(size, MUTATION_MAX_LENGTH)
+        stem = os.path.join(data_dir, f"mutation_{size_class}_gc{options['gc']}_seed{seed}")
+        paths = {"reference": f"{stem}.ref.fasta", "query": f"{stem}.query.fasta"}
+        if not all(os.path.exists(path) for path in paths.values()):
+            write_mutation_pair(paths["reference"], paths["query"], length, gc=options["gc"], seed=seed)
+        return paths
+    if case == "fasta":
+        path = os.path.join(data_dir, f"genome_{size_class}_gc{options['gc']}_n{options['n_rate']}_seed{seed}.fasta")
+        if not os.path.exists(path):
+            write_fasta(path, size, gc=options["gc"], n_rate=options["n_rate"], seed=seed)
+        return {"input": path}
+    path = os.path.join(
+        data_dir,
+        f"reads_{size_class}_rl{options['read_length']}_gc{options['gc']}_n{options['n_rate']}"
+        f"_{options['quality']}_seed{seed}.fastq"
+    )
+    if not os.path.exists(path):
+        write_fastq(path, size, options["read_length"], options["gc"], options["n_rate"], options["quality"], seed)
+    return {"input": path}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(case: str, paths: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Time one benchmark case. Runs in a fresh process so peak RSS is per case.
+
+    Returns:
+        Dict[str, Any]: Elapsed seconds, record count and peak RSS
+    """
+    from analyzers.fasta_analyzer import FastaAnalyzer
+    from analyzers.fastq_analyzer import FastqAnalyzer
+    from analyzers.mutation_detector import MutationAnalyzer
+    from utils.helpers import calculate_file_hash
+
+    records: Optional[int] = None
+    started = time.perf_counter()
+    if case == "fasta":
+        result = FastaAnalyzer().analyze_file(paths["input"], include_sequences=False)
+        records = result.get("sequence_count")
+    elif case == "fastq":
+        result = FastqAnalyzer().analyze_file(paths["input"], include_sequences=False)
+        records = result.get("sequence_count")
+    elif case == "mutation":
+        result = MutationAnalyzer(paths["reference"]).analyze_file(paths["query"], include_sequences=False)
+        records = result.get("sequence_count")
+    else:
+        result = {"hash": calculate_file_hash(paths["input"])}
+    elapsed = time.perf_counter() - started
+    if "error" in result:
+        raise RuntimeError(f"{case} benchmark failed: {result['error']}")
+    return {"seconds": elapsed, "records": records, "peak_rss_mb": _peak_rss_mb()}
+
+
+def benchmark(case: str, size_class: str, data_dir: str, options: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """
+    Run a case repeat times (each in its own process) and keep the fastest run.
+
+    Returns:
+        Dict[str, Any]: Benchmark row with throughput and peak RSS
+    """
+    paths = prepare_inputs(case, size_class, data_dir, options)
+    measured_path = paths.get("query", paths.get("input"))
+    size = os.path.getsize(measured_path)
+    runs = []
+    context = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            runs.append(executor.submit(run_case, case, paths).result())
+    best = min(runs, key=lambda run: run["seconds"])
+    seconds = best["seconds"]
+    # Hashing has no records
+    records = best["records"]
+    return {
+        "name": f"{case}/{size_class}",
+        "case": case,
+        "size_class": size_class,
+        "bytes": size,
+        "records": records,
+        "seconds": round(seconds, 4),
+        "records_per_sec": round(records / seconds, 1) if records else None,
+        "mb_per_sec": round(size / (1024 * 1024) / seconds, 2),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs)
+    }
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                          threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark rows with a baseline run.
+
+    A row regresses when its MB/sec falls more than threshold below the
+    baseline (for runs of at least MIN_COMPARABLE_SECONDS), or its peak RSS
+    grows more than threshold above it.
+
+    Returns:
+        List[Dict[str, Any]]: One comparison per row present in the baseline
+    """
+    reference = {row["name"]: row for row in baseline.get("results", [])}
+    comparisons = []
+    for row in results:
+        previous = reference.get(row["name"])
+        if previous is None:
+            continue
+        comparable = min(row["seconds"], previous["seconds"]) >= MIN_COMPARABLE_SECONDS
+        speed = row["mb_per_sec"] / previous["mb_per_sec"] if comparable and previous["mb_per_sec"] else None
+        memory = row["peak_rss_mb"] / previous["peak_rss_mb"] if previous["peak_rss_mb"] else None
+        regressions = []
+        if speed is not None and speed < 1 - threshold:
+            regressions.append("throughput")
+        if memory is not None and memory > 1 + threshold:
+            regressions.append("memory")
+        comparisons.append({
+            "name": row["name"],
+            "speed_ratio": round(speed, 3) if speed is not None else None,
+            "memory_ratio": round(memory, 3) if memory is not None else None,
+            "regressions": regressions
+        })
+    return comparisons
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine a benchmark ran on."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def print_table(results: List[Dict[str, Any]], comparisons: List[Dict[str, Any]]) -> None:
+    by_name = {comparison["name"]: comparison for comparison in comparisons}
+    print(f"{'benchmark':<16}{'MB':>10}{'seconds':>10}{'records/s':>14}{'MB/s':>10}{'RSS MB':>9}  baseline")
+    for row in results:
+        comparison = by_name.get(row["name"])
+        if comparison is None:
+            note = "-"
+        else:
+            speed = f"x{comparison['speed_ratio']}" if comparison["speed_ratio"] is not None else "n/a"
+            note = f"{speed} speed, x{comparison['memory_ratio']} RSS"
+            if comparison["regressions"]:
+                note += "  REGRESSION: " + ", ".join(comparison["regressions"])
+        records_per_sec = f"{row['records_per_sec']:.0f}" if row["records_per_sec"] else "-"
+        print(f"{row['name']:<16}{row['bytes'] / (1024 * 1024):>10.2f}{row['seconds']:>10.3f}"
+              f"{records_per_sec:>14}{row['mb_per_sec']:>10.2f}{row['peak_rss_mb']:>9.1f}  {note}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis engine on synthetic data")
+    parser.add_argument("--sizes", default="xs,s", help=f"Size classes ({', '.join(f'{k}={v}' for k, v in SIZE_CLASSES.items())})")
+    parser.add_argument("--cases", default=",".join(CASES), help="Benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (fastest is kept)")
+    parser.add_argument("--read-length", type=int, default=150)
+    parser.add_argument("--gc", type=float, default=0.5)
+    parser.add_argument("--n-rate", type=float, default=0.001)
+    parser.add_argument("--quality", choices=QUALITY_PROFILES, default="illumina")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.getenv(
+        "BENCHMARK_DATA_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-benchmarks")
+    ), help="Where generated inputs are cached")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed regression fraction")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in args.sizes.split(",") if size]
+    cases = [case for case in args.cases.split(",") if case]
+    unknown = [name for name in sizes if name not in SIZE_CLASSES] + [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown size classes or cases: {', '.join(unknown)}")
+    options = {
+        "read_length": args.read_length, "gc": args.gc, "n_rate": args.n_rate,
+        "quality": args.quality, "seed": args.seed
+    }
+
+    baseline = None
+    if not args.save_baseline:
+        # Without a comparable baseline nothing can be flagged, so a silent pass would hide regressions
+        if not os.path.exists(args.baseline):
+            parser.error(f"Baseline {args.baseline} not found; run with --save-baseline to create it")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != options:
+            parser.error(f"Baseline {args.baseline} was recorded with other input options: {baseline.get('options')}")
+
+    results = [
+        benchmark(case, size_class, args.data_dir, options, args.repeat)
+        for size_class in sizes for case in cases
+    ]
+    report = {"environment": environment(), "options": options, "results": results}
+
+    comparisons = []
+    if baseline is not None:
+        comparisons = compare_with_baseline(results, baseline, args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "results": comparisons}
+    print_table(results, comparisons)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    regressed = [comparison["name"] for comparison in comparisons if comparison["regressions"]]
+    if regressed:
+        print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
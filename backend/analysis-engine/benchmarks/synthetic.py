@@ -0,0 +1,213 @@
+"""
+Synthetic genome and read generator
+Deterministic FASTA/FASTQ inputs with configurable read length, GC bias, N content and quality profile
+"""
+import argparse
+import os
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Records generated (and written) per vectorized batch
+BATCH_RECORDS = 20000
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+QUALITY_PROFILES = ["illumina", "flat", "binned"]
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as "64KB", "1.5GB" or "4096" into bytes."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?B?)\s*", str(size).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def random_bases(rng: np.random.Generator, count: int, gc: float = 0.5, n_rate: float = 0.0) -> np.ndarray:
+    """
+    Draw nucleotides with a given GC fraction and N rate.
+
+    Args:
+        rng (np.random.Generator): Random source
+        count (int): Number of bases
+        gc (float): Fraction of G/C among A/C/G/T
+        n_rate (float): Fraction of bases replaced by N
+
+    Returns:
+        np.ndarray: uint8 ASCII codes
+    """
+    # A, C, G, T with G+C = gc
+    thresholds = np.cumsum([(1 - gc) / 2, gc / 2, gc / 2])
+    bases = _BASES[np.searchsorted(thresholds, rng.random(count), side="right")]
+    if n_rate > 0:
+        bases[rng.random(count) < n_rate] = ord("N")
+    return bases
+
+
+def quality_scores(rng: np.random.Generator, reads: int, length: int, profile: str = "illumina") -> np.ndarray:
+    """
+    Draw Phred+33 quality strings for a batch of reads.
+
+    Profiles: "illumina" decays from ~Q38 to ~Q25 along the read with noise,
+    "flat" is Q30 +/- noise and "binned" uses NovaSeq-style bins (2, 12, 23, 37).
+
+    Returns:
+        np.ndarray: (reads, length) uint8 ASCII codes
+    """
+    if profile == "binned":
+        bins = np.array([2, 12, 23, 37], dtype=np.uint8)
+        scores = bins[np.searchsorted([0.02, 0.05, 0.15], rng.random((reads, length)))]
+    else:
+        if profile == "illumina":
+            mean = 38 - 13 * (np.arange(length) / max(length - 1, 1)) ** 2
+        elif profile == "flat":
+            mean = np.full(length, 30.0)
+        else:
+            raise ValueError(f"Unknown quality profile: {profile}")
+        scores = np.clip(np.rint(mean + rng.normal(0, 3, (reads, length))), 2, 41).astype(np.uint8)
+    return scores + np.uint8(33)
+
+
+def _fixed_width_records(prefix: bytes, start: int, count: int, width: int) -> np.ndarray:
+    """(count, len(prefix) + width + 1) array of header lines: prefix, zero-padded id, newline."""
+    ids = np.char.zfill(np.arange(start, start + count).astype(str), width).astype(f"S{width}")
+    headers = np.frombuffer(ids.tobytes(), dtype=np.uint8).reshape(count, width)
+    return np.hstack([
+        np.tile(np.frombuffer(prefix, dtype=np.uint8), (count, 1)),
+        headers,
+        np.full((count, 1), ord("\n"), dtype=np.uint8)
+    ])
+
+
+def write_fastq(path: str, size: int, read_length: int = 150, gc: float = 0.5, n_rate: float = 0.001,
+                quality_profile: str = "illumina", seed: int = 0) -> int:
+    """
+    Write a FASTQ file of about size bytes.
+
+    Returns:
+        int: Number of reads written
+    """
+    rng = np.random.default_rng(seed)
+    id_width = 12
+    record_size = (2 + id_width + 1) + (read_length + 1) + 2 + (read_length + 1)
+    total = max(1, size // record_size)
+    newline = np.full((1, 1), ord("\n"), dtype=np.uint8)
+    separator = np.frombuffer(b"+\n", dtype=np.uint8)
+    with open(path, "wb") as f:
+        for start in range(0, total, BATCH_RECORDS):
+            count = min(BATCH_RECORDS, total - start)
+            sequences = random_bases(rng, count * read_length, gc, n_rate).reshape(count, read_length)
+            qualities = quality_scores(rng, count, read_length, quality_profile)
+            records = np.hstack([
+                _fixed_width_records(b"@r", start, count, id_width),
+                sequences, np.repeat(newline, count, axis=0),
+                np.tile(separator, (count, 1)),
+                qualities, np.repeat(newline, count, axis=0)
+            ])
+            f.write(records.tobytes())
+    return total
+
+
+def write_fasta(path: str, size: int, record_length: int = 100000, gc: float = 0.5, n_rate: float = 0.001,
+                line_width: int = 60, seed: int = 0) -> int:
+    """
+    Write a multi-record FASTA file of about size bytes (sequence lines wrapped at line_width).
+
+    Returns:
+        int: Number of records written
+    """
+    rng = np.random.default_rng(seed)
+    id_width = 8
+    full_lines, last_line = divmod(record_length, line_width)
+    record_size = (7 + id_width + 1) + record_length + full_lines + (1 if last_line else 0)
+    total = max(1, size // record_size)
+    batch = max(1, min(BATCH_RECORDS, (64 * 1024 * 1024) // record_size))
+    with open(path, "wb") as f:
+        for start in range(0, total, batch):
+            count = min(batch, total - start)
+            headers = _fixed_width_records(b">contig", start, count, id_width)
+            sequences = random_bases(rng, count * record_length, gc, n_rate).reshape(count, record_length)
+            wrapped = np.full((count, full_lines, line_width + 1), ord("\n"), dtype=np.uint8)
+            wrapped[:, :, :line_width] = sequences[:, :full_lines * line_width].reshape(count, full_lines, line_width)
+            parts = [headers, wrapped.reshape(count, -1)]
+            if last_line:
+                parts += [sequences[:, full_lines * line_width:], np.full((count, 1), ord("\n"), dtype=np.uint8)]
+            f.write(np.hstack(parts).tobytes())
+    return total
+
+
+def mutate(sequence: bytes, rng: np.random.Generator, rate: float = 0.001, indel_fraction: float = 0.2,
+           max_indel: int = 10) -> Tuple[bytes, int]:
+    """
+    Apply random substitutions and short indels to a sequence.
+
+    Returns:
+        Tuple[bytes, int]: Mutated sequence and number of mutation events
+    """
+    events = int(len(sequence) * rate)
+    positions = np.sort(rng.choice(max(1, len(sequence) - max_indel), size=events, replace=False))
+    kinds = rng.random(events)
+    parts, previous = [], 0
+    for position, kind in zip(positions.tolist(), kinds.tolist()):
+        if position < previous:
+            continue
+        parts.append(sequence[previous:position])
+        if kind < indel_fraction / 2:
+            # Insertion
+            parts.append(random_bases(rng, int(rng.integers(1, max_indel + 1))).tobytes())
+            previous = position
+        elif kind < indel_fraction:
+            # Deletion
+            previous = position + int(rng.integers(1, max_indel + 1))
+        else:
+            # Substitution by one of the three other bases
+            shift = int(rng.integers(1, 4))
+            parts.append(bytes([b"ACGT"[(b"ACGT".find(sequence[position:position + 1]) + shift) % 4]]))
+            previous = position + 1
+    parts.append(sequence[previous:])
+    return b"".join(parts), events
+
+
+def write_mutation_pair(reference_path: str, query_path: str, length: int, rate: float = 0.001,
+                        gc: float = 0.5, seed: int = 0) -> int:
+    """
+    Write a single-record reference and a mutated copy of it as the query.
+
+    Returns:
+        int: Number of mutation events applied
+    """
+    rng = np.random.default_rng(seed)
+    reference = random_bases(rng, length, gc).tobytes()
+    query, events = mutate(reference, rng, rate)
+    for path, name, sequence in [(reference_path, b"chr1", reference), (query_path, b"chr1", query)]:
+        with open(path, "wb") as f:
+            f.write(b">" + name + b"\n")
+            for start in range(0, len(sequence), 60):
+                f.write(sequence[start:start + 60] + b"\n")
+    return events
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic FASTA/FASTQ files")
+    parser.add_argument("format", choices=["fasta", "fastq"])
+    parser.add_argument("output")
+    parser.add_argument("--size", default="10MB", help="Approximate output size (e.g. 64KB, 1GB)")
+    parser.add_argument("--read-length", type=int, default=150, help="FASTQ read length")
+    parser.add_argument("--record-length", type=int, default=100000, help="FASTA record length")
+    parser.add_argument("--gc", type=float, default=0.5, help="GC fraction")
+    parser.add_argument("--n-rate", type=float, default=0.001, help="Fraction of N bases")
+    parser.add_argument("--quality", choices=QUALITY_PROFILES, default="illumina", help="FASTQ quality profile")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    size = parse_size(args.size)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    if args.format == "fastq":
+        count = write_fastq(args.output, size, args.read_length, args.gc, args.n_rate, args.quality, args.seed)
+    else:
+        count = write_fasta(args.output, size, args.record_length, args.gc, args.n_rate, seed=args.seed)
+    print(f"Wrote {count} records ({os.path.getsize(args.output)} bytes) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Batch analysis helpers
+Expands batch inputs, orders files for scheduling and combines per-file results into a run summary
+"""
+import glob
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+# Statistics averaged over bases are weighted by total_length, the rest by sequence_count
+_BASE_WEIGHTED = ["average_quality", "q20_fraction", "q30_fraction"]
+_SEQUENCE_WEIGHTED = ["average_gc_content"]
+
+
+def expand_batch_paths(file_paths: List[str], pattern: Optional[str] = None) -> List[str]:
+    """
+    Collect the files of a batch from explicit paths and/or a glob pattern.
+
+    Args:
+        file_paths (List[str]): Explicit file paths
+        pattern (Optional[str]): Glob pattern ("**" matches recursively)
+
+    Returns:
+        List[str]: Unique paths, in input order followed by sorted glob matches
+    """
+    paths = list(file_paths)
+    if pattern:
+        paths.extend(sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)))
+    return list(dict.fromkeys(paths))
+
+
+def order_largest_first(file_paths: List[str]) -> List[Tuple[str, int]]:
+    """
+    Order files by decreasing size so the longest analyses start first.
+
+    Missing files are kept (size -1) so they are reported as failures.
+
+    Returns:
+        List[Tuple[str, int]]: (path, size in bytes) pairs
+    """
+    sized = []
+    for path in file_paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = -1
+        sized.append((path, size))
+    return sorted(sized, key=lambda item: item[1], reverse=True)
+
+
+class BatchSummary:
+    """Run-level totals over the per-file results of a batch."""
+
+    def __init__(self):
+        self.files_total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+        self.total_bytes = 0
+        self.sequence_count = 0
+        self.total_length = 0
+        self.longest: Optional[int] = None
+        self.shortest: Optional[int] = None
+        self._weighted_sums: Dict[str, float] = {}
+        self._weights: Dict[str, float] = {}
+        self.failures: List[Dict[str, Any]] = []
+
+    def _add_weighted(self, name: str, value: Optional[float], weight: float) -> None:
+        if value is None or weight <= 0:
+            return
+        self._weighted_sums[name] = self._weighted_sums.get(name, 0.0) + value * weight
+        self._weights[name] = self._weights.get(name, 0.0) + weight
+
+    def add(self, file_path: str, file_size: int, result: Dict[str, Any], cached: bool = False) -> None:
+        """
+        Account for one finished file.
+
+        Args:
+            file_path (str): Path of the file
+            file_size (int): Size in bytes (-1 if unknown)
+            result (Dict[str, Any]): Analysis result, or a dict with an "error" key
+            cached (bool): Whether the result came from the result cache
+        """
+        self.files_total += 1
+        if "error" in result:
+            self.failed += 1
+            self.failures.append({"file_path": file_path, "error": result["error"]})
+            return
+        self.succeeded += 1
+        self.cached += int(cached)
+        self.total_bytes += max(file_size, 0)
+        count = result.get("sequence_count", 0)
+        statistics = result.get("statistics", {})
+        length = statistics.get("total_length", 0)
+        self.sequence_count += count
+        self.total_length += length
+        if statistics.get("longest_sequence") is not None:
+            self.longest = max(self.longest or 0, statistics["longest_sequence"])
+        if statistics.get("shortest_sequence") is not None:
+            shortest = statistics["shortest_sequence"]
+            self.shortest = shortest if self.shortest is None else min(self.shortest, shortest)
+        for name in _SEQUENCE_WEIGHTED:
+            self._add_weighted(name, statistics.get(name), count)
+        for name in _BASE_WEIGHTED:
+            self._add_weighted(name, statistics.get(name), length)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the run summary."""
+        statistics = {
+            "sequence_count": self.sequence_count,
+            "total_length": self.total_length,
+            "average_length": round(self.total_length / self.sequence_count, 2) if self.sequence_count else 0,
+            "longest_sequence": self.longest,
+            "shortest_sequence": self.shortest
+        }
+        for name, total in self._weighted_sums.items():
+            digits = 4 if name.endswith("_fraction") else 2
+            statistics[name] = round(total / self._weights[name], digits)
+        return {
+            "files_total": self.files_total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cached": self.cached,
+            "total_bytes": self.total_bytes,
+            "statistics": statistics,
+            "failures": self.failures
+        }
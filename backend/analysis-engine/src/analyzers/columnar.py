@@ -0,0 +1,187 @@
+"""
+Columnar result files
+Writes per-sequence rows to Parquet / Arrow IPC in record batches and memory-maps them back
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Any, Optional
+
+from utils.cache import EXECUTION_OPTIONS
+from utils.helpers import file_identity, get_sequence_extension, FASTQ_EXTENSIONS
+from utils.metrics import span
+
+# Output format -> file suffix
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+# Rows buffered per record batch (one Parquet row group / IPC batch each)
+BATCH_ROWS = int(os.getenv("COLUMNAR_BATCH_ROWS", "65536"))
+
+
+def _pyarrow():
+    # Imported on first use: pyarrow is slow to import and only needed for columnar output
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Columnar output requires the pyarrow package")
+    return pyarrow
+
+
+def columnar_path(file_path: str, output_format: str, analysis_type: str = "basic",
+                  options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Location of the columnar file written next to an input file.
+
+    The name carries the analysis type and a digest of the options that shape
+    the rows, so different analyses of one input never overwrite each other.
+    """
+    if output_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format} (expected one of {', '.join(COLUMNAR_FORMATS)})")
+    relevant = {k: v for k, v in (options or {}).items() if k not in EXECUTION_OPTIONS and k != "output_format"}
+    digest = hashlib.sha256(json.dumps([analysis_type, relevant], sort_keys=True, default=str).encode()).hexdigest()
+    return f"{file_path}.{analysis_type}-{digest[:12]}.sequences{COLUMNAR_FORMATS[output_format]}"
+
+
+def is_current(sequences_file: Dict[str, Any]) -> bool:
+    """Whether a columnar file is still the one described by a result's sequences_file entry."""
+    identity = sequences_file.get("identity")
+    return identity is not None and file_identity(sequences_file["path"]) == identity
+
+
+def sequence_schema(file_path: str, analysis_type: str, options: Dict[str, Any]):
+    """
+    Arrow schema of the per-sequence rows an analysis produces.
+
+    Schemas are fixed up front so that a batch of all-null or empty values
+    (e.g. pairs without an insert size) cannot narrow the column types.
+
+    Returns:
+        pyarrow.Schema: Row schema
+    """
+    pa = _pyarrow()
+    composition = pa.struct([(base, pa.int64()) for base in ["A", "T", "G", "C", "N", "other"]])
+    fields = [
+        ("id", pa.string()),
+        ("description", pa.string()),
+        ("length", pa.int64())
+    ]
+    if get_sequence_extension(file_path) in FASTQ_EXTENSIONS:
+        fields.append(("average_quality", pa.float64()))
+    fields += [("gc_content", pa.float64()), ("composition", composition)]
+    if options.get("mate_file_path"):
+        read = pa.struct(fields)
+        return pa.schema([
+            ("id", pa.string()),
+            ("ids_match", pa.bool_()),
+            ("insert_size", pa.int64()),
+            ("read1", read),
+            ("read2", read)
+        ])
+    if analysis_type == "mutation_detection":
+        mutation = pa.struct([
+            ("position", pa.int64()),
+            ("reference", pa.string()),
+            ("variant", pa.string()),
+            ("type", pa.string()),
+            ("length", pa.int64())
+        ])
+        return pa.schema([
+            ("id", pa.string()),
+            ("reference_id", pa.string()),
+            ("length", pa.int64()),
+            ("mutation_count", pa.int64()),
+            ("mutations", pa.list_(mutation)),
+            # Set (and the mutation columns null) for records too divergent to align
+            ("error", pa.string())
+        ])
+    return pa.schema(fields)
+
+
+class ColumnarWriter:
+    """Buffers per-sequence rows and writes them as record batches to a Parquet or Arrow IPC file."""
+
+    def __init__(self, path: str, output_format: str, schema, batch_rows: int = BATCH_ROWS):
+        """
+        Args:
+            path (str): Destination file; written to a temporary name and moved into place on close
+            output_format (str): "parquet" or "arrow"
+            schema (pyarrow.Schema): Row schema
+            batch_rows (int): Rows per record batch
+        """
+        pa = _pyarrow()
+        self.path = path
+        self.output_format = output_format
+        self.schema = schema
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._temp_path = f"{path}.{os.getpid()}.tmp"
+        if output_format == "parquet":
+            self._writer = pa.parquet.ParquetWriter(self._temp_path, schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(self._temp_path, schema)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Add one row, flushing a record batch when the buffer is full."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        with span("serialization"):
+            batch = _pyarrow().RecordBatch.from_pylist(self._buffer, schema=self.schema)
+            self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+        self._buffer = []
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Flush the remaining rows and move the file into place.
+
+        Returns:
+            Dict[str, Any]: File location, format, row count, size and identity
+            (see file_identity), which tells a later rewrite of the path apart
+        """
+        self._flush()
+        self._writer.close()
+        os.replace(self._temp_path, self.path)
+        return {
+            "path": self.path,
+            "format": self.output_format,
+            "rows": self.rows,
+            "size": os.path.getsize(self.path),
+            "identity": file_identity(self.path)
+        }
+
+    def abort(self) -> None:
+        """Discard a partially written file."""
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+def read_columnar(path: str, columns: Optional[List[str]] = None):
+    """
+    Open a columnar result file as an Arrow table.
+
+    Arrow IPC files are memory-mapped and read without copying; Parquet files
+    are memory-mapped and only the requested columns are decoded.
+
+    Args:
+        path (str): Path of a .arrow or .parquet file
+        columns (Optional[List[str]]): Columns to read (all when omitted)
+
+    Returns:
+        pyarrow.Table: Per-sequence rows
+    """
+    pa = _pyarrow()
+    if path.endswith(COLUMNAR_FORMATS["parquet"]):
+        return pa.parquet.read_table(path, columns=columns, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.select(columns) if columns else table
@@ -0,0 +1,160 @@
+"""
+Vectorized nucleotide composition engine
+Reads each sequence buffer once as a uint8 array and derives all counts from one histogram
+"""
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+from Bio.Seq import Seq
+
+SequenceLike = Union[Seq, str, bytes, bytearray, memoryview]
+
+# Byte codes used by the composition report (case-sensitive, like Seq.count)
+_COMPOSITION_CODES = {base: ord(base) for base in "ATGCN"}
+# Bio.SeqUtils.gc_fraction(ambiguous="remove") semantics
+_GC_CODES = np.frombuffer(b"CGScgs", dtype=np.uint8)
+_AT_CODES = np.frombuffer(b"ATWUatwu", dtype=np.uint8)
+_STRICT_GC_CODES = np.frombuffer(b"GC", dtype=np.uint8)
+# 2-bit codes for A/C/G/T (either case); every other byte breaks a k-mer
+_KMER_CODES = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _KMER_CODES[ord(_base)] = _KMER_CODES[ord(_base.lower())] = _code
+# Largest k whose 2-bit code fits in a uint64
+MAX_K = 32
+
+
+def _as_array(sequence: SequenceLike) -> np.ndarray:
+    """View a sequence as a uint8 array without copying where possible."""
+    if isinstance(sequence, str):
+        sequence = sequence.encode("ascii")
+    elif isinstance(sequence, Seq):
+        sequence = bytes(sequence)
+    return np.frombuffer(sequence, dtype=np.uint8)
+
+
+def base_counts(sequence: SequenceLike) -> np.ndarray:
+    """
+    Count every byte value of a sequence in a single pass.
+
+    Args:
+        sequence (SequenceLike): Sequence as Seq, str, bytes or memoryview
+
+    Returns:
+        np.ndarray: Histogram of length 256 indexed by byte value
+    """
+    return np.bincount(_as_array(sequence), minlength=256)
+
+
+def batch_base_counts(sequences: Sequence[SequenceLike]) -> np.ndarray:
+    """
+    Count byte values for many sequences with one histogram call.
+
+    Args:
+        sequences (Sequence[SequenceLike]): Sequences to count
+
+    Returns:
+        np.ndarray: Array of shape (len(sequences), 256) with one histogram per row
+    """
+    if not sequences:
+        return np.zeros((0, 256), dtype=np.int64)
+    try:
+        # Byte sequences (native reader records) are concatenated in one call
+        data = np.frombuffer(b"".join(sequences), dtype=np.uint8)
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    except TypeError:
+        arrays = [_as_array(sequence) for sequence in sequences]
+        lengths = np.fromiter((len(array) for array in arrays), dtype=np.int64, count=len(arrays))
+        data = np.concatenate(arrays)
+    rows = np.repeat(np.arange(len(sequences), dtype=np.int64), lengths)
+    counts = np.bincount(rows * 256 + data, minlength=len(sequences) * 256)
+    return counts.reshape(len(sequences), 256)
+
+
+def nucleotide_composition(counts: np.ndarray) -> Dict[str, int]:
+    """
+    Build the A/T/G/C/N/other composition from a byte histogram.
+
+    Args:
+        counts (np.ndarray): Histogram from base_counts
+
+    Returns:
+        Dict[str, int]: Nucleotide composition
+    """
+    composition = {base: int(counts[code]) for base, code in _COMPOSITION_CODES.items()}
+    composition["other"] = int(counts.sum()) - sum(composition.values())
+    return composition
+
+
+def batch_nucleotide_composition(counts: np.ndarray) -> List[Dict[str, int]]:
+    """Build compositions for every row of a batch histogram."""
+    codes = list(_COMPOSITION_CODES.values())
+    known = counts[:, codes]
+    other = counts.sum(axis=1) - known.sum(axis=1)
+    return [
+        {"A": int(a), "T": int(t), "G": int(g), "C": int(c), "N": int(n), "other": int(o)}
+        for (a, t, g, c, n), o in zip(known.tolist(), other.tolist())
+    ]
+
+
+def gc_fraction(counts: np.ndarray) -> float:
+    """
+    GC fraction matching Bio.SeqUtils.gc_fraction with ambiguous="remove".
+
+    Args:
+        counts (np.ndarray): Histogram from base_counts
+
+    Returns:
+        float: GC fraction between 0 and 1
+    """
+    gc = int(counts[_GC_CODES].sum())
+    length = gc + int(counts[_AT_CODES].sum())
+    if length == 0:
+        return 0
+    return gc / length
+
+
+def gc_percent(counts: np.ndarray) -> float:
+    """
+    Strict G+C percentage over the full sequence length.
+
+    Args:
+        counts (np.ndarray): Histogram from base_counts
+
+    Returns:
+        float: Percentage of upper-case G and C bases
+    """
+    length = int(counts.sum())
+    gc = int(counts[_STRICT_GC_CODES].sum())
+    return (gc / length) * 100 if length > 0 else 0.0
+
+
+def batch_gc_percent(counts: np.ndarray) -> List[float]:
+    """Strict G+C percentage for every row of a batch histogram."""
+    return [
+        (gc / length) * 100 if length > 0 else 0.0
+        for gc, length in zip(counts[:, _STRICT_GC_CODES].sum(axis=1).tolist(), counts.sum(axis=1).tolist())
+    ]
+
+
+def kmer_codes(sequence: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    2-bit pack every k-mer of a sequence into an integer.
+
+    Args:
+        sequence (np.ndarray): uint8 sequence
+        k (int): k-mer length (at most MAX_K)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: uint64 codes and a mask of k-mers made only of A/C/G/T
+    """
+    count = len(sequence) - k + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    values = _KMER_CODES[sequence]
+    invalid = np.concatenate(([0], np.cumsum(values == 255)))
+    valid = (invalid[k:] - invalid[:count]) == 0
+    values = values.astype(np.uint64) & np.uint64(3)
+    codes = np.zeros(count, dtype=np.uint64)
+    for offset in range(k):
+        codes = (codes << np.uint64(2)) | values[offset:offset + count]
+    return codes, valid
@@ -2,11 +2,18 @@
 FASTA file analyzer using BioPython
 Provides basic genomic sequence analysis functionality
 """
-from typing import Dict, List, Any
-from Bio import SeqIO
+import os
+import time
+from typing import BinaryIO, Dict, List, Any, Iterator, Optional
 from Bio.Seq import Seq
-from Bio.SeqUtils import gc_fraction
-import io
+
+from analyzers import composition
+from analyzers.mutation_detector import MutationDetector
+from analyzers.pagination import SequencePage
+from analyzers.reader import read_fasta, record_id
+from analyzers.summary import SequenceSummary
+from utils.helpers import open_sequence_file, get_raw_position, AnalysisCancelled, ProgressCallback
+from utils.metrics import stage_timings
 
 class FastaAnalyzer:
     """Analyzer for FASTA format genomic files."""
@@ -14,78 +21,136 @@ class FastaAnalyzer:
     def __init__(self):
         self.supported_formats = ["fasta", "fa", "fas"]
     
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
+    def analyze_file(self, file_path: str, include_sequences: bool = True,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Analyze a FASTA file and return basic statistics.
         
+        The file is streamed in a single pass, so memory use does not grow with
+        the file size apart from the per-sequence results themselves.
+        
         Args:
-            file_path (str): Path to the FASTA file
+            file_path (str): Path to the FASTA file (plain, gzip or bgzip)
+            include_sequences (bool): Include per-sequence results; disable for
+                constant-memory analysis of very large files
+            progress_callback (Optional[ProgressCallback]): Called with
+                (bytes_processed, bytes_total) as records are analyzed
+            offset (int): Index of the first per-sequence result to return
+            limit (Optional[int]): Maximum number of per-sequence results to return
             
         Returns:
             Dict[str, Any]: Analysis results including sequence stats
         """
         try:
-            sequences = list(SeqIO.parse(file_path, "fasta"))
-            
-            if not sequences:
-                return {"error": "No sequences found in file"}
-            
-            results = {
-                "file_type": "FASTA",
-                "sequence_count": len(sequences),
-                "sequences": []
-            }
+            summary = SequenceSummary()
+            page = SequencePage(offset, limit if include_sequences else 0)
             
-            total_length = 0
-            gc_contents = []
+            for seq_info in self.iter_sequences(file_path, summary, progress_callback):
+                page.add(seq_info)
             
-            for i, record in enumerate(sequences):
-                seq_info = {
-                    "id": record.id,
-                    "description": record.description,
-                    "length": len(record.seq),
-                    "gc_content": round(gc_fraction(record.seq) * 100, 2),
-                    "composition": self._get_nucleotide_composition(record.seq)
-                }
-                
-                results["sequences"].append(seq_info)
-                total_length += len(record.seq)
-                gc_contents.append(gc_fraction(record.seq) * 100)
-            
-            # Overall statistics
-            results["statistics"] = {
-                "total_length": total_length,
-                "average_length": round(total_length / len(sequences), 2),
-                "average_gc_content": round(sum(gc_contents) / len(gc_contents), 2),
-                "longest_sequence": max(len(seq.seq) for seq in sequences),
-                "shortest_sequence": min(len(seq.seq) for seq in sequences)
-            }
+            if summary.count == 0:
+                return {"error": "No sequences found in file"}
             
-            return results
+            return self.build_results(summary, page.rows, page.pagination())
             
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             return {"error": f"Failed to analyze FASTA file: {str(e)}"}
     
-    def _get_nucleotide_composition(self, sequence: Seq) -> Dict[str, int]:
-        """Calculate nucleotide composition of a sequence."""
-        composition = {
-            "A": sequence.count("A"),
-            "T": sequence.count("T"),
-            "G": sequence.count("G"),
-            "C": sequence.count("C"),
-            "N": sequence.count("N"),
-            "other": 0
+    def build_results(self, summary: SequenceSummary, sequences: List[Dict[str, Any]],
+                      pagination: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Assemble the analysis result from aggregate state and per-sequence rows.
+        
+        Args:
+            summary (SequenceSummary): Aggregate over all analyzed sequences
+            sequences (List[Dict[str, Any]]): Per-sequence results (may be empty)
+            pagination (Optional[Dict[str, Any]]): Pagination metadata for a partial page
+            
+        Returns:
+            Dict[str, Any]: Analysis results including sequence stats
+        """
+        results = {
+            "file_type": "FASTA",
+            "sequence_count": summary.count,
+            "sequences": sequences,
+            "statistics": summary.to_statistics(),
+            "distributions": summary.to_distributions()
         }
+        if pagination is not None:
+            results["pagination"] = pagination
+        return results
+    
+    def iter_sequences(self, file_path: str, summary: Optional[SequenceSummary] = None,
+                       progress_callback: Optional[ProgressCallback] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream per-sequence results from a FASTA file one record at a time.
         
-        # Count other nucleotides
-        total_known = sum(composition.values())
-        composition["other"] = len(sequence) - total_known
+        Args:
+            file_path (str): Path to the FASTA file (plain, gzip or bgzip)
+            summary (Optional[SequenceSummary]): Running summary updated with each record
+            progress_callback (Optional[ProgressCallback]): Called after each record
+            
+        Yields:
+            Dict[str, Any]: Per-sequence results
+        """
+        total = os.path.getsize(file_path)
+        with open_sequence_file(file_path, "rb") as handle:
+            for seq_info in self.iter_handle(handle, summary):
+                if progress_callback is not None:
+                    progress_callback(get_raw_position(handle), total)
+                yield seq_info
+    
+    def iter_handle(self, handle: BinaryIO, summary: Optional[SequenceSummary] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream per-sequence results from an open FASTA binary handle.
         
-        return composition
+        Args:
+            handle (BinaryIO): Binary handle positioned at a record boundary
+            summary (Optional[SequenceSummary]): Running summary updated with each record
+            
+        Yields:
+            Dict[str, Any]: Per-sequence results
+        """
+        # Stage times are summed locally and reported once; per-record spans would cost more
+        parse_seconds = composition_seconds = 0.0
+        records = 0
+        started = time.perf_counter()
+        try:
+            for title, sequence in read_fasta(handle):
+                parsed = time.perf_counter()
+                parse_seconds += parsed - started
+                records += 1
+                length = len(sequence)
+                counts = composition.base_counts(sequence)
+                gc_content = composition.gc_fraction(counts) * 100
+                nucleotides = composition.nucleotide_composition(counts)
+                composition_seconds += time.perf_counter() - parsed
+                
+                if summary is not None:
+                    summary.add(length, gc_content)
+                
+                yield {
+                    "id": record_id(title),
+                    "description": title,
+                    "length": length,
+                    "gc_content": round(gc_content, 2),
+                    "composition": nucleotides
+                }
+                started = time.perf_counter()
+        finally:
+            stage_timings.add("parse", parse_seconds, records)
+            stage_timings.add("composition", composition_seconds, records)
+    
+    def _get_nucleotide_composition(self, sequence: Seq) -> Dict[str, int]:
+        """Calculate nucleotide composition of a sequence."""
+        return composition.nucleotide_composition(composition.base_counts(sequence))
     
     def detect_mutations(self, sequence: Seq, reference: Seq) -> List[Dict[str, Any]]:
         """
-        Basic mutation detection by comparing with reference sequence.
+        Detect substitutions and indels by aligning with a reference sequence.
         
         Args:
             sequence (Seq): Query sequence
@@ -94,34 +159,5 @@ class FastaAnalyzer:
         Returns:
             List[Dict[str, Any]]: List of detected mutations
         """
-        mutations = []
-        
-        # Simple position-by-position comparison
-        min_length = min(len(sequence), len(reference))
-        
-        for i in range(min_length):
-            if sequence[i] != reference[i]:
-                mutation = {
-                    "position": i + 1,  # 1-based position
-                    "reference": reference[i],
-                    "variant": sequence[i],
-                    "type": "substitution"
-                }
-                mutations.append(mutation)
-        
-        # Check for length differences
-        if len(sequence) != len(reference):
-            if len(sequence) > len(reference):
-                mutations.append({
-                    "position": len(reference) + 1,
-                    "type": "insertion",
-                    "length": len(sequence) - len(reference)
-                })
-            else:
-                mutations.append({
-                    "position": len(sequence) + 1,
-                    "type": "deletion",
-                    "length": len(reference) - len(sequence)
-                })
-        
-        return mutations
\ No newline at end of file
+        # For many queries against one reference, reuse a MutationDetector instead
+        return MutationDetector(reference).detect(sequence)
\ No newline at end of file
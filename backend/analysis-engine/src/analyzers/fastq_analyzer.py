@@ -2,77 +2,281 @@
 FASTQ file analyzer using BioPython
 Provides basic sequence and quality statistics for FASTQ files
 """
-from typing import Dict, List, Any
-from Bio import SeqIO
+import os
+import time
+from itertools import zip_longest
+from typing import BinaryIO, Dict, List, Any, Iterator, Optional, Tuple
 from Bio.Seq import Seq
 
+from analyzers import composition
+from analyzers.pagination import SequencePage
+from analyzers.pairing import PairStatistics, mate_id, overlap_insert_size
+from analyzers.quality import QualityAccumulator
+from analyzers.reader import read_fastq, record_id, FastqRecord
+from analyzers.summary import SequenceSummary
+from utils.helpers import open_sequence_file, get_raw_position, AnalysisCancelled, ProgressCallback
+from utils.metrics import span, stage_timings
+
 class FastqAnalyzer:
 	"""Analyzer for FASTQ format genomic files."""
     
-	def __init__(self):
+	def __init__(self, batch_size: int = 4096):
 		self.supported_formats = ["fastq", "fq"]
+		# Reads per vectorized composition call
+		self.batch_size = batch_size
     
-	def analyze_file(self, file_path: str) -> Dict[str, Any]:
+	def analyze_file(self, file_path: str, include_sequences: bool = True, progress_callback: Optional[ProgressCallback] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
 		"""
 		Analyze a FASTQ file and return basic statistics.
+		Reads are streamed in batches and qualities are kept as uint8 arrays and
+		histograms, so memory stays bounded regardless of the number of reads.
 		Args:
-			file_path (str): Path to the FASTQ file
+			file_path (str): Path to the FASTQ file (plain, gzip or bgzip)
+			include_sequences (bool): Include per-read results
+			progress_callback (Optional[ProgressCallback]): Called with (bytes_processed, bytes_total) after each batch
+			offset (int): Index of the first per-read result to return
+			limit (Optional[int]): Maximum number of per-read results to return
 		Returns:
 			Dict[str, Any]: Analysis results including sequence and quality stats
 		"""
 		try:
-			sequences = list(SeqIO.parse(file_path, "fastq"))
-			if not sequences:
+			summary = SequenceSummary()
+			quality = QualityAccumulator()
+			page = SequencePage(offset, limit if include_sequences else 0)
+			for seq_info in self.iter_sequences(file_path, summary, quality, progress_callback):
+				page.add(seq_info)
+			if summary.count == 0:
 				return {"error": "No sequences found in file"}
-			results = {
-				"file_type": "FASTQ",
-				"sequence_count": len(sequences),
-				"sequences": []
-			}
-			total_length = 0
-			total_qualities = 0
-			all_qualities = []
-			for record in sequences:
-				qualities = record.letter_annotations.get("phred_quality", [])
-				avg_quality = round(sum(qualities) / len(qualities), 2) if qualities else None
-				seq_info = {
-					"id": record.id,
-					"description": record.description,
-					"length": len(record.seq),
-					"average_quality": avg_quality,
-					"gc_content": round(self._gc_content(record.seq), 2),
-					"composition": self._get_nucleotide_composition(record.seq)
-				}
-				results["sequences"].append(seq_info)
-				total_length += len(record.seq)
-				if avg_quality is not None:
-					total_qualities += avg_quality
-					all_qualities.extend(qualities)
-			results["statistics"] = {
-				"total_length": total_length,
-				"average_length": round(total_length / len(sequences), 2),
-				"average_quality": round(sum(all_qualities) / len(all_qualities), 2) if all_qualities else None,
-				"average_gc_content": round(sum(seq["gc_content"] for seq in results["sequences"]) / len(results["sequences"]), 2),
-				"longest_sequence": max(len(seq.seq) for seq in sequences),
-				"shortest_sequence": min(len(seq.seq) for seq in sequences)
-			}
-			return results
+			return self.build_results(summary, quality, page.rows, page.pagination())
+		except AnalysisCancelled:
+			raise
 		except Exception as e:
 			return {"error": f"Failed to analyze FASTQ file: {str(e)}"}
 
+	def analyze_pair(self, file_path: str, mate_file_path: str, include_sequences: bool = True, progress_callback: Optional[ProgressCallback] = None, offset: int = 0, limit: Optional[int] = None, min_overlap: int = 10) -> Dict[str, Any]:
+		"""
+		Analyze a paired-end run (R1 and R2 FASTQ files) in one synchronized pass.
+		Both files are streamed in lockstep batches, so neither is loaded into
+		memory. Each mate gets the usual per-file statistics and the pairs get
+		id synchronisation, insert-size, quality concordance and discordance stats.
+		Args:
+			file_path (str): Path to the R1 FASTQ file (plain, gzip or bgzip)
+			mate_file_path (str): Path to the R2 FASTQ file
+			include_sequences (bool): Include per-pair results
+			progress_callback (Optional[ProgressCallback]): Called with (bytes_processed, bytes_total) over both files after each batch
+			offset (int): Index of the first per-pair result to return
+			limit (Optional[int]): Maximum number of per-pair results to return
+			min_overlap (int): Minimum mate overlap used for the insert-size estimate
+		Returns:
+			Dict[str, Any]: Per-mate and pair-level statistics
+		"""
+		try:
+			summaries = (SequenceSummary(), SequenceSummary())
+			qualities = (QualityAccumulator(), QualityAccumulator())
+			pairs = PairStatistics()
+			page = SequencePage(offset, limit if include_sequences else 0)
+			for pair_info in self.iter_pairs(file_path, mate_file_path, summaries, qualities, pairs, progress_callback, min_overlap):
+				page.add(pair_info)
+			if pairs.pairs == 0:
+				return {"error": "No read pairs found in files"}
+			return self.build_pair_results(summaries, qualities, pairs, page.rows, page.pagination())
+		except AnalysisCancelled:
+			raise
+		except Exception as e:
+			return {"error": f"Failed to analyze paired FASTQ files: {str(e)}"}
+
+	def build_pair_results(self, summaries: Tuple[SequenceSummary, SequenceSummary], qualities: Tuple[QualityAccumulator, QualityAccumulator], pairs: PairStatistics, sequences: List[Dict[str, Any]], pagination: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""
+		Assemble the paired-end result from the state filled by iter_pairs.
+		Args:
+			summaries (Tuple[SequenceSummary, SequenceSummary]): Summaries of each mate
+			qualities (Tuple[QualityAccumulator, QualityAccumulator]): Quality histograms of each mate
+			pairs (PairStatistics): Pair-level statistics
+			sequences (List[Dict[str, Any]]): Per-pair results (may be empty)
+			pagination (Optional[Dict[str, Any]]): Pagination metadata for a partial page
+		Returns:
+			Dict[str, Any]: Per-mate and pair-level statistics
+		"""
+		mates = {}
+		for name, summary, quality in zip(["read1", "read2"], summaries, qualities):
+			mates[name] = self.build_results(summary, quality, [])
+			mates[name].pop("sequences")
+		results = {
+			"file_type": "FASTQ",
+			"paired": True,
+			"sequence_count": pairs.pairs,
+			"sequences": sequences,
+			"statistics": pairs.to_statistics(),
+			**mates
+		}
+		if pagination is not None:
+			results["pagination"] = pagination
+		return results
+
+	def iter_pairs(self, file_path: str, mate_file_path: str, summaries: Tuple[SequenceSummary, SequenceSummary], qualities: Tuple[QualityAccumulator, QualityAccumulator], pairs: PairStatistics, progress_callback: Optional[ProgressCallback] = None, min_overlap: int = 10) -> Iterator[Dict[str, Any]]:
+		"""
+		Stream per-pair results from R1/R2 files read in lockstep.
+		Reads left over in the longer file are counted as unpaired.
+		Args:
+			file_path (str): Path to the R1 FASTQ file
+			mate_file_path (str): Path to the R2 FASTQ file
+			summaries (Tuple[SequenceSummary, SequenceSummary]): Running summaries of each mate
+			qualities (Tuple[QualityAccumulator, QualityAccumulator]): Running quality histograms of each mate
+			pairs (PairStatistics): Running pair-level statistics
+			progress_callback (Optional[ProgressCallback]): Called after each batch of pairs
+			min_overlap (int): Minimum mate overlap used for the insert-size estimate
+		Yields:
+			Dict[str, Any]: Per-pair results
+		"""
+		total = os.path.getsize(file_path) + os.path.getsize(mate_file_path)
+		parse_seconds = 0.0
+		records = 0
+		with open_sequence_file(file_path, "rb") as handle1, open_sequence_file(mate_file_path, "rb") as handle2:
+			batch = []
+			started = time.perf_counter()
+			try:
+				for record1, record2 in zip_longest(read_fastq(handle1), read_fastq(handle2)):
+					if record1 is None or record2 is None:
+						pairs.unpaired["read1" if record2 is None else "read2"] += 1
+						records += 1
+						continue
+					batch.append((record1, record2))
+					if len(batch) >= self.batch_size:
+						parse_seconds += time.perf_counter() - started
+						records += 2 * len(batch)
+						yield from self._process_pairs(batch, summaries, qualities, pairs, min_overlap)
+						batch = []
+						if progress_callback is not None:
+							progress_callback(get_raw_position(handle1) + get_raw_position(handle2), total)
+						started = time.perf_counter()
+				parse_seconds += time.perf_counter() - started
+				if batch:
+					records += 2 * len(batch)
+					yield from self._process_pairs(batch, summaries, qualities, pairs, min_overlap)
+			finally:
+				# Counted per record read, like the FASTA parse stage
+				stage_timings.add("parse", parse_seconds, records)
+			if progress_callback is not None:
+				progress_callback(get_raw_position(handle1) + get_raw_position(handle2), total)
+
+	def _process_pairs(self, batch: List[Tuple[FastqRecord, FastqRecord]], summaries: Tuple[SequenceSummary, SequenceSummary], qualities: Tuple[QualityAccumulator, QualityAccumulator], pairs: PairStatistics, min_overlap: int) -> Iterator[Dict[str, Any]]:
+		rows1 = list(self._process_batch([record1 for record1, _ in batch], summaries[0], qualities[0]))
+		rows2 = list(self._process_batch([record2 for _, record2 in batch], summaries[1], qualities[1]))
+		id_matches = [mate_id(record1.title) == mate_id(record2.title) for record1, record2 in batch]
+		insert_sizes = [overlap_insert_size(record1.sequence, record2.sequence, min_overlap) for record1, record2 in batch]
+		pairs.add_batch(id_matches, insert_sizes, [row["average_quality"] for row in rows1], [row["average_quality"] for row in rows2])
+		for (record1, _), row1, row2, id_match, insert_size in zip(batch, rows1, rows2, id_matches, insert_sizes):
+			yield {
+				"id": mate_id(record1.title),
+				"ids_match": id_match,
+				"insert_size": insert_size,
+				"read1": row1,
+				"read2": row2
+			}
+
+	def build_results(self, summary: SequenceSummary, quality: QualityAccumulator, sequences: List[Dict[str, Any]], pagination: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""
+		Assemble the analysis result from aggregate state and per-read rows.
+		Args:
+			summary (SequenceSummary): Aggregate over all analyzed reads
+			quality (QualityAccumulator): Quality histograms over all analyzed reads
+			sequences (List[Dict[str, Any]]): Per-read results (may be empty)
+			pagination (Optional[Dict[str, Any]]): Pagination metadata for a partial page
+		Returns:
+			Dict[str, Any]: Analysis results including sequence and quality stats
+		"""
+		statistics = summary.to_statistics()
+		quality_statistics = quality.to_statistics()
+		statistics["average_quality"] = quality_statistics.pop("average_quality")
+		statistics.update(quality_statistics)
+		results = {
+			"file_type": "FASTQ",
+			"sequence_count": summary.count,
+			"sequences": sequences,
+			"statistics": statistics,
+			"distributions": summary.to_distributions(),
+			"quality": quality.to_report()
+		}
+		if pagination is not None:
+			results["pagination"] = pagination
+		return results
+
+	def iter_sequences(self, file_path: str, summary: Optional[SequenceSummary] = None, quality: Optional[QualityAccumulator] = None, progress_callback: Optional[ProgressCallback] = None) -> Iterator[Dict[str, Any]]:
+		"""
+		Stream per-read results from a FASTQ file.
+		Args:
+			file_path (str): Path to the FASTQ file (plain, gzip or bgzip)
+			summary (Optional[SequenceSummary]): Running summary updated with each read
+			quality (Optional[QualityAccumulator]): Running quality histograms updated with each read
+			progress_callback (Optional[ProgressCallback]): Called after each batch of reads
+		Yields:
+			Dict[str, Any]: Per-read results
+		"""
+		total = os.path.getsize(file_path)
+		with open_sequence_file(file_path, "rb") as handle:
+			for count, seq_info in enumerate(self.iter_handle(handle, summary, quality), 1):
+				if progress_callback is not None and count % self.batch_size == 0:
+					progress_callback(get_raw_position(handle), total)
+				yield seq_info
+			if progress_callback is not None:
+				progress_callback(get_raw_position(handle), total)
+
+	def iter_handle(self, handle: BinaryIO, summary: Optional[SequenceSummary] = None, quality: Optional[QualityAccumulator] = None) -> Iterator[Dict[str, Any]]:
+		"""
+		Stream per-read results from an open FASTQ binary handle.
+		Args:
+			handle (BinaryIO): Binary handle positioned at a record boundary
+			summary (Optional[SequenceSummary]): Running summary updated with each read
+			quality (Optional[QualityAccumulator]): Running quality histograms updated with each read
+		Yields:
+			Dict[str, Any]: Per-read results
+		"""
+		if quality is None:
+			quality = QualityAccumulator()
+		batch = []
+		# Parse time excludes the batch processing and whatever the consumer does between rows
+		parse_seconds = 0.0
+		records = 0
+		started = time.perf_counter()
+		try:
+			for record in read_fastq(handle):
+				batch.append(record)
+				if len(batch) >= self.batch_size:
+					parse_seconds += time.perf_counter() - started
+					records += len(batch)
+					yield from self._process_batch(batch, summary, quality)
+					batch = []
+					started = time.perf_counter()
+			parse_seconds += time.perf_counter() - started
+			if batch:
+				records += len(batch)
+				yield from self._process_batch(batch, summary, quality)
+		finally:
+			# Counted per record read, like the FASTA parse stage
+			stage_timings.add("parse", parse_seconds, records)
+
+	def _process_batch(self, batch: List[FastqRecord], summary: Optional[SequenceSummary], quality: QualityAccumulator) -> Iterator[Dict[str, Any]]:
+		with span("composition"):
+			counts = composition.batch_base_counts([seq for _, seq, _ in batch])
+			compositions = composition.batch_nucleotide_composition(counts)
+			gc_contents = composition.batch_gc_percent(counts)
+		with span("quality"):
+			mean_qualities = quality.add_batch([qual for _, _, qual in batch])
+		for (title, seq, _), seq_composition, gc_content, mean_quality in zip(batch, compositions, gc_contents, mean_qualities):
+			gc_content = round(gc_content, 2)
+			if summary is not None:
+				summary.add(len(seq), gc_content)
+			yield {
+				"id": record_id(title),
+				"description": title,
+				"length": len(seq),
+				"average_quality": round(mean_quality, 2) if mean_quality is not None else None,
+				"gc_content": gc_content,
+				"composition": seq_composition
+			}
+
 	def _gc_content(self, sequence: Seq) -> float:
-		gc = sequence.count("G") + sequence.count("C")
-		return (gc / len(sequence)) * 100 if len(sequence) > 0 else 0.0
+		return composition.gc_percent(composition.base_counts(sequence))
 
 	def _get_nucleotide_composition(self, sequence: Seq) -> Dict[str, int]:
-		composition = {
-			"A": sequence.count("A"),
-			"T": sequence.count("T"),
-			"G": sequence.count("G"),
-			"C": sequence.count("C"),
-			"N": sequence.count("N"),
-			"other": 0
-		}
-		total_known = sum(composition.values())
-		composition["other"] = len(sequence) - total_known
-		return composition
\ No newline at end of file
+		return composition.nucleotide_composition(composition.base_counts(sequence))
@@ -0,0 +1,248 @@
+"""
+Incremental analysis for growing FASTA/FASTQ files
+Checkpoints byte offsets and mergeable aggregate state so re-runs only parse appended records
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.parallel import (
+    ChunkResult, analyze_chunk, find_record_start, get_file_format, has_four_line_layout, split_file
+)
+from analyzers.quality import QualityAccumulator
+from analyzers.summary import SequenceSummary
+from utils.helpers import get_file_info, is_gzip_file, AnalysisCancelled, ProgressCallback
+
+# Bytes parsed between checkpoints, so an interrupted run loses at most this much work
+CHECKPOINT_BYTES = int(os.getenv("CHECKPOINT_BYTES", 64 * 1024 * 1024))
+# Bytes hashed before the checkpoint offset to detect rewritten or truncated files
+_FINGERPRINT_BYTES = 4096
+_SCAN_SIZE = 1024 * 1024
+# Bump when the saved state layout changes
+_STATE_VERSION = 3
+
+
+def _last_record_offset(data: bytes, file_format: str) -> int:
+    """
+    Offset of the last record start in data, which itself starts on a record.
+    FASTQ data must use the four-line layout (see has_four_line_layout).
+    """
+    if file_format == "fasta":
+        index = data.rfind(b"\n>")
+        return index + 1 if index >= 0 else 0
+    # FASTQ records are four lines; walk them from the synchronised start
+    record = 0
+    while True:
+        position = record
+        for _ in range(4):
+            newline = data.find(b"\n", position)
+            if newline < 0:
+                return record
+            position = newline + 1
+        if position >= len(data):
+            return record
+        record = position
+
+
+def find_last_record_start(handle, start: int, end: int, file_format: str) -> int:
+    """
+    Find the start of the last record in a byte range.
+
+    Args:
+        handle: Binary file handle
+        start (int): Start of the range (a record start)
+        end (int): End of the range
+        file_format (str): "fasta" or "fastq"
+
+    Returns:
+        int: Offset of the last record start (start if the range holds at most one record)
+    """
+    window = _SCAN_SIZE
+    while True:
+        probe = max(start, end - window)
+        first = find_record_start(handle, probe, file_format, end) if probe > start else start
+        if first < end:
+            handle.seek(first)
+            return first + _last_record_offset(handle.read(end - first), file_format)
+        if probe == start:
+            return start
+        window *= 4
+
+
+def _analyze_last_record(file_path: str, file_format: str, start: int, end: int) -> Optional[ChunkResult]:
+    """Analyze the last record of a file, or return None if it is still incomplete."""
+    try:
+        return analyze_chunk(file_path, file_format, start, end, False)
+    except ValueError:
+        # A record still being written, e.g. a FASTQ read without its full quality line
+        return None
+
+
+class CheckpointStore:
+    """On-disk checkpoints of incremental analyses, one JSON file per analyzed file."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv(
+            "CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-checkpoints")
+        )
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, info: Dict[str, Any]) -> str:
+        # Keyed by identity rather than content, which changes on every append
+        identity = f"{os.path.realpath(info['path'])}:{info['device']}:{info['inode']}"
+        return os.path.join(self.directory, hashlib.sha256(identity.encode()).hexdigest()[:32] + ".json")
+
+    @staticmethod
+    def fingerprint(file_path: str, offset: int) -> str:
+        """Hash of the file head and of the bytes just before offset."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            digest.update(f.read(min(offset, _FINGERPRINT_BYTES)))
+            f.seek(max(0, offset - _FINGERPRINT_BYTES))
+            digest.update(f.read(min(offset, _FINGERPRINT_BYTES)))
+        return digest.hexdigest()
+
+    def load(self, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Load the checkpoint of a file if it still describes the file's prefix.
+
+        Args:
+            info (Dict[str, Any]): File information from get_file_info
+
+        Returns:
+            Optional[Dict[str, Any]]: Checkpoint, or None if missing or stale
+        """
+        try:
+            with open(self._path(info)) as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if checkpoint.get("version") != _STATE_VERSION or checkpoint["offset"] > info["size"]:
+            return None
+        if checkpoint["fingerprint"] != self.fingerprint(info["path"], checkpoint["offset"]):
+            return None
+        return checkpoint
+
+    def save(self, info: Dict[str, Any], offset: int, summary: SequenceSummary,
+             quality: Optional[QualityAccumulator]) -> None:
+        """Checkpoint the state covering the first offset bytes of a file."""
+        path = self._path(info)
+        checkpoint = {
+            "version": _STATE_VERSION,
+            "file_path": info["path"],
+            "offset": offset,
+            "fingerprint": self.fingerprint(info["path"], offset),
+            "updated": time.time(),
+            "summary": summary.to_state(),
+            "quality": quality.to_state() if quality is not None else None
+        }
+        # Write then rename so an interrupted save keeps the previous checkpoint
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+
+class IncrementalAnalyzer:
+    """Analyzes only the records appended to a file since its last checkpoint."""
+
+    def __init__(self, store: Optional[CheckpointStore] = None, checkpoint_bytes: int = CHECKPOINT_BYTES):
+        self.store = store or CheckpointStore()
+        self.checkpoint_bytes = checkpoint_bytes
+
+    def _restore(self, checkpoint: Optional[Dict[str, Any]],
+                 file_format: str) -> Tuple[int, SequenceSummary, Optional[QualityAccumulator]]:
+        if checkpoint is None:
+            return 0, SequenceSummary(), QualityAccumulator() if file_format == "fastq" else None
+        quality = QualityAccumulator.from_state(checkpoint["quality"]) if checkpoint["quality"] else None
+        return checkpoint["offset"], SequenceSummary.from_state(checkpoint["summary"]), quality
+
+    def analyze_file(self, file_path: str, progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Analyze a FASTA/FASTQ file, resuming from its checkpoint.
+
+        The checkpoint always stops before the last record, which may still be
+        growing or partially written; that record is re-parsed on every call
+        and left out of the results while it is incomplete. Aggregate statistics
+        equal those of a full run over the complete records; per-sequence rows
+        are not returned. FASTQ files without the plain four-line layout cannot
+        be split at record boundaries, so they are parsed to the end without
+        checkpoints.
+
+        Args:
+            file_path (str): Path to an uncompressed FASTA/FASTQ file
+            progress_callback (Optional[ProgressCallback]): Called with
+                (bytes_processed, bytes_total) after each checkpoint
+
+        Returns:
+            Dict[str, Any]: Analysis results with an "incremental" block, or a dict with an "error" key
+        """
+        file_format = get_file_format(file_path)
+        try:
+            info = get_file_info(file_path, include_hash=False)
+            if "error" in info:
+                return {"error": info["error"]}
+            if file_format is None or is_gzip_file(file_path):
+                return {"error": "Incremental analysis requires an uncompressed FASTA/FASTQ file"}
+            size = info["size"]
+            checkpoint = self.store.load(info)
+            resumed_from, summary, quality = self._restore(checkpoint, file_format)
+
+            offset = resumed_from
+            splittable = file_format == "fasta" or has_four_line_layout(file_path)
+            if splittable:
+                with open(file_path, "rb") as handle:
+                    tail = find_last_record_start(handle, offset, size, file_format)
+            else:
+                tail = offset
+            for start, end in split_file(file_path, file_format, self.checkpoint_bytes, offset, tail):
+                chunk_summary, chunk_quality, _ = analyze_chunk(file_path, file_format, start, end, False)
+                summary.merge(chunk_summary)
+                if quality is not None:
+                    quality.merge(chunk_quality)
+                offset = end
+                self.store.save(info, offset, summary, quality)
+                if progress_callback is not None:
+                    progress_callback(end, size)
+
+            # The last record may still be growing, so it is merged after the checkpoint
+            pending = 0
+            if tail < size:
+                if splittable:
+                    last = _analyze_last_record(file_path, file_format, tail, size)
+                else:
+                    last = analyze_chunk(file_path, file_format, tail, size, False)
+                if last is None:
+                    pending = size - tail
+                else:
+                    tail_summary, tail_quality, _ = last
+                    summary.merge(tail_summary)
+                    if quality is not None:
+                        quality.merge(tail_quality)
+            if progress_callback is not None:
+                progress_callback(size, size)
+
+            if summary.count == 0:
+                return {"error": "No sequences found in file"}
+            if file_format == "fasta":
+                results = FastaAnalyzer().build_results(summary, [])
+            else:
+                results = FastqAnalyzer().build_results(summary, quality, [])
+            results["incremental"] = {
+                "resumed_from": resumed_from,
+                "bytes_processed": size - resumed_from,
+                "checkpoint_offset": offset,
+                "pending_bytes": pending,
+                "file_size": size
+            }
+            return results
+
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            return {"error": f"Incremental analysis failed: {str(e)}"}
@@ -0,0 +1,326 @@
+"""
+K-mer counting and duplication analysis
+Exact counting for small k, count-min sketch + HyperLogLog with a fixed memory ceiling for large k
+"""
+import hashlib
+import os
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import numpy as np
+from analyzers.composition import kmer_codes, MAX_K
+from analyzers.reader import read_fasta, read_fastq
+from utils.helpers import (
+    open_sequence_file, get_raw_position, get_sequence_extension,
+    AnalysisCancelled, ProgressCallback, FASTQ_EXTENSIONS
+)
+
+# Memory ceiling for counters, in MiB
+DEFAULT_MEMORY_MB = int(os.getenv("KMER_MEMORY_MB", 128))
+# Bases per vectorized batch
+BATCH_BASES = 4 * 1024 * 1024
+# Multiplicities at or above this are collapsed into the last spectrum bin
+SPECTRUM_MAX = 10000
+# Byte placed between reads so no k-mer spans two of them
+_SEPARATOR = b"N"
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def splitmix64(values: np.ndarray) -> np.ndarray:
+    """Vectorized SplitMix64 finalizer: a fast, well-mixed 64-bit hash of uint64 values."""
+    with np.errstate(over="ignore"):
+        z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def reverse_complement_codes(codes: np.ndarray, k: int) -> np.ndarray:
+    """2-bit codes of the reverse complements of k-mer codes."""
+    result = np.zeros(len(codes), dtype=np.uint64)
+    remaining = codes.copy()
+    for _ in range(k):
+        result = (result << np.uint64(2)) | (np.uint64(3) - (remaining & np.uint64(3)))
+        remaining >>= np.uint64(2)
+    return result
+
+
+def decode_kmer(code: int, k: int) -> str:
+    """Turn a 2-bit k-mer code back into its sequence."""
+    return "".join("ACGT"[(code >> (2 * (k - 1 - i))) & 3] for i in range(k))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes."""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if hashes.size == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # The next 32 bits fit a float64 exactly, so frexp gives their bit length
+        rest = ((hashes >> np.uint64(32 - self.precision)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.frexp(rest)[1]
+        rank = (33 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> float:
+        m = float(self.registers.size)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting for small cardinalities
+            return float(m * np.log(m / zeros))
+        return raw
+
+
+class KmerAnalyzer:
+    """
+    K-mer spectrum, duplication and overrepresentation analysis for FASTA/FASTQ files.
+
+    When a dense count array of 4**k uint64 counters fits in the memory budget
+    the counts are exact (np.bincount per batch). Otherwise a count-min sketch
+    estimates multiplicities, HyperLogLog estimates the number of distinct
+    k-mers, heavy hitters are tracked as a bounded candidate set, and the
+    spectrum is estimated from an adaptive hash-based sample of k-mers.
+    """
+
+    def __init__(self, k: int = 21, top_n: int = 20, canonical: bool = False,
+                 memory_mb: Optional[int] = None, sketch_depth: int = 4):
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+        self.k = k
+        self.top_n = top_n
+        self.canonical = canonical
+        self.memory_bytes = (memory_mb or DEFAULT_MEMORY_MB) * 1024 * 1024
+        # 64-bit counters: a single k-mer can occur more than 2**32 times in a large run
+        self.exact = 4 ** k * 8 <= self.memory_bytes
+        self.sketch_depth = sketch_depth
+        # Half of the budget for the sketch, a quarter for the spectrum sample
+        width = self.memory_bytes // 2 // (8 * sketch_depth)
+        self.sketch_width = 1 << max(10, int(width).bit_length() - 1)
+        self.sample_capacity = max(1024, self.memory_bytes // 4 // 16)
+        self.candidate_capacity = max(100, 50 * top_n)
+
+    def _iter_sequences(self, handle, file_path: str) -> Iterator[bytes]:
+        records = read_fastq(handle) if get_sequence_extension(file_path) in FASTQ_EXTENSIONS else read_fasta(handle)
+        for record in records:
+            yield record.sequence
+
+    def _iter_batches(self, file_path: str, progress_callback: Optional[ProgressCallback]) -> Iterator[Tuple[np.ndarray, List[bytes]]]:
+        """Yield (valid k-mer codes, sequences) for batches of about BATCH_BASES bases."""
+        total = os.path.getsize(file_path)
+        with open_sequence_file(file_path, "rb") as handle:
+            batch: List[bytes] = []
+            size = 0
+            for sequence in self._iter_sequences(handle, file_path):
+                batch.append(sequence)
+                size += len(sequence) + 1
+                if size >= BATCH_BASES:
+                    yield self._batch_codes(batch), batch
+                    batch, size = [], 0
+                    if progress_callback is not None:
+                        progress_callback(get_raw_position(handle), total)
+            if batch:
+                yield self._batch_codes(batch), batch
+            if progress_callback is not None:
+                progress_callback(get_raw_position(handle), total)
+
+    def _batch_codes(self, sequences: List[bytes]) -> np.ndarray:
+        joined = _SEPARATOR.join(sequences)
+        codes, valid = kmer_codes(np.frombuffer(joined, dtype=np.uint8), self.k)
+        codes = codes[valid]
+        if self.canonical:
+            codes = np.minimum(codes, reverse_complement_codes(codes, self.k))
+        return codes
+
+    def analyze_file(self, file_path: str, progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Count k-mers in a FASTA/FASTQ file.
+
+        Args:
+            file_path (str): Path to the file (plain, gzip or bgzip)
+            progress_callback (Optional[ProgressCallback]): Called with (bytes_processed, bytes_total) after each batch
+
+        Returns:
+            Dict[str, Any]: Duplication rates, top k-mers and k-mer spectrum
+        """
+        try:
+            state = _ExactCounter(self) if self.exact else _SketchCounter(self)
+            reads = HyperLogLog()
+            sequence_count = 0
+            for codes, sequences in self._iter_batches(file_path, progress_callback):
+                sequence_count += len(sequences)
+                state.add(codes)
+                # Deterministic digests (str hashes are salted per process)
+                digests = b"".join(hashlib.blake2b(sequence.upper(), digest_size=8).digest() for sequence in sequences)
+                reads.add_hashes(np.frombuffer(digests, dtype=np.uint64))
+
+            if sequence_count == 0:
+                return {"error": "No sequences found in file"}
+            results = state.results()
+            distinct_reads = min(reads.estimate(), sequence_count)
+            total_kmers = results["total_kmers"]
+            results.update({
+                "file_type": "FASTQ" if get_sequence_extension(file_path) in FASTQ_EXTENSIONS else "FASTA",
+                "analysis_type": "kmer",
+                "k": self.k,
+                "canonical": self.canonical,
+                "sequence_count": sequence_count,
+                "duplication_rate": round(1 - results["distinct_kmers"] / total_kmers, 4) if total_kmers else 0.0,
+                "read_duplication_rate": round(1 - distinct_reads / sequence_count, 4)
+            })
+            for entry in results["top_kmers"]:
+                entry["fraction"] = round(entry["count"] / total_kmers, 6) if total_kmers else 0.0
+            return results
+
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            return {"error": f"Failed to count k-mers: {str(e)}"}
+
+
+def _unique(values: np.ndarray, return_counts: bool = False):
+    """Sort-based np.unique (much faster than the hash-based path for uint64)."""
+    ordered = np.sort(values)
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1]))) if ordered.size else np.zeros(0, dtype=np.int64)
+    unique = ordered[starts]
+    if not return_counts:
+        return unique
+    return unique, np.diff(np.append(starts, ordered.size)).astype(np.int64)
+
+
+def _merge_counts(codes: np.ndarray, counts: np.ndarray, new_codes: np.ndarray, new_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge two sorted (code, count) tables."""
+    merged = _unique(np.concatenate((codes, new_codes)))
+    totals = np.zeros(merged.size, dtype=np.int64)
+    totals[np.searchsorted(merged, codes)] += counts
+    totals[np.searchsorted(merged, new_codes)] += new_counts
+    return merged, totals
+
+
+def _spectrum(multiplicities: np.ndarray, scale: float = 1.0) -> List[List[int]]:
+    """Sparse [multiplicity, number of k-mers] pairs, collapsing the tail at SPECTRUM_MAX."""
+    clipped = np.minimum(multiplicities, SPECTRUM_MAX)
+    histogram = np.bincount(clipped.astype(np.int64))
+    return [[int(m), int(round(n * scale))] for m, n in zip(np.flatnonzero(histogram), histogram[histogram > 0])]
+
+
+class _ExactCounter:
+    """Dense uint64 counts indexed by k-mer code."""
+
+    def __init__(self, analyzer: KmerAnalyzer):
+        self.analyzer = analyzer
+        self.counts = np.zeros(4 ** analyzer.k, dtype=np.uint64)
+        self.total = 0
+
+    def add(self, codes: np.ndarray) -> None:
+        self.total += len(codes)
+        if self.counts.size <= codes.size:
+            self.counts += np.bincount(codes.astype(np.int64), minlength=self.counts.size).astype(np.uint64)
+        else:
+            # Avoid a 4**k temporary per batch when the batch is smaller than the table
+            unique, counts = _unique(codes, return_counts=True)
+            self.counts[unique.astype(np.int64)] += counts.astype(np.uint64)
+
+    def results(self) -> Dict[str, Any]:
+        present = np.flatnonzero(self.counts)
+        top = present[np.argsort(self.counts[present], kind="stable")[::-1][:self.analyzer.top_n]]
+        return {
+            "mode": "exact",
+            "total_kmers": self.total,
+            "distinct_kmers": int(present.size),
+            "top_kmers": [{"kmer": decode_kmer(int(code), self.analyzer.k), "count": int(self.counts[code])}
+                          for code in top],
+            "spectrum": _spectrum(self.counts[present])
+        }
+
+
+class _SketchCounter:
+    """Count-min sketch, HyperLogLog, heavy-hitter candidates and a sampled exact spectrum."""
+
+    def __init__(self, analyzer: KmerAnalyzer):
+        self.analyzer = analyzer
+        self.width = analyzer.sketch_width
+        self.sketch = np.zeros((analyzer.sketch_depth, self.width), dtype=np.uint64)
+        self.seeds = splitmix64(np.arange(1, analyzer.sketch_depth + 1, dtype=np.uint64))
+        self.distinct = HyperLogLog()
+        self.total = 0
+        self.candidates = np.zeros(0, dtype=np.uint64)
+        # Exact counts of k-mers whose hash is below the sampling threshold
+        self.sample_threshold = int(_MASK64)
+        self.sample_codes = np.zeros(0, dtype=np.uint64)
+        self.sample_counts = np.zeros(0, dtype=np.int64)
+
+    def _rows(self, codes: np.ndarray) -> List[np.ndarray]:
+        mask = np.uint64(self.width - 1)
+        return [(splitmix64(codes ^ seed) & mask).astype(np.int64) for seed in self.seeds]
+
+    def _estimate_rows(self, rows: List[np.ndarray]) -> np.ndarray:
+        return np.min([self.sketch[row][slots] for row, slots in enumerate(rows)], axis=0)
+
+    def estimate(self, codes: np.ndarray) -> np.ndarray:
+        if codes.size == 0:
+            return np.zeros(0, dtype=np.uint64)
+        return self._estimate_rows(self._rows(codes))
+
+    def add(self, codes: np.ndarray) -> None:
+        if codes.size == 0:
+            return
+        self.total += len(codes)
+        hashes = splitmix64(codes)
+        self.distinct.add_hashes(hashes)
+        rows = self._rows(codes)
+        for row, slots in enumerate(rows):
+            self.sketch[row] += np.bincount(slots, minlength=self.width).astype(np.uint64)
+
+        # Heavy hitters: only k-mers estimated at least as frequent as the weakest candidate compete
+        capacity = self.analyzer.candidate_capacity
+        contenders = codes
+        if self.candidates.size >= capacity:
+            floor = self.estimate(self.candidates).min()
+            contenders = codes[self._estimate_rows(rows) >= floor]
+        unique = _unique(np.concatenate((self.candidates, contenders)))
+        if unique.size > capacity:
+            keep = np.argpartition(self.estimate(unique), -capacity)[-capacity:]
+            unique = unique[keep]
+        self.candidates = unique
+
+        # Spectrum sample: exact counts for a hash-selected subset of k-mers
+        sampled = codes[hashes <= np.uint64(self.sample_threshold)]
+        while sampled.size > 4 * self.analyzer.sample_capacity:
+            self.sample_threshold //= 2
+            sampled = sampled[splitmix64(sampled) <= np.uint64(self.sample_threshold)]
+        if sampled.size:
+            self.sample_codes, self.sample_counts = _merge_counts(
+                self.sample_codes, self.sample_counts, *_unique(sampled, return_counts=True)
+            )
+        while self.sample_codes.size > self.analyzer.sample_capacity:
+            # Halve the sampling rate and drop k-mers that no longer qualify
+            self.sample_threshold //= 2
+            keep = splitmix64(self.sample_codes) <= np.uint64(self.sample_threshold)
+            self.sample_codes = self.sample_codes[keep]
+            self.sample_counts = self.sample_counts[keep]
+
+    def results(self) -> Dict[str, Any]:
+        estimates = self.estimate(self.candidates)
+        order = np.argsort(estimates, kind="stable")[::-1][:self.analyzer.top_n]
+        sample_rate = (self.sample_threshold + 1) / 2 ** 64
+        return {
+            "mode": "sketch",
+            "total_kmers": self.total,
+            "distinct_kmers": int(round(min(self.distinct.estimate(), self.total))),
+            "top_kmers": [{"kmer": decode_kmer(int(self.candidates[i]), self.analyzer.k), "count": int(estimates[i])}
+                          for i in order],
+            "spectrum": _spectrum(self.sample_counts, 1 / sample_rate),
+            "sketch": {
+                "depth": self.analyzer.sketch_depth,
+                "width": self.width,
+                "hll_precision": self.distinct.precision,
+                "spectrum_sample_rate": round(sample_rate, 6)
+            }
+        }
@@ -1 +1,567 @@
-# Mutation detector
\ No newline at end of file
+"""
+Mutation detection against a reference sequence
+Vectorized substitution calling plus anchored, banded affine-gap alignment for indels
+"""
+import os
+from itertools import islice
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from Bio.Seq import Seq
+
+from analyzers.composition import kmer_codes
+from analyzers.pagination import SequencePage
+from analyzers.reader import read_fasta, read_fastq, record_id
+from utils.helpers import (
+    open_sequence_file, is_gzip_file, get_raw_position, get_sequence_extension,
+    AnalysisCancelled, ProgressCallback, FASTQ_EXTENSIONS
+)
+from utils.metrics import span
+
+SequenceLike = Union[Seq, str, bytes]
+# Reference id and mutations of one record (see MutationAnalyzer._detect_batch)
+Detection = Tuple[Optional[str], Optional[List[Dict[str, Any]]]]
+
+# Effectively minus infinity for int64 scores, far enough from overflow
+_NEG = -(1 << 40)
+_PADDING = 0
+
+# Alignment moves
+_DIAGONAL, _INSERTION, _DELETION = 0, 1, 2
+
+UNALIGNABLE = "Sequences too divergent to align within the configured band"
+NO_REFERENCE = "No reference sequence with this id"
+# Records handed to detect_many at once
+MUTATION_BATCH_SIZE = int(os.getenv("MUTATION_BATCH_SIZE", 256))
+
+
+def _to_array(sequence: SequenceLike) -> np.ndarray:
+    """Upper-case uint8 view of a sequence (soft-masked bases compare equal)."""
+    if isinstance(sequence, str):
+        sequence = sequence.encode("ascii")
+    elif isinstance(sequence, Seq):
+        sequence = bytes(sequence)
+    return np.frombuffer(bytes(sequence).upper(), dtype=np.uint8)
+
+
+def _window(values: np.ndarray, lo: int, start: int, stop: int) -> np.ndarray:
+    """Values for columns [start, stop) of a row stored from column lo, _NEG outside it."""
+    out = np.full(stop - start, _NEG, dtype=np.int64)
+    a = max(start, lo)
+    b = min(stop, lo + len(values))
+    if b > a:
+        out[a - start:b - start] = values[a - lo:b - lo]
+    return out
+
+
+class MutationDetector:
+    """
+    Detects substitutions, insertions and deletions of query sequences against one reference.
+
+    The reference is preprocessed once (unique k-mer index), so many queries can
+    be compared against it cheaply. Queries of the same length as the reference
+    with sparse mismatches are resolved by a single NumPy comparison; everything
+    else is anchored on unique k-mer matches and only the gaps between anchors
+    are aligned with a banded affine-gap (Gotoh) dynamic program.
+    """
+
+    def __init__(self, reference: SequenceLike, k: int = 16, band: int = 32,
+                 match: int = 2, mismatch: int = -3, gap_open: int = -5, gap_extend: int = -2,
+                 max_dp_cells: int = 50_000_000):
+        if gap_open > gap_extend:
+            raise ValueError("gap_open must not be cheaper than gap_extend")
+        self.reference = _to_array(reference)
+        self.k = k
+        self.band = band
+        self.match = match
+        self.mismatch = mismatch
+        self.gap_open = gap_open
+        self.gap_extend = gap_extend
+        self.max_dp_cells = max_dp_cells
+        self._ref_codes: Optional[np.ndarray] = None
+        self._ref_positions: Optional[np.ndarray] = None
+
+    # -- reference k-mer index -------------------------------------------------
+
+    def _build_index(self) -> None:
+        codes, valid = kmer_codes(self.reference, self.k)
+        positions = np.flatnonzero(valid)
+        unique, first, counts = np.unique(codes[positions], return_index=True, return_counts=True)
+        keep = counts == 1
+        self._ref_codes = unique[keep]
+        self._ref_positions = positions[first[keep]]
+
+    def _anchor_segments(self, query: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Find co-linear exact-match segments between query and reference.
+
+        Returns:
+            List[Tuple[int, int, int, int]]: (q_start, q_end, r_start, r_end), increasing in both
+        """
+        if self._ref_codes is None:
+            self._build_index()
+        codes, valid = kmer_codes(query, self.k)
+        q_positions = np.flatnonzero(valid)
+        if len(q_positions) == 0 or len(self._ref_codes) == 0:
+            return []
+        slots = np.searchsorted(self._ref_codes, codes[q_positions])
+        slots[slots == len(self._ref_codes)] = 0
+        hit = self._ref_codes[slots] == codes[q_positions]
+        q_hits = q_positions[hit]
+        if len(q_hits) == 0:
+            return []
+        r_hits = self._ref_positions[slots[hit]]
+        diagonals = r_hits.astype(np.int64) - q_hits.astype(np.int64)
+
+        # Runs of consecutive k-mers on the same diagonal form one segment
+        breaks = np.flatnonzero((np.diff(q_hits) != 1) | (np.diff(diagonals) != 0)) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(q_hits)])) - 1
+        segments = [
+            (int(q_hits[s]), int(q_hits[e]) + self.k, int(r_hits[s]), int(r_hits[e]) + self.k)
+            for s, e in zip(starts, ends)
+        ]
+        return self._chain(segments)
+
+    @staticmethod
+    def _chain(segments: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Keep the longest chain of segments increasing in both query and reference, then trim overlaps."""
+        # Longest increasing subsequence on r_start (segments are sorted by q_start)
+        tails: List[int] = []
+        tail_index: List[int] = []
+        previous = [-1] * len(segments)
+        for index, segment in enumerate(segments):
+            r_start = segment[2]
+            lo, hi = 0, len(tails)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if tails[mid] < r_start:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            previous[index] = tail_index[lo - 1] if lo > 0 else -1
+            if lo == len(tails):
+                tails.append(r_start)
+                tail_index.append(index)
+            else:
+                tails[lo] = r_start
+                tail_index[lo] = index
+        chain = []
+        index = tail_index[-1] if tail_index else -1
+        while index >= 0:
+            chain.append(segments[index])
+            index = previous[index]
+        chain.reverse()
+
+        trimmed: List[Tuple[int, int, int, int]] = []
+        for q_start, q_end, r_start, r_end in chain:
+            if trimmed:
+                overlap = max(trimmed[-1][1] - q_start, trimmed[-1][3] - r_start, 0)
+                q_start += overlap
+                r_start += overlap
+            if q_end > q_start:
+                trimmed.append((q_start, q_end, r_start, r_end))
+        return trimmed
+
+    # -- alignment ----------------------------------------------------------------
+
+    def _substitutions(self, query: np.ndarray, reference: np.ndarray, q_offset: int, r_offset: int) -> List[Dict[str, Any]]:
+        positions = np.flatnonzero(query != reference)
+        return [
+            {
+                "position": r_offset + int(p) + 1,
+                "reference": chr(reference[p]),
+                "variant": chr(query[p]),
+                "type": "substitution"
+            }
+            for p in positions
+        ]
+
+    def _align(self, query: np.ndarray, reference: np.ndarray) -> List[Tuple[int, int, int]]:
+        """
+        Global banded affine-gap alignment.
+
+        Each row is computed with NumPy: vertical and diagonal moves are plain
+        vector operations and horizontal gaps use a prefix maximum, which is
+        exact for affine gaps as long as gap_open <= gap_extend.
+
+        Returns:
+            List[Tuple[int, int, int]]: Alignment moves (move, query index, reference index)
+        """
+        n, m = len(query), len(reference)
+        go, ge = self.gap_open, self.gap_extend
+        width = max(self.band, abs(n - m) + self.band, -(-m // max(n, 1)) + 1)
+        if (n + 1) * min(2 * width + 1, m + 1) > self.max_dp_cells:
+            raise ValueError(UNALIGNABLE)
+        padded = np.concatenate(([_PADDING], reference))
+
+        # Row 0: leading deletion
+        lo_prev = 0
+        hi_prev = min(m, width)
+        columns = np.arange(lo_prev, hi_prev + 1, dtype=np.int64)
+        h_prev = np.where(columns == 0, 0, go + (columns - 1) * ge)
+        f_prev = np.full(len(columns), _NEG, dtype=np.int64)
+        rows = [(lo_prev,
+                 np.where(columns == 0, _DIAGONAL, _DELETION).astype(np.uint8),
+                 np.zeros(len(columns), dtype=bool),
+                 columns >= 2)]
+
+        for i in range(1, n + 1):
+            center = (i * m) // n
+            lo = max(0, center - width)
+            hi = min(m, center + width)
+            columns = np.arange(lo, hi + 1, dtype=np.int64)
+
+            h_diag = _window(h_prev, lo_prev, lo - 1, hi)
+            h_up = _window(h_prev, lo_prev, lo, hi + 1)
+            f_up = _window(f_prev, lo_prev, lo, hi + 1)
+            scores = np.where(padded[lo:hi + 1] == query[i - 1], self.match, self.mismatch)
+            if lo == 0:
+                h_diag[0] = _NEG
+
+            diagonal = h_diag + scores
+            f_open = h_up + go
+            f_extend = f_up + ge
+            f = np.maximum(f_open, f_extend)
+            h_best = np.maximum(diagonal, f)
+
+            shifted = h_best - columns * ge
+            prefix = np.maximum.accumulate(shifted)
+            e = np.concatenate(([_NEG], prefix[:-1] + go + (columns[1:] - 1) * ge))
+            e[e < _NEG // 2] = _NEG
+            h = np.maximum(h_best, e)
+
+            state = np.where(e > h_best, _DELETION, np.where(f > diagonal, _INSERTION, _DIAGONAL)).astype(np.uint8)
+            e_extend = np.zeros(len(columns), dtype=bool)
+            e_extend[1:] = (e[:-1] + ge) > (h[:-1] + go)
+            rows.append((lo, state, f_extend > f_open, e_extend))
+            h_prev, f_prev, lo_prev = h, f, lo
+
+        moves = []
+        i, j, mode = n, m, _DIAGONAL
+        while i > 0 or j > 0:
+            lo, state, f_extend, e_extend = rows[i]
+            column = j - lo
+            if mode == _DIAGONAL:
+                mode = int(state[column])
+                if mode == _DIAGONAL:
+                    moves.append((_DIAGONAL, i - 1, j - 1))
+                    i -= 1
+                    j -= 1
+            elif mode == _INSERTION:
+                moves.append((_INSERTION, i - 1, j))
+                mode = _INSERTION if f_extend[column] else _DIAGONAL
+                i -= 1
+            else:
+                moves.append((_DELETION, i, j - 1))
+                mode = _DELETION if e_extend[column] else _DIAGONAL
+                j -= 1
+        moves.reverse()
+        return moves
+
+    def _gap_variants(self, query: np.ndarray, reference: np.ndarray, q_offset: int, r_offset: int) -> List[Dict[str, Any]]:
+        """Variants in an unanchored stretch between two exact-match segments."""
+        if len(query) == len(reference):
+            mismatches = int(np.count_nonzero(query != reference))
+            # Cheap path: a stretch with few mismatches holds only substitutions
+            if mismatches <= max(1, len(query) // 4):
+                return self._substitutions(query, reference, q_offset, r_offset)
+        if len(query) == 0:
+            return [self._deletion(reference, 0, len(reference), r_offset)]
+        if len(reference) == 0:
+            return [self._insertion(query, 0, len(query), r_offset)]
+
+        variants = []
+        moves = self._align(query, reference)
+        index = 0
+        while index < len(moves):
+            move, qi, rj = moves[index]
+            run = index
+            while run + 1 < len(moves) and moves[run + 1][0] == move and move != _DIAGONAL:
+                run += 1
+            if move == _DIAGONAL:
+                if query[qi] != reference[rj]:
+                    variants.extend(self._substitutions(query[qi:qi + 1], reference[rj:rj + 1], 0, r_offset + rj))
+            elif move == _INSERTION:
+                variants.append(self._insertion(query, qi, moves[run][1] + 1, r_offset + rj))
+            else:
+                variants.append(self._deletion(reference, rj, moves[run][2] + 1, r_offset))
+            index = run + 1
+        return variants
+
+    @staticmethod
+    def _insertion(query: np.ndarray, start: int, end: int, r_position: int) -> Dict[str, Any]:
+        return {
+            "position": r_position + 1,  # reference position the inserted bases precede
+            "reference": "",
+            "variant": query[start:end].tobytes().decode(),
+            "type": "insertion",
+            "length": end - start
+        }
+
+    @staticmethod
+    def _deletion(reference: np.ndarray, start: int, end: int, r_offset: int) -> Dict[str, Any]:
+        return {
+            "position": r_offset + start + 1,
+            "reference": reference[start:end].tobytes().decode(),
+            "variant": "",
+            "type": "deletion",
+            "length": end - start
+        }
+
+    def _has_dense_mismatches(self, mask: np.ndarray, window: int = 32, threshold: int = 8) -> bool:
+        """True if any window holds enough mismatches to suggest an indel-induced frame shift."""
+        if len(mask) < window:
+            return int(mask.sum()) >= threshold
+        cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        return bool(np.any(cumulative[window:] - cumulative[:-window] >= threshold))
+
+    # -- public API ---------------------------------------------------------------
+
+    def detect(self, query: SequenceLike) -> List[Dict[str, Any]]:
+        """
+        Detect mutations of one query against the reference.
+
+        Args:
+            query (SequenceLike): Query sequence
+
+        Returns:
+            List[Dict[str, Any]]: Mutations ordered by 1-based reference position
+        """
+        query = _to_array(query)
+        reference = self.reference
+        if len(query) == len(reference):
+            mask = query != reference
+            if not self._has_dense_mismatches(mask):
+                return self._substitutions(query, reference, 0, 0)
+
+        segments = self._anchor_segments(query)
+        if not segments:
+            return self._gap_variants(query, reference, 0, 0)
+
+        variants = []
+        q_prev, r_prev = 0, 0
+        for q_start, q_end, r_start, r_end in segments:
+            variants.extend(self._gap_variants(query[q_prev:q_start], reference[r_prev:r_start], q_prev, r_prev))
+            q_prev, r_prev = q_end, r_end
+        variants.extend(self._gap_variants(query[q_prev:], reference[r_prev:], q_prev, r_prev))
+        return variants
+
+    def detect_many(self, queries: Sequence[SequenceLike],
+                    skip_unalignable: bool = False) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Detect mutations for a batch of queries against the preloaded reference.
+
+        Queries with the reference's length are compared in one 2-D NumPy
+        operation; the rest (and any with indel-like mismatch clusters) go
+        through detect().
+
+        Args:
+            queries (Sequence[SequenceLike]): Query sequences
+            skip_unalignable (bool): Return None for queries too divergent to align
+                within max_dp_cells instead of raising ValueError
+
+        Returns:
+            List[Optional[List[Dict[str, Any]]]]: Mutations for each query, in input order
+        """
+        arrays = [_to_array(query) for query in queries]
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(arrays)
+        same_length = [index for index, array in enumerate(arrays) if len(array) == len(self.reference)]
+        if same_length:
+            stacked = np.stack([arrays[index] for index in same_length])
+            masks = stacked != self.reference
+            for row, index in enumerate(same_length):
+                if not self._has_dense_mismatches(masks[row]):
+                    results[index] = self._substitutions(stacked[row], self.reference, 0, 0)
+        for index, result in enumerate(results):
+            if result is None:
+                try:
+                    results[index] = self.detect(arrays[index])
+                except ValueError:
+                    if not skip_unalignable:
+                        raise
+        return results
+
+
+def _load_reference(reference_path: str) -> Dict[str, bytes]:
+    """Load all reference records (used for compressed references that cannot be indexed)."""
+    with open_sequence_file(reference_path, "rb") as handle:
+        return {record_id(title): sequence for title, sequence in read_fasta(handle)}
+
+
+class MutationTotals:
+    """Running mutation counts over the records of a file."""
+
+    def __init__(self):
+        self.sequences = 0
+        self.unaligned = 0
+        self.by_type = {"substitution": 0, "insertion": 0, "deletion": 0}
+
+    def add(self, mutations: Optional[List[Dict[str, Any]]]) -> None:
+        """Count one record's mutations (None for a record that was not aligned)."""
+        self.sequences += 1
+        if mutations is None:
+            self.unaligned += 1
+            return
+        for mutation in mutations:
+            self.by_type[mutation["type"]] += 1
+
+    def to_statistics(self) -> Dict[str, Any]:
+        total = sum(self.by_type.values())
+        aligned = self.sequences - self.unaligned
+        return {
+            "total_mutations": total,
+            "substitutions": self.by_type["substitution"],
+            "insertions": self.by_type["insertion"],
+            "deletions": self.by_type["deletion"],
+            "unaligned_sequences": self.unaligned,
+            "average_mutations_per_sequence": round(total / aligned, 2) if aligned > 0 else 0.0
+        }
+
+
+class MutationAnalyzer:
+    """Runs mutation detection for every record of a FASTA/FASTQ file against a reference FASTA."""
+
+    def __init__(self, reference_path: str, **detector_options: Any):
+        self.reference_path = reference_path
+        self.detector_options = detector_options
+        self._detectors: Dict[str, MutationDetector] = {}
+        if is_gzip_file(reference_path):
+            self._records = _load_reference(reference_path)
+            self._names = list(self._records)
+            self._index = None
+        else:
+            # Imported here to keep the module importable without the index machinery
+            from analyzers.sequence_index import open_index
+            # The index lives in the cache directory: the reference's own directory may be read-only or shared
+            self._index = open_index(reference_path, cached=True)
+            self._records = None
+            self._names = self._index.names
+
+    def _reference_for(self, record_id: str) -> Optional[str]:
+        """Reference with the same id as the query, or the only reference record (None if there is none)."""
+        if record_id in self._names:
+            name = record_id
+        elif len(self._names) == 1:
+            name = self._names[0]
+        else:
+            return None
+        if name not in self._detectors:
+            sequence = self._records[name] if self._records is not None else self._index.fetch(name)
+            self._detectors[name] = MutationDetector(sequence, **self.detector_options)
+        return name
+
+    def _iter_records(self, handle, file_path: str) -> Iterator[Tuple[str, bytes]]:
+        records = read_fastq(handle) if get_sequence_extension(file_path) in FASTQ_EXTENSIONS else read_fasta(handle)
+        for record in records:
+            yield record_id(record.title), record.sequence
+
+    def _detect_batch(self, batch: List[Tuple[str, bytes]]) -> List[Detection]:
+        """
+        Reference id and mutations for each record, grouped per reference. The
+        reference id is None for records without a reference, and the mutations
+        None for records without a reference or too divergent to align.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (record_id, _) in enumerate(batch):
+            name = self._reference_for(record_id)
+            if name is not None:
+                groups.setdefault(name, []).append(index)
+        detected: List[Detection] = [(None, None)] * len(batch)
+        for name, indexes in groups.items():
+            mutations = self._detectors[name].detect_many([batch[index][1] for index in indexes], skip_unalignable=True)
+            for index, result in zip(indexes, mutations):
+                detected[index] = (name, result)
+        return detected
+
+    def iter_rows(self, file_path: str, totals: MutationTotals,
+                  progress_callback: Optional[ProgressCallback] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream one mutation row per record, accumulating the file's totals.
+
+        Records are aligned in batches of MUTATION_BATCH_SIZE; a record too
+        divergent to align, or without a matching record in a multi-record
+        reference, gets an "error" row instead of failing the file.
+
+        Args:
+            file_path (str): Path to the query FASTA/FASTQ file
+            totals (MutationTotals): Running totals, updated as rows are produced
+            progress_callback (Optional[ProgressCallback]): Called after each batch of records
+
+        Yields:
+            Dict[str, Any]: Per-record mutation rows
+        """
+        total = os.path.getsize(file_path)
+        with open_sequence_file(file_path, "rb") as handle:
+            records = self._iter_records(handle, file_path)
+            while True:
+                batch = list(islice(records, MUTATION_BATCH_SIZE))
+                if not batch:
+                    break
+                with span("alignment"):
+                    detected = self._detect_batch(batch)
+                for (record_id, sequence), (reference_id, mutations) in zip(batch, detected):
+                    totals.add(mutations)
+                    row = {"id": record_id, "reference_id": reference_id, "length": len(sequence)}
+                    if mutations is None:
+                        yield {**row, "error": UNALIGNABLE if reference_id is not None else NO_REFERENCE}
+                    else:
+                        yield {**row, "mutation_count": len(mutations), "mutations": mutations}
+                if progress_callback is not None:
+                    progress_callback(get_raw_position(handle), total)
+
+    def build_results(self, file_path: str, totals: MutationTotals, sequences: List[Dict[str, Any]],
+                      pagination: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Assemble the mutation detection result from the totals filled by iter_rows.
+
+        Args:
+            file_path (str): Path to the query FASTA/FASTQ file
+            totals (MutationTotals): Totals over all records
+            sequences (List[Dict[str, Any]]): Per-record rows (may be empty)
+            pagination (Optional[Dict[str, Any]]): Pagination metadata for a partial page
+
+        Returns:
+            Dict[str, Any]: Mutation detection results
+        """
+        results = {
+            "file_type": "FASTQ" if get_sequence_extension(file_path) in FASTQ_EXTENSIONS else "FASTA",
+            "analysis_type": "mutation_detection",
+            "reference": self.reference_path,
+            "sequence_count": totals.sequences,
+            "sequences": sequences,
+            "statistics": totals.to_statistics()
+        }
+        if pagination is not None:
+            results["pagination"] = pagination
+        return results
+
+    def analyze_file(self, file_path: str, include_sequences: bool = True,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Detect mutations for every record in a file.
+
+        Args:
+            file_path (str): Path to the query FASTA/FASTQ file
+            include_sequences (bool): Include per-sequence mutation lists
+            progress_callback (Optional[ProgressCallback]): Called after each batch of records
+            offset (int): Index of the first per-sequence result to return
+            limit (Optional[int]): Maximum number of per-sequence results to return
+
+        Returns:
+            Dict[str, Any]: Mutation detection results (see iter_rows for unalignable records)
+        """
+        try:
+            page = SequencePage(offset, limit if include_sequences else 0)
+            totals = MutationTotals()
+            for row in self.iter_rows(file_path, totals, progress_callback):
+                page.add(row)
+            if totals.sequences == 0:
+                return {"error": "No sequences found in file"}
+            return self.build_results(file_path, totals, page.rows, page.pagination())
+
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            return {"error": f"Failed to detect mutations: {str(e)}"}
@@ -0,0 +1,49 @@
+"""
+Pagination of per-sequence results
+Keeps only the requested window of rows while every row streams past
+"""
+from typing import Dict, List, Any, Optional
+
+from utils.helpers import encode_cursor
+
+
+class SequencePage:
+    """Window of per-sequence rows selected by offset and limit."""
+
+    def __init__(self, offset: int = 0, limit: Optional[int] = None):
+        if offset < 0:
+            raise ValueError(f"offset must be non-negative, got {offset}")
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must be non-negative, got {limit}")
+        self.offset = offset
+        self.limit = limit
+        self.rows: List[Dict[str, Any]] = []
+        self.seen = 0
+
+    @property
+    def wants_rows(self) -> bool:
+        """False when no row can ever be kept (summary-only analysis)."""
+        return self.limit != 0
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Offer the next row in file order."""
+        if self.offset <= self.seen and (self.limit is None or len(self.rows) < self.limit):
+            self.rows.append(row)
+        self.seen += 1
+
+    def skip(self, count: int) -> None:
+        """Account for rows that went past without being offered (outside the window)."""
+        self.seen += count
+
+    def pagination(self) -> Optional[Dict[str, Any]]:
+        """Return pagination metadata, or None when the full result set was requested."""
+        if (self.offset == 0 and self.limit is None) or not self.wants_rows:
+            return None
+        next_offset = self.offset + len(self.rows)
+        return {
+            "offset": self.offset,
+            "limit": self.limit,
+            "returned": len(self.rows),
+            "total": self.seen,
+            "next_cursor": encode_cursor(next_offset) if self.limit and next_offset < self.seen else None
+        }
@@ -0,0 +1,179 @@
+"""
+Paired-end read statistics
+Mate id synchronisation, overlap-based insert sizes and mate quality concordance
+"""
+import math
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+
+_COMPLEMENT = str.maketrans("ACGTUNacgtun", "TGCAANtgcaan")
+_COMPLEMENT_BYTES = bytes.maketrans(b"ACGTUNacgtun", b"TGCAANtgcaan")
+# Mean read quality separating passing from failing mates
+QUALITY_THRESHOLD = 20
+
+
+SequenceText = Union[str, bytes]
+
+
+def reverse_complement(sequence: SequenceText) -> SequenceText:
+    """Reverse complement of a nucleotide string (IUPAC codes other than N are kept as-is)."""
+    return sequence.translate(_COMPLEMENT if isinstance(sequence, str) else _COMPLEMENT_BYTES)[::-1]
+
+
+def mate_id(title: str) -> str:
+    """Read id shared by both mates ("read7/1 extra" and "read7/2" -> "read7")."""
+    identifier = title.split(None, 1)[0] if title else ""
+    if identifier[-2:] in ("/1", "/2"):
+        identifier = identifier[:-2]
+    return identifier
+
+
+def _mismatches_within(first: SequenceText, second: SequenceText, allowed: int) -> bool:
+    if first == second:
+        return True
+    mismatches = 0
+    for a, b in zip(first, second):
+        if a != b:
+            mismatches += 1
+            if mismatches > allowed:
+                return False
+    return True
+
+
+def overlap_insert_size(read1: SequenceText, read2: SequenceText, min_overlap: int = 10, max_mismatch_rate: float = 0.1) -> Optional[int]:
+    """
+    Estimate the insert size of a pair from the overlap of R1 with the reverse complement of R2.
+
+    Candidate overlaps are seeded by an exact match of min_overlap bases at
+    either end of the overlap and accepted with at most max_mismatch_rate
+    mismatches; the longest accepted overlap wins.
+
+    Args:
+        read1 (SequenceText): Mate 1 sequence (str or bytes)
+        read2 (SequenceText): Mate 2 sequence (as sequenced, same type as read1)
+        min_overlap (int): Minimum overlap length
+        max_mismatch_rate (float): Allowed mismatch fraction within the overlap
+
+    Returns:
+        Optional[int]: len(R1) + len(R2) - overlap, or None if the mates do not overlap
+    """
+    length1, length2 = len(read1), len(read2)
+    longest = min(length1, length2)
+    if longest < min_overlap:
+        return None
+    read1 = read1.upper()
+    mate = reverse_complement(read2.upper())
+    candidates = set()
+    # Seed at the start of the overlap: R1 position where the mate's first bases occur
+    seed = mate[:min_overlap]
+    position = read1.find(seed, length1 - longest)
+    while position >= 0:
+        candidates.add(length1 - position)
+        position = read1.find(seed, position + 1)
+    # Seed at the end of the overlap: mate position where R1's last bases occur
+    seed = read1[-min_overlap:]
+    position = mate.find(seed)
+    while 0 <= position <= longest - min_overlap:
+        candidates.add(position + min_overlap)
+        position = mate.find(seed, position + 1)
+    for overlap in sorted(candidates, reverse=True):
+        if overlap < min_overlap or overlap > longest:
+            continue
+        if _mismatches_within(read1[length1 - overlap:], mate[:overlap], int(overlap * max_mismatch_rate)):
+            return length1 + length2 - overlap
+    return None
+
+
+class PairStatistics:
+    """Running pair-level statistics: id sync, insert sizes and mate quality concordance."""
+
+    def __init__(self, quality_threshold: int = QUALITY_THRESHOLD):
+        self.quality_threshold = quality_threshold
+        self.pairs = 0
+        self.id_mismatches = 0
+        self.quality_discordant = 0
+        self.both_pass = 0
+        self.unpaired = {"read1": 0, "read2": 0}
+        self.insert_histogram = np.zeros(0, dtype=np.int64)
+        # Sums for the Pearson correlation of mate mean qualities
+        self._quality_pairs = 0
+        self._sums = np.zeros(5, dtype=np.float64)  # x, y, xx, yy, xy
+        self._absolute_difference = 0.0
+
+    def add_batch(self, id_matches: List[bool], insert_sizes: List[Optional[int]],
+                  qualities1: List[Optional[float]], qualities2: List[Optional[float]]) -> None:
+        """
+        Account for a batch of pairs.
+
+        Args:
+            id_matches (List[bool]): Whether the mate ids agree
+            insert_sizes (List[Optional[int]]): Overlap-based insert sizes (None without overlap)
+            qualities1 (List[Optional[float]]): Mean quality of each mate 1
+            qualities2 (List[Optional[float]]): Mean quality of each mate 2
+        """
+        self.pairs += len(id_matches)
+        self.id_mismatches += len(id_matches) - sum(id_matches)
+        sizes = np.array([size for size in insert_sizes if size is not None], dtype=np.int64)
+        if sizes.size:
+            counts = np.bincount(sizes)
+            if counts.size > self.insert_histogram.size:
+                self.insert_histogram = np.pad(self.insert_histogram, (0, counts.size - self.insert_histogram.size))
+            self.insert_histogram[:counts.size] += counts
+        known = [(x, y) for x, y in zip(qualities1, qualities2) if x is not None and y is not None]
+        if known:
+            x, y = np.array(known, dtype=np.float64).T
+            self._quality_pairs += len(known)
+            self._sums += [x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()]
+            self._absolute_difference += float(np.abs(x - y).sum())
+            passing1 = x >= self.quality_threshold
+            passing2 = y >= self.quality_threshold
+            self.quality_discordant += int(np.count_nonzero(passing1 != passing2))
+            self.both_pass += int(np.count_nonzero(passing1 & passing2))
+
+    def _insert_statistics(self) -> Dict[str, Any]:
+        histogram = self.insert_histogram
+        overlapping = int(histogram.sum())
+        if overlapping == 0:
+            return {"overlapping_pairs": 0, "overlap_fraction": 0.0 if self.pairs else None,
+                    "mean": None, "median": None, "min": None, "max": None, "histogram": []}
+        sizes = np.flatnonzero(histogram)
+        cumulative = np.cumsum(histogram)
+        lower = int(np.searchsorted(cumulative, (overlapping - 1) // 2, side="right"))
+        upper = int(np.searchsorted(cumulative, overlapping // 2, side="right"))
+        return {
+            "overlapping_pairs": overlapping,
+            "overlap_fraction": round(overlapping / self.pairs, 4),
+            "mean": round(float((np.arange(histogram.size) * histogram).sum()) / overlapping, 2),
+            "median": (lower + upper) / 2,
+            "min": int(sizes[0]),
+            "max": int(sizes[-1]),
+            "histogram": histogram[int(sizes[0]):].tolist()
+        }
+
+    def _quality_concordance(self) -> Dict[str, Any]:
+        n = self._quality_pairs
+        if n == 0:
+            return {"correlation": None, "mean_absolute_difference": None, "both_pass_fraction": None}
+        sx, sy, sxx, syy, sxy = self._sums
+        variance = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        correlation = (n * sxy - sx * sy) / math.sqrt(variance) if variance > 0 else None
+        return {
+            "correlation": round(float(correlation), 4) if correlation is not None else None,
+            "mean_absolute_difference": round(self._absolute_difference / n, 2),
+            "both_pass_fraction": round(self.both_pass / n, 4)
+        }
+
+    def to_statistics(self) -> Dict[str, Any]:
+        """Return pair-level statistics."""
+        return {
+            "pair_count": self.pairs,
+            "id_mismatches": self.id_mismatches,
+            "unpaired_reads": dict(self.unpaired),
+            "discordant_pairs": {
+                "id_mismatch": self.id_mismatches,
+                "quality": self.quality_discordant
+            },
+            "insert_size": self._insert_statistics(),
+            "quality_concordance": self._quality_concordance()
+        }
@@ -0,0 +1,382 @@
+"""
+Parallel chunked analysis for large FASTA/FASTQ files
+Splits files at record boundaries and merges per-chunk statistics exactly
+"""
+import io
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from typing import Dict, List, Any, Optional, Tuple
+
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.pagination import SequencePage
+from analyzers.quality import QualityAccumulator
+from analyzers.summary import SequenceSummary
+from utils.helpers import (
+    get_sequence_extension, is_gzip_file, AnalysisCancelled, ProgressCallback,
+    FASTA_EXTENSIONS, FASTQ_EXTENSIONS
+)
+from utils.metrics import stage_timings
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("ANALYSIS_CHUNK_SIZE", 64 * 1024 * 1024))
+# Read size used while searching for the next record boundary
+_SCAN_SIZE = 1024 * 1024
+
+ChunkResult = Tuple[SequenceSummary, Optional[QualityAccumulator], List[Dict[str, Any]]]
+StageTotals = Dict[str, Dict[str, float]]
+
+
+def get_worker_count(workers: Optional[int] = None) -> int:
+    """
+    Resolve the number of worker processes to use.
+
+    Args:
+        workers (Optional[int]): Explicit worker count; falls back to the
+            ANALYSIS_WORKERS environment variable, then the CPU count
+
+    Returns:
+        int: Worker count (at least 1)
+    """
+    if workers is None:
+        workers = int(os.getenv("ANALYSIS_WORKERS", 0)) or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def get_file_format(file_path: str) -> Optional[str]:
+    """Return "fasta", "fastq" or None based on the file extension."""
+    ext = get_sequence_extension(file_path)
+    if ext in FASTA_EXTENSIONS:
+        return "fasta"
+    if ext in FASTQ_EXTENSIONS:
+        return "fastq"
+    return None
+
+
+def _is_four_line_record(title: bytes, sequence: bytes, separator: bytes, quality: bytes) -> bool:
+    return (title[:1] == b"@" and separator[:1] == b"+"
+            and len(sequence.rstrip(b"\r")) == len(quality.rstrip(b"\r")))
+
+
+def _is_fastq_header(window: bytes, start: int) -> Optional[bool]:
+    """
+    Check whether the line at start begins a four-line FASTQ record: '@' title,
+    sequence, '+' separator, quality of the same length as the sequence, then
+    the next '@' title. Returns None if the window is too short to tell.
+    """
+    lines = []
+    position = start
+    for _ in range(4):
+        end = window.find(b"\n", position)
+        if end < 0:
+            return None
+        lines.append(window[position:end])
+        position = end + 1
+    if position >= len(window):
+        return None
+    return _is_four_line_record(*lines) and window[position:position + 1] == b"@"
+
+
+def has_four_line_layout(file_path: str, sample_size: int = _SCAN_SIZE) -> bool:
+    """
+    Check that the records at the start of a FASTQ file use the plain
+    four-line layout that record boundary detection relies on. Files with
+    wrapped sequence/quality lines are analyzed without splitting.
+    """
+    with open(file_path, "rb") as handle:
+        sample = handle.read(sample_size)
+    lines = sample.split(b"\n")
+    if len(sample) == sample_size or not sample.endswith(b"\n"):
+        # The last line may be cut off, or still being written
+        lines.pop()
+    records = len(lines) // 4
+    return records > 0 and all(
+        _is_four_line_record(*lines[index:index + 4]) for index in range(0, records * 4, 4)
+    )
+
+
+def find_record_start(handle, offset: int, file_format: str, file_size: int) -> int:
+    """
+    Find the first record boundary at or after a byte offset.
+
+    Args:
+        handle: Binary file handle
+        offset (int): Byte offset to start searching from
+        file_format (str): "fasta" or "fastq"
+        file_size (int): Size of the file in bytes
+
+    Returns:
+        int: Offset of the next record start, or file_size if there is none
+    """
+    if offset <= 0:
+        return 0
+    marker = b"\n>" if file_format == "fasta" else b"\n@"
+    base = offset - 1
+    handle.seek(base)
+    window = handle.read(_SCAN_SIZE)
+    position = 0
+    while True:
+        index = window.find(marker, position)
+        if index >= 0:
+            if file_format == "fasta":
+                return base + index + 1
+            is_header = _is_fastq_header(window, index + 1)
+            if is_header:
+                return base + index + 1
+            if is_header is False:
+                position = index + 1
+                continue
+        more = handle.read(_SCAN_SIZE)
+        if not more:
+            return file_size
+        # Keep the unresolved tail so markers spanning reads are not missed
+        drop = index if index >= 0 else len(window) - 1
+        base += drop
+        window = window[drop:] + more
+        position = 0
+
+
+def split_file(file_path: str, file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges that each start on a record boundary.
+
+    Args:
+        file_path (str): Path to an uncompressed FASTA/FASTQ file
+        file_format (str): "fasta" or "fastq"
+        chunk_size (int): Target chunk size in bytes
+        start (int): First byte to cover (a record start)
+        end (Optional[int]): End of the region to cover (a record start or the file size)
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) byte ranges covering the region
+    """
+    file_size = os.path.getsize(file_path) if end is None else end
+    boundaries = [start]
+    with open(file_path, "rb") as handle:
+        for offset in range(start + chunk_size, file_size, chunk_size):
+            boundary = find_record_start(handle, max(offset, boundaries[-1]), file_format, file_size)
+            if boundaries[-1] < boundary < file_size:
+                boundaries.append(boundary)
+    if boundaries[-1] != file_size:
+        boundaries.append(file_size)
+    return [(first, last) for first, last in zip(boundaries, boundaries[1:]) if last > first]
+
+
+def _chunk_handle(file_path: str, start: int, end: int) -> io.BytesIO:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return io.BytesIO(f.read(end - start))
+
+
+def analyze_chunk(file_path: str, file_format: str, start: int, end: int, include_sequences: bool = True) -> ChunkResult:
+    """
+    Analyze one byte range of a file. Runs inside a worker process.
+
+    Args:
+        file_path (str): Path to the file
+        file_format (str): "fasta" or "fastq"
+        start (int): First byte of the range (a record start)
+        end (int): End of the range (a record start or end of file)
+        include_sequences (bool): Return per-sequence rows
+
+    Returns:
+        ChunkResult: Partial summary, partial quality histograms (FASTQ only) and rows
+    """
+    handle = _chunk_handle(file_path, start, end)
+    summary = SequenceSummary()
+    if file_format == "fasta":
+        quality = None
+        rows = FastaAnalyzer().iter_handle(handle, summary)
+    else:
+        quality = QualityAccumulator()
+        rows = FastqAnalyzer().iter_handle(handle, summary, quality)
+    sequences = []
+    for row in rows:
+        if include_sequences:
+            sequences.append(row)
+    return summary, quality, sequences
+
+
+def chunk_rows(file_path: str, file_format: str, start: int, end: int,
+               first: int, stop: int) -> List[Dict[str, Any]]:
+    """
+    Per-sequence rows first..stop-1 (counted within the chunk) of one byte range.
+
+    Parsing stops at the last wanted row, so fetching one page touches only
+    the chunks that hold it.
+    """
+    handle = _chunk_handle(file_path, start, end)
+    if file_format == "fasta":
+        rows = FastaAnalyzer().iter_handle(handle)
+    else:
+        rows = FastqAnalyzer().iter_handle(handle, None, QualityAccumulator())
+    return list(islice(rows, first, stop))
+
+
+def _run_chunk(file_path: str, file_format: str, start: int, end: int,
+               include_sequences: bool) -> Tuple[ChunkResult, StageTotals]:
+    """analyze_chunk plus the stage timings it recorded in this worker process."""
+    stage_timings.drain()
+    result = analyze_chunk(file_path, file_format, start, end, include_sequences)
+    return result, stage_timings.drain()
+
+
+def _run_chunk_rows(file_path: str, file_format: str, start: int, end: int,
+                    first: int, stop: int) -> Tuple[List[Dict[str, Any]], StageTotals]:
+    stage_timings.drain()
+    rows = chunk_rows(file_path, file_format, start, end, first, stop)
+    return rows, stage_timings.drain()
+
+
+def _run_serial(file_path: str, include_sequences: bool, offset: int,
+                limit: Optional[int]) -> Tuple[Dict[str, Any], StageTotals]:
+    """Serial analysis of a whole file on a pool worker."""
+    stage_timings.drain()
+    analyzer = FastaAnalyzer() if get_file_format(file_path) == "fasta" else FastqAnalyzer()
+    result = analyzer.analyze_file(file_path, include_sequences=include_sequences, offset=offset, limit=limit)
+    return result, stage_timings.drain()
+
+
+class ParallelAnalyzer:
+    """Process-pool analyzer that runs FASTA/FASTQ analysis over file chunks."""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            workers (Optional[int]): Chunks analyzed at once (see get_worker_count)
+            chunk_size (int): Target chunk size in bytes
+            executor (Optional[Executor]): Process pool to run chunks on, e.g. the
+                service's shared analysis pool; a private pool is created per call
+                when omitted. With a shared pool the calling thread only splits the
+                file and merges results, and small files are analyzed on the pool too.
+        """
+        self.workers = get_worker_count(workers)
+        self.chunk_size = chunk_size
+        self.executor = executor
+
+    def can_split(self, file_path: str, file_format: str) -> bool:
+        """Whether a file is worth splitting: uncompressed, larger than one chunk and cleanly splittable."""
+        return (
+            self.workers > 1
+            and not is_gzip_file(file_path)
+            and os.path.getsize(file_path) > self.chunk_size
+            and (file_format == "fasta" or has_four_line_layout(file_path))
+        )
+
+    def analyze_file(self, file_path: str, include_sequences: bool = True,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyze a FASTA or FASTQ file across worker processes.
+
+        Small, compressed or single-worker inputs fall back to the serial
+        analyzer, since they cannot be split or would not benefit.
+
+        Args:
+            file_path (str): Path to the FASTA/FASTQ file
+            include_sequences (bool): Include per-sequence results
+            progress_callback (Optional[ProgressCallback]): Called as chunks complete
+            offset (int): Index of the first per-sequence result to return
+            limit (Optional[int]): Maximum number of per-sequence results to return
+
+        Returns:
+            Dict[str, Any]: Analysis results identical to a serial run
+        """
+        file_format = get_file_format(file_path)
+        if file_format is None:
+            return {"error": f"Unsupported file extension: {get_sequence_extension(file_path)}"}
+        serial = FastaAnalyzer() if file_format == "fasta" else FastqAnalyzer()
+
+        try:
+            if not self.can_split(file_path, file_format):
+                if self.executor is not None:
+                    result, stages = self.executor.submit(
+                        _run_serial, file_path, include_sequences, offset, limit
+                    ).result()
+                    stage_timings.merge(stages)
+                    return result
+                return serial.analyze_file(
+                    file_path,
+                    include_sequences=include_sequences,
+                    progress_callback=progress_callback,
+                    offset=offset,
+                    limit=limit
+                )
+
+            chunks = split_file(file_path, file_format, self.chunk_size)
+            file_size = chunks[-1][1]
+            summary = SequenceSummary()
+            quality = QualityAccumulator() if file_format == "fastq" else None
+            page = SequencePage(offset, limit if include_sequences else 0)
+            # Without a limit every row is returned, so chunks send theirs back right
+            # away; a bounded page is fetched afterwards from the chunks that hold it
+            rows_with_chunks = page.wants_rows and limit is None
+            workers = min(self.workers, len(chunks))
+            counts = []
+
+            with ExitStack() as stack:
+                executor = self.executor or stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                partials = self._map(
+                    executor, workers, _run_chunk,
+                    [(file_path, file_format, start, end, rows_with_chunks) for start, end in chunks]
+                )
+                # Results come back in submission order, so rows keep file order
+                for (_, end), (chunk_summary, chunk_quality, chunk_sequences) in zip(chunks, partials):
+                    summary.merge(chunk_summary)
+                    if quality is not None:
+                        quality.merge(chunk_quality)
+                    counts.append(chunk_summary.count)
+                    for row in chunk_sequences:
+                        page.add(row)
+                    if progress_callback is not None:
+                        progress_callback(end, file_size)
+
+                if page.wants_rows and not rows_with_chunks:
+                    page.skip(offset)
+                    tasks = []
+                    first_row = 0
+                    for (start, end), count in zip(chunks, counts):
+                        first = max(offset - first_row, 0)
+                        stop = min(offset + limit - first_row, count)
+                        if first < stop:
+                            tasks.append((file_path, file_format, start, end, first, stop))
+                        first_row += count
+                    for rows in self._map(executor, workers, _run_chunk_rows, tasks):
+                        for row in rows:
+                            page.add(row)
+                    page.skip(summary.count - page.seen)
+
+            if summary.count == 0:
+                return {"error": "No sequences found in file"}
+
+            if file_format == "fasta":
+                results = serial.build_results(summary, page.rows, page.pagination())
+            else:
+                results = serial.build_results(summary, quality, page.rows, page.pagination())
+            results["execution"] = {"mode": "parallel", "workers": workers, "chunks": len(chunks)}
+            return results
+
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            return {"error": f"Failed to analyze {file_format.upper()} file: {str(e)}"}
+
+    @staticmethod
+    def _map(executor: Executor, workers: int, function, tasks: List[tuple]):
+        """
+        Run tasks with at most workers in flight, yielding results in task order
+        and merging the stage timings recorded in the worker processes.
+        """
+        pending = []
+        tasks = iter(tasks)
+        for task in islice(tasks, workers):
+            pending.append(executor.submit(function, *task))
+        while pending:
+            result, stages = pending.pop(0).result()
+            stage_timings.merge(stages)
+            for task in islice(tasks, 1):
+                pending.append(executor.submit(function, *task))
+            yield result
@@ -0,0 +1,226 @@
+"""
+Columnar FASTQ quality engine
+Decodes quality strings straight into uint8 arrays and keeps bounded-memory histograms
+"""
+import os
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+import numpy as np
+
+# Sanger / Illumina 1.8+ encoding
+PHRED_OFFSET = 33
+# Printable ASCII ('!'..'~') covers Phred 0..93
+QUALITY_BINS = 94
+# Cycles with their own histogram; later cycles share doubling bins ([N, 2N), [2N, 4N), ...)
+MAX_CYCLES = int(os.getenv("QUALITY_MAX_CYCLES", 1000))
+
+QualityString = Union[str, bytes, bytearray, memoryview]
+
+
+def decode_qualities(quality: QualityString, offset: int = PHRED_OFFSET) -> np.ndarray:
+    """
+    Decode a FASTQ quality string into Phred scores.
+
+    Args:
+        quality (QualityString): Encoded quality string
+        offset (int): ASCII offset of the encoding
+
+    Returns:
+        np.ndarray: uint8 array of Phred scores
+    """
+    if isinstance(quality, str):
+        quality = quality.encode("ascii")
+    raw = np.frombuffer(quality, dtype=np.uint8)
+    if raw.size and (raw.min() < offset or raw.max() >= offset + QUALITY_BINS):
+        raise ValueError("Invalid character in quality string")
+    return raw - np.uint8(offset)
+
+
+def _histogram_median(histogram: np.ndarray) -> Optional[float]:
+    """Exact median of the integer values described by a histogram."""
+    total = int(histogram.sum())
+    if total == 0:
+        return None
+    cumulative = np.cumsum(histogram)
+    lower = int(np.searchsorted(cumulative, (total - 1) // 2, side="right"))
+    upper = int(np.searchsorted(cumulative, total // 2, side="right"))
+    return (lower + upper) / 2
+
+
+def _cycle_rows(cycles: np.ndarray) -> np.ndarray:
+    """Histogram row of each (0-based) cycle, so long reads need O(log length) rows."""
+    tail = cycles >= MAX_CYCLES
+    if not tail.any():
+        return cycles
+    # frexp exponent of q is floor(log2(q)) + 1 for integers q >= 1
+    _, exponent = np.frexp(np.maximum(cycles // MAX_CYCLES, 1))
+    return np.where(tail, MAX_CYCLES + exponent.astype(np.int64) - 1, cycles)
+
+
+class QualityAccumulator:
+    """Running per-base, per-cycle and per-read quality histograms."""
+
+    def __init__(self, offset: int = PHRED_OFFSET):
+        self.offset = offset
+        # Count of every quality value over all bases
+        self.base_histogram = np.zeros(QUALITY_BINS, dtype=np.int64)
+        # Count of reads by (floored) mean quality
+        self.read_histogram = np.zeros(QUALITY_BINS, dtype=np.int64)
+        # Per-cycle quality histograms, grown to the longest read seen: one row per
+        # cycle up to MAX_CYCLES, then one row per doubling bin (see _cycle_rows)
+        self.cycle_histograms = np.zeros((0, QUALITY_BINS), dtype=np.int64)
+
+    def _ensure_cycles(self, rows: int) -> None:
+        if rows > self.cycle_histograms.shape[0]:
+            grown = np.zeros((rows, QUALITY_BINS), dtype=np.int64)
+            grown[:self.cycle_histograms.shape[0]] = self.cycle_histograms
+            self.cycle_histograms = grown
+
+    def add_batch(self, qualities: Sequence[QualityString]) -> List[Optional[float]]:
+        """
+        Account for a batch of reads in one vectorized update.
+
+        Args:
+            qualities (Sequence[QualityString]): Encoded quality strings, one per read
+
+        Returns:
+            List[Optional[float]]: Mean quality of each read (None for empty reads)
+        """
+        if not qualities:
+            return []
+        encoded = [q.encode("ascii") if isinstance(q, str) else q for q in qualities]
+        lengths = np.fromiter((len(q) for q in encoded), dtype=np.int64, count=len(encoded))
+        scores = decode_qualities(b"".join(encoded), self.offset)
+
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        cumulative = np.concatenate(([0], np.cumsum(scores, dtype=np.int64)))
+        sums = cumulative[ends] - cumulative[starts]
+
+        self.base_histogram += np.bincount(scores, minlength=QUALITY_BINS)
+
+        max_length = int(lengths.max())
+        rows = int(_cycle_rows(np.array([max_length - 1]))[0]) + 1 if max_length else 0
+        self._ensure_cycles(rows)
+        cycles = _cycle_rows(np.arange(scores.size, dtype=np.int64) - np.repeat(starts, lengths))
+        flat = np.bincount(cycles * QUALITY_BINS + scores, minlength=rows * QUALITY_BINS)
+        self.cycle_histograms[:rows] += flat.reshape(rows, QUALITY_BINS)
+
+        means = []
+        for total, length in zip(sums.tolist(), lengths.tolist()):
+            if length == 0:
+                means.append(None)
+                continue
+            mean = total / length
+            self.read_histogram[int(mean)] += 1
+            means.append(mean)
+        return means
+
+    def add(self, quality: QualityString) -> Optional[float]:
+        """Account for a single read and return its mean quality."""
+        return self.add_batch([quality])[0]
+
+    def merge(self, other: "QualityAccumulator") -> "QualityAccumulator":
+        """
+        Fold another accumulator into this one.
+
+        Args:
+            other (QualityAccumulator): Accumulator to merge in
+
+        Returns:
+            QualityAccumulator: This accumulator, updated in place
+        """
+        self.base_histogram += other.base_histogram
+        self.read_histogram += other.read_histogram
+        cycles = other.cycle_histograms.shape[0]
+        self._ensure_cycles(cycles)
+        self.cycle_histograms[:cycles] += other.cycle_histograms
+        return self
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return the histograms as JSON-serializable state (see from_state)."""
+        return {
+            "offset": self.offset,
+            "base_histogram": self.base_histogram.tolist(),
+            "read_histogram": self.read_histogram.tolist(),
+            "cycle_histograms": self.cycle_histograms.tolist()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "QualityAccumulator":
+        """Rebuild an accumulator saved with to_state."""
+        quality = cls(state["offset"])
+        quality.base_histogram = np.array(state["base_histogram"], dtype=np.int64)
+        quality.read_histogram = np.array(state["read_histogram"], dtype=np.int64)
+        quality.cycle_histograms = np.array(state["cycle_histograms"], dtype=np.int64).reshape(-1, QUALITY_BINS)
+        return quality
+
+    @property
+    def base_count(self) -> int:
+        return int(self.base_histogram.sum())
+
+    def mean(self) -> Optional[float]:
+        """Mean quality over all bases."""
+        total = self.base_count
+        if total == 0:
+            return None
+        return int(np.dot(self.base_histogram, np.arange(QUALITY_BINS))) / total
+
+    def fraction_at_least(self, threshold: int) -> Optional[float]:
+        """Fraction of bases with quality >= threshold (e.g. Q20, Q30)."""
+        total = self.base_count
+        if total == 0:
+            return None
+        return int(self.base_histogram[threshold:].sum()) / total
+
+    def to_statistics(self) -> Dict[str, Any]:
+        """Return quality statistics for analysis results."""
+        mean = self.mean()
+        q20 = self.fraction_at_least(20)
+        q30 = self.fraction_at_least(30)
+        return {
+            "average_quality": round(mean, 2) if mean is not None else None,
+            "median_quality": _histogram_median(self.base_histogram),
+            "q20_fraction": round(q20, 4) if q20 is not None else None,
+            "q30_fraction": round(q30, 4) if q30 is not None else None
+        }
+
+    def to_report(self) -> Dict[str, Any]:
+        """
+        Return per-cycle and per-read quality distributions.
+
+        Cycles past MAX_CYCLES are reported as doubling bins under
+        long_read_cycles (only present when such reads were seen).
+        """
+        cycle_counts = self.cycle_histograms.sum(axis=1)
+        cycle_sums = self.cycle_histograms @ np.arange(QUALITY_BINS)
+        per_cycle_mean = [
+            round(int(total) / int(count), 2) if count else None
+            for total, count in zip(cycle_sums, cycle_counts)
+        ]
+        per_cycle_median = [_histogram_median(row) for row in self.cycle_histograms]
+        report = {
+            "per_cycle_mean": per_cycle_mean[:MAX_CYCLES],
+            "per_cycle_median": per_cycle_median[:MAX_CYCLES]
+        }
+        if len(per_cycle_mean) > MAX_CYCLES:
+            report["long_read_cycles"] = [
+                {
+                    "start": MAX_CYCLES << bin_index,
+                    "end": (MAX_CYCLES << (bin_index + 1)) - 1,
+                    "mean": mean,
+                    "median": median
+                }
+                for bin_index, (mean, median) in enumerate(
+                    zip(per_cycle_mean[MAX_CYCLES:], per_cycle_median[MAX_CYCLES:])
+                )
+            ]
+        report.update({
+            "base_quality_histogram": {
+                str(q): int(count) for q, count in enumerate(self.base_histogram) if count
+            },
+            "read_quality_histogram": {
+                str(q): int(count) for q, count in enumerate(self.read_histogram) if count
+            }
+        })
+        return report
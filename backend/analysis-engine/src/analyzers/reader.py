@@ -0,0 +1,287 @@
+"""
+Native FASTA/FASTQ reader
+Splits large byte blocks into lightweight tuple records instead of building SeqRecord objects, with BioPython as fallback
+"""
+import io
+import os
+from itertools import repeat
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from Bio import SeqIO
+from Bio.SeqIO.QualityIO import FastqGeneralIterator
+
+# Bytes read per block
+BLOCK_SIZE = int(os.getenv("READER_BLOCK_SIZE", 4 * 1024 * 1024))
+# Set to "false" to parse every file with BioPython
+NATIVE_READER = os.getenv("NATIVE_READER", "true").lower() in ["1", "true", "yes"]
+
+# Removed from FASTA sequences, like Bio.SeqIO's "fasta" parser
+_SEQUENCE_WHITESPACE = b" \t\r\n"
+
+
+class FastaRecord(NamedTuple):
+    """FASTA record: title line without the '>' and the sequence without whitespace."""
+    title: str
+    sequence: bytes
+
+
+class FastqRecord(NamedTuple):
+    """FASTQ record: title line without the '@', the sequence and the encoded qualities."""
+    title: str
+    sequence: bytes
+    quality: bytes
+
+
+# Builds records without going through the Python-level NamedTuple constructor
+_new_record = tuple.__new__
+
+
+def record_id(title: str) -> str:
+    """Record id: the first word of the title, as Bio.SeqIO sets SeqRecord.id."""
+    return title.split(None, 1)[0] if title else ""
+
+
+def _has_bare_carriage_returns(block: bytes) -> bool:
+    """Old Mac line endings, which only universal-newline text mode splits correctly."""
+    if block.endswith(b"\r"):
+        block = block[:-1]
+    return block.count(b"\r") != block.count(b"\r\n")
+
+
+def _read_first_block(handle: BinaryIO, block_size: int) -> Tuple[int, bytes, bool]:
+    start = handle.tell()
+    block = handle.read(block_size)
+    native = NATIVE_READER and not _has_bare_carriage_returns(block)
+    return start, block, native
+
+
+def _text_handle(handle: BinaryIO, start: int) -> io.TextIOWrapper:
+    handle.seek(start)
+    return io.TextIOWrapper(handle)
+
+
+def _fasta_record(data: bytes) -> FastaRecord:
+    header_end = data.find(b"\n")
+    if header_end < 0:
+        header_end = len(data)
+    title = data[1:header_end].rstrip().decode()
+    return _new_record(FastaRecord, (title, data[header_end + 1:].translate(None, _SEQUENCE_WHITESPACE)))
+
+
+def read_fasta(handle: BinaryIO, block_size: int = BLOCK_SIZE) -> Iterator[FastaRecord]:
+    """
+    Stream FASTA records from a binary handle.
+
+    Record starts are found with bytes.find on blocks of block_size bytes, so
+    the per-record cost is a few slices. Files with bare carriage-return line
+    endings are parsed with Bio.SeqIO instead.
+
+    Args:
+        handle (BinaryIO): Binary handle (plain or gzip) positioned at a record start
+        block_size (int): Bytes read per block
+
+    Yields:
+        FastaRecord: One record per '>' header
+
+    Raises:
+        ValueError: If the data does not start with a '>' header line
+    """
+    start, block, native = _read_first_block(handle, block_size)
+    if not block:
+        return
+    if not native:
+        text = _text_handle(handle, start)
+        try:
+            for record in SeqIO.parse(text, "fasta"):
+                yield _new_record(FastaRecord, (record.description, bytes(record.seq)))
+        finally:
+            text.detach()
+        return
+    if block[:1] != b">":
+        raise ValueError("FASTA data must start with a '>' header line")
+
+    # Pieces of the record being read; long sequences span several blocks
+    parts: List[bytes] = []
+    while block:
+        if parts and block[:1] == b">" and parts[-1].endswith(b"\n"):
+            yield _fasta_record(b"".join(parts))
+            parts = []
+        position = 0
+        while True:
+            index = block.find(b"\n>", position)
+            if index < 0:
+                break
+            parts.append(block[position:index + 1])
+            yield _fasta_record(b"".join(parts))
+            parts = []
+            position = index + 1
+        parts.append(block[position:] if position else block)
+        block = handle.read(block_size)
+    yield _fasta_record(b"".join(parts))
+
+
+def _iter_line_batches(handle: BinaryIO, block: bytes, block_size: int) -> Iterator[Tuple[List[bytes], bool]]:
+    """Yield (complete lines of one block, at end of file); the last batch holds an unterminated final line."""
+    tail = b""
+    while block:
+        lines = block.split(b"\n")
+        if tail:
+            lines[0] = tail + lines[0]
+        tail = lines.pop()
+        if lines:
+            yield lines, False
+        block = handle.read(block_size)
+    yield ([tail] if tail else []), True
+
+
+def _parse_fastq_record(lines: List[bytes], index: int, at_eof: bool) -> Optional[Tuple[FastqRecord, int]]:
+    """
+    Parse one record starting at lines[index] with the Bio.SeqIO.QualityIO rules
+    (sequence and quality may span several lines).
+
+    Returns:
+        Optional[Tuple[FastqRecord, int]]: Record and index of the line after it,
+        or None if more lines are needed
+    """
+    count = len(lines)
+    title = lines[index].rstrip()
+    if title[:1] != b"@":
+        raise ValueError("Records in Fastq files should start with '@' character")
+    position = index + 1
+    sequence_parts = []
+    while position < count and lines[position][:1] != b"+":
+        sequence_parts.append(lines[position].rstrip())
+        position += 1
+    if position == count:
+        if not at_eof:
+            return None
+        raise ValueError("End of file without quality information." if any(sequence_parts) else "Unexpected end of file")
+    second_title = lines[position][1:].rstrip()
+    if second_title and second_title != title[1:]:
+        raise ValueError("Sequence and quality captions differ.")
+    sequence = b"".join(sequence_parts)
+    if b" " in sequence or b"\t" in sequence:
+        raise ValueError("Whitespace is not allowed in the sequence.")
+    position += 1
+    quality_parts = []
+    quality_length = 0
+    while position < count:
+        line = lines[position]
+        # A '@' line only starts the next record once the qualities are complete
+        if line[:1] == b"@" and quality_length >= len(sequence):
+            break
+        line = line.rstrip()
+        quality_parts.append(line)
+        quality_length += len(line)
+        position += 1
+    else:
+        if not at_eof:
+            return None
+        if not quality_parts:
+            raise ValueError("Unexpected end of file")
+    quality = b"".join(quality_parts)
+    if len(sequence) != len(quality):
+        raise ValueError(
+            f"Lengths of sequence and quality values differs for {title[1:].decode()} "
+            f"({len(sequence)} and {len(quality)})."
+        )
+    return _new_record(FastqRecord, (title[1:].decode(), sequence, quality)), position
+
+
+def _four_line_records(lines: List[bytes], count: int) -> Optional[Iterator[FastqRecord]]:
+    """
+    Records of lines[:count] when they all use the plain four-line layout, else None.
+
+    The layout is checked with whole-list operations (joins, counts, map(len)),
+    so no Python code runs per read.
+    """
+    titles = lines[0:count:4]
+    sequences = lines[1:count:4]
+    separators = lines[2:count:4]
+    qualities = lines[3:count:4]
+    joined_titles = b"\n".join(titles)
+    if joined_titles[:1] != b"@" or joined_titles.count(b"\n@") != len(titles) - 1:
+        return None
+    if separators.count(b"+") != len(separators):
+        # CRLF line endings (or trailing blanks)
+        if list(map(bytes.rstrip, separators)).count(b"+") != len(separators):
+            return None
+        sequences = list(map(bytes.rstrip, sequences))
+        qualities = list(map(bytes.rstrip, qualities))
+    if list(map(len, sequences)) != list(map(len, qualities)):
+        return None
+    joined_sequences = b"\n".join(sequences)
+    if b" " in joined_sequences or b"\t" in joined_sequences or b"\r" in joined_sequences:
+        return None
+    titles = list(map(str.rstrip, ("\n" + joined_titles.decode()).split("\n@")[1:]))
+    return map(_new_record, repeat(FastqRecord, len(titles)), zip(titles, sequences, qualities))
+
+
+def read_fastq(handle: BinaryIO, block_size: int = BLOCK_SIZE) -> Iterator[FastqRecord]:
+    """
+    Stream FASTQ records from a binary handle.
+
+    Blocks are split into lines with bytes.split and, when a block holds only
+    four-line records, the records are sliced out of the line list in bulk.
+    Other blocks (e.g. records wrapped over several lines) go through a
+    slower record-by-record path with the same rules as
+    Bio.SeqIO.QualityIO.FastqGeneralIterator. Files with bare carriage-return
+    line endings are parsed with BioPython instead.
+
+    Args:
+        handle (BinaryIO): Binary handle (plain or gzip) positioned at a record start
+        block_size (int): Bytes read per block
+
+    Yields:
+        FastqRecord: One record per read
+
+    Raises:
+        ValueError: If a record is malformed
+    """
+    start, block, native = _read_first_block(handle, block_size)
+    if not block:
+        return
+    if not native:
+        text = _text_handle(handle, start)
+        try:
+            for title, sequence, quality in FastqGeneralIterator(text):
+                yield _new_record(FastqRecord, (title, sequence.encode(), quality.encode()))
+        finally:
+            text.detach()
+        return
+
+    # Lines of a record that continues in the next block
+    pending: List[bytes] = []
+    after_record = False
+    for lines, at_eof in _iter_line_batches(handle, block, block_size):
+        if pending:
+            lines = pending + lines
+            pending = []
+        count = len(lines)
+        index = 0
+        records = _four_line_records(lines, count - count % 4) if count >= 4 else None
+        if records is not None:
+            yield from records
+            index = count - count % 4
+            after_record = True
+        while index < count:
+            title = lines[index]
+            if after_record and not title.strip():
+                # Blank lines after a record (Bio.SeqIO folds them into its qualities)
+                index += 1
+                continue
+            after_record = True
+            if index + 3 < count:
+                sequence = lines[index + 1].rstrip()
+                quality = lines[index + 3].rstrip()
+                if (title[:1] == b"@" and lines[index + 2].rstrip() == b"+" and len(sequence) == len(quality)
+                        and b" " not in sequence and b"\t" not in sequence):
+                    yield _new_record(FastqRecord, (title[1:].rstrip().decode(), sequence, quality))
+                    index += 4
+                    continue
+            parsed = _parse_fastq_record(lines, index, at_eof)
+            if parsed is None:
+                pending = lines[index:]
+                break
+            record, index = parsed
+            yield record
@@ -0,0 +1,373 @@
+"""
+Analysis runner
+Picklable entry point that dispatches a file to the right analyzer (used by worker processes)
+"""
+import os
+import time
+from concurrent.futures import Executor
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from analyzers.columnar import ColumnarWriter, columnar_path, sequence_schema
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.incremental import IncrementalAnalyzer
+from analyzers.kmer import KmerAnalyzer
+from analyzers.mutation_detector import MutationAnalyzer, MutationTotals
+from analyzers.pairing import PairStatistics
+from analyzers.parallel import ParallelAnalyzer
+from analyzers.quality import QualityAccumulator
+from analyzers.summary import SequenceSummary
+from utils.helpers import (
+    get_sequence_extension, decode_cursor, iter_ndjson, AnalysisCancelled, ProgressCallback,
+    FASTA_EXTENSIONS, FASTQ_EXTENSIONS
+)
+from utils.metrics import stage_timings
+from utils.profiler import SamplingProfiler
+
+# Bump whenever analyzer output changes so cached results are not reused
+ANALYZER_VERSION = "1.4.1"
+
+
+def resolve_page_options(options: Dict[str, Any]) -> Tuple[bool, int, Optional[int]]:
+    """
+    Read per-sequence result options.
+
+    Args:
+        options (Dict[str, Any]): Analysis options from the request
+
+    Returns:
+        Tuple[bool, int, Optional[int]]: include_sequences, offset and limit
+
+    Raises:
+        ValueError: If the cursor is malformed or offset / limit is negative
+    """
+    include_sequences = options.get("include_sequences", True) and not options.get("summary_only", False)
+    if options.get("cursor"):
+        offset = decode_cursor(options["cursor"])
+    else:
+        offset = int(options.get("offset", 0))
+    limit = options.get("limit")
+    limit = int(limit) if limit is not None else None
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError(f"offset and limit must be non-negative, got offset={offset}, limit={limit}")
+    return include_sequences, offset, limit
+
+
+def uses_parallel_analyzer(analysis_type: str, options: Dict[str, Any]) -> bool:
+    """Whether run_analysis hands the request to ParallelAnalyzer."""
+    return bool(
+        options.get("parallel")
+        and analysis_type not in ["mutation_detection", "kmer"]
+        and not any(options.get(option) for option in ["incremental", "output_format", "mate_file_path"])
+    )
+
+
+def run_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                 progress_callback: Optional[ProgressCallback] = None,
+                 executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Run an analysis synchronously.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options from the request
+        progress_callback (Optional[ProgressCallback]): Called with
+            (bytes_processed, bytes_total) while the file is analyzed
+        executor (Optional[Executor]): Process pool for the chunks of a parallel
+            analysis (a private pool per call when omitted)
+
+    Returns:
+        Dict[str, Any]: Analysis results, or a dict with an "error" key
+    """
+    # Determine file type by extension
+    ext = get_sequence_extension(file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        return {"error": f"Unsupported file extension: {ext}"}
+    try:
+        include_sequences, offset, limit = resolve_page_options(options)
+    except ValueError as e:
+        return {"error": str(e)}
+    if options.get("incremental"):
+        if analysis_type in ["mutation_detection", "kmer"] or options.get("mate_file_path") or options.get("output_format"):
+            return {"error": "Incremental mode supports single-file FASTA/FASTQ statistics only"}
+        return IncrementalAnalyzer().analyze_file(file_path, progress_callback=progress_callback)
+    if options.get("output_format"):
+        return export_analysis(file_path, analysis_type, options, progress_callback)
+    if options.get("mate_file_path"):
+        if ext not in FASTQ_EXTENSIONS or get_sequence_extension(options["mate_file_path"]) not in FASTQ_EXTENSIONS:
+            return {"error": "Paired-end analysis requires two FASTQ files"}
+        return FastqAnalyzer().analyze_pair(
+            file_path,
+            options["mate_file_path"],
+            include_sequences=include_sequences,
+            progress_callback=progress_callback,
+            offset=offset,
+            limit=limit
+        )
+    if analysis_type == "kmer":
+        try:
+            analyzer = KmerAnalyzer(
+                k=int(options.get("k", 21)),
+                top_n=int(options.get("top_n", 20)),
+                canonical=bool(options.get("canonical", False)),
+                memory_mb=int(options["memory_mb"]) if options.get("memory_mb") else None
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        return analyzer.analyze_file(file_path, progress_callback=progress_callback)
+    if analysis_type == "mutation_detection":
+        if not options.get("reference_path"):
+            return {"error": "mutation_detection requires the reference_path option"}
+        analyzer = MutationAnalyzer(options["reference_path"])
+    elif options.get("parallel"):
+        analyzer = ParallelAnalyzer(workers=options.get("workers"), executor=executor)
+    elif ext in FASTA_EXTENSIONS:
+        analyzer = FastaAnalyzer()
+    else:
+        analyzer = FastqAnalyzer()
+    return analyzer.analyze_file(
+        file_path,
+        include_sequences=include_sequences,
+        progress_callback=progress_callback,
+        offset=offset,
+        limit=limit
+    )
+
+
+def run_analysis_with_telemetry(file_path: str, analysis_type: str, options: Dict[str, Any],
+                                profile: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run an analysis in a worker process and return it with the worker's telemetry.
+
+    Stage timings recorded by the analyzers live in the worker process, so they
+    are drained here and shipped back for the service to merge into its metrics.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options from the request
+        profile (bool): Sample the analysis with the sampling profiler
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: Analysis results and telemetry
+        ("stages", plus "profile" in folded-stack format when profiled)
+    """
+    # Discard anything left over from work that did not report back
+    stage_timings.drain()
+    profiler = SamplingProfiler().start() if profile else None
+    try:
+        result = run_analysis(file_path, analysis_type, options)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    telemetry: Dict[str, Any] = {"stages": stage_timings.drain()}
+    if profiler is not None:
+        telemetry["profile"] = profiler.folded()
+        telemetry["profile_samples"] = profiler.samples
+    return result, telemetry
+
+
+def export_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                    progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Run an analysis and write its per-sequence rows to a columnar file next to the input.
+
+    Rows are written in record batches as they are produced, so memory stays
+    bounded by the batch size rather than the number of records.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options; output_format is "parquet" or "arrow"
+        progress_callback (Optional[ProgressCallback]): Called with
+            (bytes_processed, bytes_total) while the file is analyzed
+
+    Returns:
+        Dict[str, Any]: Aggregate results with a "sequences_file" entry, or a dict with an "error" key
+    """
+    output_format = options["output_format"]
+    if analysis_type == "kmer":
+        return {"error": "k-mer analysis has no per-sequence rows to write"}
+    try:
+        writer = ColumnarWriter(
+            columnar_path(file_path, output_format, analysis_type, options),
+            output_format,
+            sequence_schema(file_path, analysis_type, options)
+        )
+    except (ValueError, RuntimeError, OSError) as e:
+        return {"error": str(e)}
+    row_options = {key: value for key, value in options.items() if key != "output_format"}
+    row_options.update(include_sequences=True, summary_only=False)
+    results = None
+    try:
+        for event in stream_analysis(file_path, analysis_type, row_options, progress_callback):
+            event_type = event.pop("type")
+            if event_type == "sequence":
+                writer.write(event)
+            elif event_type == "error":
+                writer.abort()
+                return {"error": event["error"]}
+            else:
+                results = event
+        results["sequences_file"] = writer.close()
+        return results
+    except AnalysisCancelled:
+        writer.abort()
+        raise
+    except Exception as e:
+        writer.abort()
+        return {"error": f"Failed to write {output_format} output: {str(e)}"}
+
+
+def stream_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                    progress_callback: Optional[ProgressCallback] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run an analysis and yield per-sequence rows as they are produced.
+
+    Yields one {"type": "sequence", ...} event per record, or per read pair for
+    paired-end runs (within the requested offset/limit window), then a single
+    {"type": "summary", ...} event with the aggregate results, or an
+    {"type": "error", ...} event on failure. K-mer analysis has no per-record
+    rows, so it yields only the summary.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options from the request
+        progress_callback (Optional[ProgressCallback]): Called with
+            (bytes_processed, bytes_total) while the file is analyzed
+
+    Yields:
+        Dict[str, Any]: Stream events
+    """
+    ext = get_sequence_extension(file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        yield {"type": "error", "error": f"Unsupported file extension: {ext}"}
+        return
+    try:
+        include_sequences, offset, limit = resolve_page_options(options)
+        # Dispatched like run_analysis: a mate file makes any analysis a paired-end one
+        paired = bool(options.get("mate_file_path"))
+        if analysis_type == "kmer" and not paired:
+            # Aggregate only: there are no per-sequence rows to stream
+            results = run_analysis(file_path, analysis_type, options, progress_callback)
+            if "error" in results:
+                yield {"type": "error", "error": results["error"]}
+                return
+            yield {"type": "summary", **results}
+            return
+        if paired:
+            mate_file_path = options["mate_file_path"]
+            if ext not in FASTQ_EXTENSIONS or get_sequence_extension(mate_file_path) not in FASTQ_EXTENSIONS:
+                yield {"type": "error", "error": "Paired-end analysis requires two FASTQ files"}
+                return
+            analyzer = FastqAnalyzer()
+            summaries = (SequenceSummary(), SequenceSummary())
+            qualities = (QualityAccumulator(), QualityAccumulator())
+            pairs = PairStatistics()
+            rows = analyzer.iter_pairs(file_path, mate_file_path, summaries, qualities, pairs, progress_callback)
+        elif analysis_type == "mutation_detection":
+            if not options.get("reference_path"):
+                yield {"type": "error", "error": "mutation_detection requires the reference_path option"}
+                return
+            analyzer = MutationAnalyzer(options["reference_path"])
+            totals = MutationTotals()
+            rows = analyzer.iter_rows(file_path, totals, progress_callback)
+        else:
+            summary = SequenceSummary()
+            if ext in FASTA_EXTENSIONS:
+                analyzer = FastaAnalyzer()
+                quality = None
+                rows = analyzer.iter_sequences(file_path, summary, progress_callback)
+            else:
+                analyzer = FastqAnalyzer()
+                quality = QualityAccumulator()
+                rows = analyzer.iter_sequences(file_path, summary, quality, progress_callback)
+
+        emitted = 0
+        for index, row in enumerate(rows):
+            if include_sequences and index >= offset and (limit is None or emitted < limit):
+                emitted += 1
+                yield {"type": "sequence", **row}
+
+        if paired:
+            if pairs.pairs == 0:
+                yield {"type": "error", "error": "No read pairs found in files"}
+                return
+            results = analyzer.build_pair_results(summaries, qualities, pairs, [])
+        elif analysis_type == "mutation_detection":
+            if totals.sequences == 0:
+                yield {"type": "error", "error": "No sequences found in file"}
+                return
+            results = analyzer.build_results(file_path, totals, [])
+        else:
+            if summary.count == 0:
+                yield {"type": "error", "error": "No sequences found in file"}
+                return
+            if quality is None:
+                results = analyzer.build_results(summary, [])
+            else:
+                results = analyzer.build_results(summary, quality, [])
+            results = {"analysis_type": analysis_type, **results}
+        results.pop("sequences")
+        yield {"type": "summary", **results}
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        yield {"type": "error", "error": f"Analysis failed: {str(e)}"}
+
+
+class CancelMarker:
+    """Progress callback that stops an analysis once a marker file exists (checked at most every interval seconds)."""
+
+    def __init__(self, path: str, interval: float = 0.25):
+        self.path = path
+        self.interval = interval
+        self._last_check = 0.0
+
+    def __call__(self, bytes_processed: int, bytes_total: int) -> None:
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return
+        self._last_check = now
+        if os.path.exists(self.path):
+            raise AnalysisCancelled("Stream was closed by the client")
+
+
+def spool_stream_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                          spool_path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run stream_analysis in a worker process, appending its NDJSON to a spool file.
+
+    The service tails the spool file while the analysis runs. Creating
+    "<spool_path>.cancel" stops the analysis.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options from the request
+        spool_path (str): File the NDJSON chunks are appended to
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: The final (summary or error)
+        event and the worker's stage timings
+    """
+    stage_timings.drain()
+    final: Dict[str, Any] = {"type": "error", "error": "Analysis produced no summary"}
+
+    def events():
+        nonlocal final
+        for event in stream_analysis(file_path, analysis_type, options, CancelMarker(f"{spool_path}.cancel")):
+            if event["type"] != "sequence":
+                final = {key: value for key, value in event.items() if key != "sequences"}
+            yield event
+
+    try:
+        with open(spool_path, "ab") as spool:
+            for chunk in iter_ndjson(events()):
+                spool.write(chunk)
+                spool.flush()
+    except AnalysisCancelled as e:
+        final = {"type": "error", "error": str(e)}
+    return final, stage_timings.drain()
@@ -0,0 +1,330 @@
+"""
+Indexed random access to FASTA/FASTQ records
+Builds samtools-compatible .fai indexes and serves records and regions via mmap slicing
+"""
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from utils.helpers import is_gzip_file, get_sequence_extension, FASTQ_EXTENSIONS
+
+# name, length, offset, linebases, linewidth[, qualoffset]
+IndexEntry = Tuple[str, int, int, int, int, Optional[int]]
+
+_COUNT_BLOCK_SIZE = 16 * 1024 * 1024
+# Indexes of inputs whose directory must not be written to (e.g. mutation references)
+INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-indexes"))
+
+_REGION_PATTERN = re.compile(r"^(?P<name>.+?)(?::(?P<start>[\d,]+)(?:-(?P<end>[\d,]+))?)?$")
+
+
+def _count_bytes(data: mmap.mmap, needle: bytes, start: int, end: int) -> int:
+    """Count a byte in data[start:end], slicing in blocks to bound the copy size."""
+    total = 0
+    for block_start in range(start, end, _COUNT_BLOCK_SIZE):
+        total += data[block_start:min(block_start + _COUNT_BLOCK_SIZE, end)].count(needle)
+    return total
+
+
+def _line_layout(data: mmap.mmap, start: int, end: int) -> Tuple[int, int, int]:
+    """
+    Describe the sequence lines between two byte offsets.
+
+    Returns:
+        Tuple[int, int, int]: (bases, linebases, linewidth)
+    """
+    newline = data.find(b"\n", start, end)
+    if newline < 0:
+        # Single unterminated line at end of file
+        bases = end - start
+        return bases, bases, bases
+    linewidth = newline - start + 1
+    linebases = linewidth - 1 - (1 if data[newline - 1:newline] == b"\r" else 0)
+    newlines = _count_bytes(data, b"\n", start, end)
+    carriage_returns = _count_bytes(data, b"\r", start, end) if linebases < linewidth - 1 else 0
+    bases = end - start - newlines - carriage_returns
+    if linebases > 0 and bases > 0:
+        expected_lines = -(-bases // linebases)
+        # Every full line must end exactly one linewidth after the previous one
+        full_lines = bases // linebases
+        region = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+        line_ends = region[linewidth - 1:full_lines * linewidth:linewidth]
+        aligned = bool(np.all(line_ends == ord("\n")))
+        del region, line_ends
+        if not aligned or newlines not in (expected_lines, expected_lines - 1):
+            raise ValueError("Different line length in sequence")
+    return bases, linebases, linewidth
+
+
+def build_fasta_index(file_path: str, index_path: Optional[str] = None) -> str:
+    """
+    Build a samtools-compatible .fai index for an uncompressed FASTA file.
+
+    Args:
+        file_path (str): Path to the FASTA file
+        index_path (Optional[str]): Output path (default: file_path + ".fai")
+
+    Returns:
+        str: Path of the written index
+    """
+    if is_gzip_file(file_path):
+        raise ValueError("Indexing requires an uncompressed file")
+    index_path = index_path or f"{file_path}.fai"
+    entries = []
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("No sequences found in file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            if data[:1] == b">":
+                header = 0
+            else:
+                header = data.find(b"\n>")
+                if header < 0:
+                    raise ValueError("No sequences found in file")
+                header += 1
+            while header >= 0:
+                header_end = data.find(b"\n", header)
+                if header_end < 0:
+                    header_end = size
+                name = data[header + 1:header_end].split(None, 1)[0].decode() if header_end > header + 1 else ""
+                seq_start = min(header_end + 1, size)
+                next_header = data.find(b"\n>", header_end)
+                seq_end = next_header + 1 if next_header >= 0 else size
+                bases, linebases, linewidth = _line_layout(data, seq_start, seq_end)
+                entries.append((name, bases, seq_start, linebases, linewidth))
+                header = seq_end if next_header >= 0 else -1
+    with open(index_path, "w") as out:
+        for entry in entries:
+            out.write("\t".join(str(value) for value in entry) + "\n")
+    return index_path
+
+
+def build_fastq_index(file_path: str, index_path: Optional[str] = None) -> str:
+    """
+    Build a samtools fqidx-compatible .fai index (with quality offsets) for a FASTQ file.
+
+    Args:
+        file_path (str): Path to the uncompressed four-line FASTQ file
+        index_path (Optional[str]): Output path (default: file_path + ".fai")
+
+    Returns:
+        str: Path of the written index
+
+    Raises:
+        ValueError: If the file is compressed or not a well-formed four-line FASTQ
+    """
+    if is_gzip_file(file_path):
+        raise ValueError("Indexing requires an uncompressed file")
+    index_path = index_path or f"{file_path}.fai"
+    entries = []
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("No sequences found in file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            position = 0
+            while position < size:
+                if data[position:position + 1] != b"@":
+                    raise ValueError(f"Expected '@' at byte {position}")
+                header_end = data.find(b"\n", position)
+                seq_start = header_end + 1
+                seq_end = data.find(b"\n", seq_start)
+                separator_end = data.find(b"\n", seq_end + 1)
+                if header_end < 0 or seq_end < 0 or separator_end < 0:
+                    raise ValueError(f"Truncated record at byte {position}")
+                if data[seq_end + 1:seq_end + 2] != b"+":
+                    raise ValueError(f"Expected '+' separator at byte {seq_end + 1}")
+                qual_start = separator_end + 1
+                qual_end = data.find(b"\n", qual_start)
+                if qual_end < 0:
+                    qual_end = size
+                name = data[position + 1:header_end].split(None, 1)[0].decode() if header_end > position + 1 else ""
+                line_end = seq_end - (1 if data[seq_end - 1:seq_end] == b"\r" else 0)
+                length = line_end - seq_start
+                qual_line_end = qual_end - (1 if data[qual_end - 1:qual_end] == b"\r" else 0)
+                if qual_line_end - qual_start != length:
+                    raise ValueError(f"Sequence and quality lengths differ in record '{name}'")
+                linewidth = seq_end - seq_start + 1
+                entries.append((name, length, seq_start, length, linewidth, qual_start))
+                position = qual_end + 1
+    # Written only once the whole file validated, so a malformed file leaves no partial index
+    with open(index_path, "w") as out:
+        for entry in entries:
+            out.write("\t".join(str(value) for value in entry) + "\n")
+    return index_path
+
+
+def parse_region(region: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Parse a samtools-style region ("chr1", "chr1:100", "chr1:1,000-2,000").
+
+    Args:
+        region (str): Region string with 1-based inclusive coordinates
+
+    Returns:
+        Tuple[str, Optional[int], Optional[int]]: name, start and end
+    """
+    match = _REGION_PATTERN.match(region.strip())
+    if not match:
+        raise ValueError(f"Invalid region: {region}")
+    start = match.group("start")
+    end = match.group("end")
+    return (
+        match.group("name"),
+        int(start.replace(",", "")) if start else None,
+        int(end.replace(",", "")) if end else None
+    )
+
+
+class SequenceIndex:
+    """Random access to records of an indexed FASTA or FASTQ file."""
+
+    def __init__(self, file_path: str, index_path: Optional[str] = None, build: bool = True):
+        self.file_path = file_path
+        self.is_fastq = get_sequence_extension(file_path) in FASTQ_EXTENSIONS
+        self.index_path = index_path or f"{file_path}.fai"
+        if not os.path.exists(self.index_path) or os.path.getmtime(self.index_path) < os.path.getmtime(file_path):
+            if not build:
+                raise FileNotFoundError(f"Index not found: {self.index_path}")
+            builder = build_fastq_index if self.is_fastq else build_fasta_index
+            # Written then renamed so concurrent readers never see a partial index
+            tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            builder(file_path, tmp_path)
+            os.replace(tmp_path, self.index_path)
+        self.entries: Dict[str, IndexEntry] = {}
+        self.names: List[str] = []
+        with open(self.index_path) as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                qual_offset = int(fields[5]) if len(fields) > 5 else None
+                entry = (fields[0], int(fields[1]), int(fields[2]), int(fields[3]), int(fields[4]), qual_offset)
+                self.entries[fields[0]] = entry
+                self.names.append(fields[0])
+        self._file = open(file_path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        self._data.close()
+        self._file.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _slice(self, entry: IndexEntry, start: int, end: int, offset: int) -> str:
+        """Read 0-based half-open [start, end) bases of a record starting at offset."""
+        _, _, _, linebases, linewidth, _ = entry
+        if end <= start:
+            return ""
+        first = offset + (start // linebases) * linewidth + start % linebases
+        last = offset + ((end - 1) // linebases) * linewidth + (end - 1) % linebases + 1
+        chunk = self._data[first:last]
+        return chunk.replace(b"\n", b"").replace(b"\r", b"").decode()
+
+    def fetch(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> str:
+        """
+        Fetch a (sub)sequence.
+
+        Args:
+            name (str): Record name
+            start (Optional[int]): 1-based start position (default: 1)
+            end (Optional[int]): 1-based inclusive end position (default: record end)
+
+        Returns:
+            str: Sequence
+        """
+        if name not in self.entries:
+            raise KeyError(f"Sequence not found: {name}")
+        entry = self.entries[name]
+        length = entry[1]
+        begin = max((start or 1) - 1, 0)
+        stop = min(end if end is not None else length, length)
+        return self._slice(entry, begin, stop, entry[2])
+
+    def fetch_region(self, region: str) -> Dict[str, Any]:
+        """
+        Fetch a region such as "chr1:100-200".
+
+        Args:
+            region (str): samtools-style region
+
+        Returns:
+            Dict[str, Any]: Region name, coordinates and sequence
+        """
+        if region in self.entries:
+            name, start, end = region, None, None
+        else:
+            name, start, end = parse_region(region)
+        length = self.entries[name][1] if name in self.entries else 0
+        sequence = self.fetch(name, start, end)
+        return {
+            "id": name,
+            "start": start or 1,
+            "end": min(end, length) if end is not None else length,
+            "length": len(sequence),
+            "sequence": sequence
+        }
+
+    def get_record(self, name: str) -> Dict[str, Any]:
+        """
+        Fetch a whole record by id (with qualities for FASTQ).
+
+        Args:
+            name (str): Record name
+
+        Returns:
+            Dict[str, Any]: Record id, length, sequence and quality (FASTQ only)
+        """
+        record = {"id": name, "length": self.entries[name][1] if name in self.entries else 0,
+                  "sequence": self.fetch(name)}
+        entry = self.entries[name]
+        if entry[5] is not None:
+            record["quality"] = self._slice(entry, 0, entry[1], entry[5])
+        return record
+
+
+_open_indexes: "OrderedDict[Tuple[str, float], SequenceIndex]" = OrderedDict()
+_open_indexes_lock = threading.Lock()
+MAX_OPEN_INDEXES = 16
+
+
+def cached_index_path(file_path: str) -> str:
+    """Location of a file's index in INDEX_CACHE_DIR, keyed by its resolved path."""
+    os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+    digest = hashlib.sha256(os.path.realpath(file_path).encode()).hexdigest()[:32]
+    return os.path.join(INDEX_CACHE_DIR, f"{digest}.fai")
+
+
+def open_index(file_path: str, cached: bool = False) -> SequenceIndex:
+    """
+    Open (building if needed) the index of a file, reusing recently opened ones.
+
+    Args:
+        file_path (str): Path to the FASTA/FASTQ file
+        cached (bool): Keep the index in INDEX_CACHE_DIR instead of next to the file
+
+    Returns:
+        SequenceIndex: Index ready for lookups
+    """
+    key = (os.path.realpath(file_path), os.path.getmtime(file_path))
+    with _open_indexes_lock:
+        if key in _open_indexes:
+            _open_indexes.move_to_end(key)
+            return _open_indexes[key]
+    index = SequenceIndex(file_path, cached_index_path(file_path) if cached else None)
+    with _open_indexes_lock:
+        _open_indexes[key] = index
+        while len(_open_indexes) > MAX_OPEN_INDEXES:
+            # Not closed explicitly: another request may still be reading it
+            _open_indexes.popitem(last=False)
+    return index
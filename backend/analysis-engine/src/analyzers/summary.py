@@ -0,0 +1,228 @@
+"""
+Running sequence summary for genomic analyzers
+Mergeable aggregate statistics computed in a single streaming pass
+"""
+import math
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+# Lengths buffered per record before they are folded into the compact length array
+LENGTH_BUFFER_SIZE = int(os.getenv("SUMMARY_LENGTH_BUFFER", 65536))
+# Per-record GC content histogram: one bin per whole percent (0..100)
+GC_BINS = 101
+# Nx metrics reported in the statistics block
+NX_PERCENTS = [50, 90]
+
+
+def _add_exact(partials: List[float], value: float) -> None:
+    """
+    Add a value to a list of non-overlapping partial sums (Shewchuk's algorithm).
+
+    Keeping the running GC total exact makes the result independent of the
+    order in which records and merged chunks are added.
+    """
+    i = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
+def _merge_lengths(values: np.ndarray, counts: np.ndarray,
+                   more_values: np.ndarray, more_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Combine two (sorted distinct lengths, counts) pairs into one."""
+    if not more_values.size:
+        return values, counts
+    merged, inverse = np.unique(np.concatenate([values, more_values]), return_inverse=True)
+    merged_counts = np.zeros(merged.size, dtype=np.int64)
+    np.add.at(merged_counts, inverse, np.concatenate([counts, more_counts]))
+    return merged, merged_counts
+
+
+def _length_bin(length: int) -> int:
+    """Lower edge of the 1-2-5 logarithmic length bin holding a length (0, 1, 2, 5, 10, 20, 50, ...)."""
+    if length < 1:
+        return 0
+    edge = 10 ** (len(str(length)) - 1)
+    for step in (5, 2):
+        if length >= step * edge:
+            return step * edge
+    return edge
+
+
+class SequenceSummary:
+    """
+    Running aggregate over per-record lengths and GC content.
+
+    Lengths are kept as a sorted array of distinct values with their counts,
+    so memory grows with the number of distinct lengths rather than records
+    and N50/L50 stay exact after any number of merges.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_length = 0
+        self.gc_partials: List[float] = []
+        self.longest: Optional[int] = None
+        self.shortest: Optional[int] = None
+        self.length_values = np.zeros(0, dtype=np.int64)
+        self.length_counts = np.zeros(0, dtype=np.int64)
+        self.gc_histogram = [0] * GC_BINS
+        self._pending_lengths: List[int] = []
+
+    def add(self, length: int, gc_content: float) -> None:
+        """
+        Account for one record.
+
+        Args:
+            length (int): Sequence length of the record
+            gc_content (float): GC content of the record in percent
+        """
+        self.count += 1
+        self.total_length += length
+        _add_exact(self.gc_partials, gc_content)
+        if self.longest is None or length > self.longest:
+            self.longest = length
+        if self.shortest is None or length < self.shortest:
+            self.shortest = length
+        self.gc_histogram[min(int(gc_content), GC_BINS - 1)] += 1
+        self._pending_lengths.append(length)
+        if len(self._pending_lengths) >= LENGTH_BUFFER_SIZE:
+            self._compact_lengths()
+
+    def _compact_lengths(self) -> None:
+        """Fold buffered lengths into the compact length array."""
+        if not self._pending_lengths:
+            return
+        pending, counts = np.unique(np.array(self._pending_lengths, dtype=np.int64), return_counts=True)
+        self.length_values, self.length_counts = _merge_lengths(
+            self.length_values, self.length_counts, pending, counts.astype(np.int64)
+        )
+        self._pending_lengths = []
+
+    def merge(self, other: "SequenceSummary") -> "SequenceSummary":
+        """
+        Fold another summary (e.g. from a later part of the file) into this one.
+
+        Args:
+            other (SequenceSummary): Summary to merge in
+
+        Returns:
+            SequenceSummary: This summary, updated in place
+        """
+        self.count += other.count
+        self.total_length += other.total_length
+        for partial in other.gc_partials:
+            _add_exact(self.gc_partials, partial)
+        if other.longest is not None and (self.longest is None or other.longest > self.longest):
+            self.longest = other.longest
+        if other.shortest is not None and (self.shortest is None or other.shortest < self.shortest):
+            self.shortest = other.shortest
+        self.gc_histogram = [a + b for a, b in zip(self.gc_histogram, other.gc_histogram)]
+        other._compact_lengths()
+        self._compact_lengths()
+        self.length_values, self.length_counts = _merge_lengths(
+            self.length_values, self.length_counts, other.length_values, other.length_counts
+        )
+        return self
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return the summary as JSON-serializable state (see from_state)."""
+        self._compact_lengths()
+        return {
+            "count": self.count,
+            "total_length": self.total_length,
+            "gc_partials": list(self.gc_partials),
+            "longest": self.longest,
+            "shortest": self.shortest,
+            "length_values": self.length_values.tolist(),
+            "length_counts": self.length_counts.tolist(),
+            "gc_histogram": list(self.gc_histogram)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SequenceSummary":
+        """Rebuild a summary saved with to_state."""
+        summary = cls()
+        summary.count = state["count"]
+        summary.total_length = state["total_length"]
+        summary.gc_partials = list(state["gc_partials"])
+        summary.longest = state["longest"]
+        summary.shortest = state["shortest"]
+        summary.length_values = np.array(state["length_values"], dtype=np.int64)
+        summary.length_counts = np.array(state["length_counts"], dtype=np.int64)
+        summary.gc_histogram = list(state["gc_histogram"])
+        return summary
+
+    @property
+    def gc_total(self) -> float:
+        """Correctly rounded sum of per-record GC content."""
+        return math.fsum(self.gc_partials)
+
+    def nx(self, percent: int) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Exact Nx and Lx: the length of the record at which records sorted from
+        longest to shortest first cover percent of all bases, and how many
+        records that takes (e.g. N50/L50 for percent=50).
+
+        Args:
+            percent (int): Share of the total length, in percent
+
+        Returns:
+            Tuple[Optional[int], Optional[int]]: (Nx, Lx), or (None, None) without bases
+        """
+        self._compact_lengths()
+        if self.total_length == 0:
+            return None, None
+        values = self.length_values[::-1]
+        counts = self.length_counts[::-1]
+        covered = np.cumsum(values * counts)
+        # Integer comparison: covered / total >= percent / 100
+        index = int(np.argmax(covered * 100 >= self.total_length * percent))
+        length = int(values[index])
+        covered_before = int(covered[index - 1]) if index else 0
+        records_before = int(counts[:index].sum())
+        needed = self.total_length * percent - covered_before * 100
+        return length, records_before - (-needed // (length * 100))
+
+    def to_statistics(self) -> Dict[str, Any]:
+        """Return the overall statistics block used in analysis results."""
+        if self.count == 0:
+            return {}
+        statistics = {
+            "total_length": self.total_length,
+            "average_length": round(self.total_length / self.count, 2),
+            "average_gc_content": round(self.gc_total / self.count, 2),
+            "longest_sequence": self.longest,
+            "shortest_sequence": self.shortest
+        }
+        for percent in NX_PERCENTS:
+            statistics[f"n{percent}"], statistics[f"l{percent}"] = self.nx(percent)
+        return statistics
+
+    def to_distributions(self) -> Dict[str, Any]:
+        """
+        Return the length and GC content histograms.
+
+        Lengths are binned on a 1-2-5 logarithmic scale and GC content in
+        one-percent bins; both are keyed by the lower bin edge and only
+        non-empty bins are listed.
+        """
+        self._compact_lengths()
+        length_histogram: Dict[str, Dict[str, int]] = {}
+        for length, count in zip(self.length_values.tolist(), self.length_counts.tolist()):
+            bin_counts = length_histogram.setdefault(str(_length_bin(length)), {"count": 0, "bases": 0})
+            bin_counts["count"] += count
+            bin_counts["bases"] += length * count
+        return {
+            "length_histogram": length_histogram,
+            "gc_histogram": {str(gc): count for gc, count in enumerate(self.gc_histogram) if count}
+        }
@@ -3,36 +3,155 @@ Genomic Platform - Analysis Engine
 FastAPI microservice for genomic data analysis with BioPython integration
 """
 import os
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Tuple
 
+# Start of module import, for the startup-time budget
+IMPORT_STARTED = time.perf_counter()
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import uvicorn
 from dotenv import load_dotenv
-# Import analyzers
-from analyzers.fasta_analyzer import FastaAnalyzer
-from analyzers.fastq_analyzer import FastqAnalyzer
+# Analyzers (BioPython, NumPy) are imported lazily and warmed up in lifespan
+from analyzers.batch import BatchSummary, expand_batch_paths, order_largest_first
+from analyzers.sequence_index import open_index
+from oracle.client import OracleClient
+from oracle.verification import VariantVerifier, open_annotation_store
+from utils.cache import ResultCache
+from utils.concurrency import AdmissionController, AdmissionRejected, SingleFlight
+from utils.jobs import COMPLETED, JobManager, run_job, save_job_result
+from utils.helpers import (
+    get_sequence_extension, calculate_file_hash, memoized_file_hash, file_identity, iter_ndjson,
+    FASTA_EXTENSIONS, FASTQ_EXTENSIONS
+)
+from utils.log import configure_logging, get_logger
+from utils.metrics import (
+    registry, span, stage_timings, MetricsMiddleware,
+    ANALYSES, ANALYSIS_LATENCY, BYTES_PROCESSED, RECORDS_PROCESSED, COALESCED_REQUESTS
+)
+from utils.profiler import ProfileStore
+from utils.startup import warm_up, process_age, check_startup_budget, STARTUP_BUDGET_SECONDS
 
 
 # Load environment variables
-print("[LOG] Loading environment variables from .env...")
 load_dotenv()
-print(f"[LOG] Environment variable PORT: {os.getenv('PORT')}")
+configure_logging()
+logger = get_logger()
+
+
+# Admission control and dedicated executor for CPU-heavy analyses
+admission = AdmissionController()
+analysis_executor: Optional[ProcessPoolExecutor] = None
+# Long-running analyses submitted through the job API
+job_manager = JobManager()
+# Results keyed by file content, analysis type, options and analyzer version
+result_cache = ResultCache()
+# Concurrent identical /analyze requests share one analysis
+single_flight = SingleFlight()
+# Files of one /analyze/batch run analyzed at once; half the slots by default so one batch cannot starve /analyze
+BATCH_MAX_WORKERS = min(
+    int(os.getenv("BATCH_MAX_WORKERS", 0)) or max(1, admission.max_in_flight // 2), admission.max_in_flight
+)
+# /analyze/stream: workers append NDJSON to a spool file that the response tails
+STREAM_SPOOL_DIR = os.getenv("STREAM_SPOOL_DIR") or None
+STREAM_READ_SIZE = 256 * 1024
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", 0.05))
+# Shared pooled client for the oracle service
+oracle_client = OracleClient(os.getenv("ORACLE_SERVICE_URL", "http://localhost:3002"))
+# Local annotation dump (VCF/TSV) consulted before the oracle service
+annotation_source = os.getenv("ANNOTATION_SOURCE")
+variant_verifier = VariantVerifier(client=oracle_client)
+# Folded stack profiles of analyses run with options.profile
+profile_store = ProfileStore()
+
+
+def collect_service_metrics():
+    """Scrape-time gauges from the admission controller, request coalescing and result cache."""
+    queue = admission.metrics()
+    cache = result_cache.stats()
+    flights = single_flight.metrics()
+    return [
+        ("analysis_in_flight", "gauge", "Analyses currently running",
+         [("analysis_in_flight", {}, queue["in_flight"])]),
+        ("analysis_queued", "gauge", "Analyses waiting for a slot",
+         [("analysis_queued", {}, queue["queued"])]),
+        ("analysis_admission_total", "counter", "Admission decisions by outcome",
+         [("analysis_admission_total", {"outcome": "admitted"}, queue["admitted_total"]),
+          ("analysis_admission_total", {"outcome": "rejected"}, queue["rejected_total"]),
+          ("analysis_admission_total", {"outcome": "timed_out"}, queue["timed_out_total"])]),
+        ("analysis_shared_in_flight", "gauge", "Distinct /analyze computations that later identical requests can join",
+         [("analysis_shared_in_flight", {}, flights["in_flight"])]),
+        ("result_cache_lookups_total", "counter", "Result cache lookups by outcome",
+         [("result_cache_lookups_total", {"outcome": "memory_hit"}, cache["memory_hits"]),
+          ("result_cache_lookups_total", {"outcome": "disk_hit"}, cache["disk_hits"]),
+          ("result_cache_lookups_total", {"outcome": "miss"}, cache["misses"])]),
+        ("result_cache_hit_ratio", "gauge", "Fraction of result cache lookups that hit",
+         [("result_cache_hit_ratio", {}, cache["hit_ratio"] or 0)])
+    ]
+
+
+registry.register_collector(collect_service_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the analyzers and create the analysis executor on startup; shut it down on exit."""
+    global analysis_executor
+    import_seconds = time.perf_counter() - IMPORT_STARTED
+    started = time.perf_counter()
+    warm_up_seconds = warm_up()
+    # Pool processes are forked from the warmed-up worker; the initializer covers spawn-based platforms
+    analysis_executor = ProcessPoolExecutor(max_workers=admission.max_in_flight, initializer=warm_up)
+    await asyncio.get_running_loop().run_in_executor(analysis_executor, warm_up)
+    job_manager.start(admission.admit, execute_job)
+    pool_seconds = time.perf_counter() - started - warm_up_seconds
+    phases = {"import": import_seconds, "warm_up": warm_up_seconds, "analysis_pool": pool_seconds}
+    if annotation_source:
+        # Build the store before the first request instead of inside it
+        store_started = time.perf_counter()
+        try:
+            await refresh_annotation_store()
+        except Exception as e:
+            # Requests retry the build and fail with 503 until the dump is usable
+            logger.error("annotation_store_failed", source=annotation_source, error=str(e))
+        phases["annotation_store"] = time.perf_counter() - store_started
+    age = process_age()
+    total = age if age is not None else time.perf_counter() - IMPORT_STARTED
+    within_budget = check_startup_budget(phases, total)
+    log = logger.info if within_budget else logger.warning
+    log(
+        "startup_complete",
+        pid=os.getpid(),
+        seconds=round(total, 3),
+        budget_seconds=STARTUP_BUDGET_SECONDS,
+        within_budget=within_budget,
+        **{f"{phase}_seconds": round(seconds, 3) for phase, seconds in phases.items()}
+    )
+    yield
+    job_manager.shutdown()
+    analysis_executor.shutdown(wait=False, cancel_futures=True)
+    analysis_executor = None
+    await oracle_client.aclose()
 
 
 # Initialize FastAPI app
-print("[LOG] Creating FastAPI app instance...")
 app = FastAPI(
     title="Genomic Analysis Engine",
     description="FastAPI microservice for genomic data analysis with oracle integration",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
-print("[LOG] FastAPI app created.")
 
 # Add CORS middleware
 app.add_middleware(
@@ -42,6 +161,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Pydantic models
 class HealthResponse(BaseModel):
@@ -50,11 +171,33 @@ class HealthResponse(BaseModel):
     timestamp: str
     service: str
     version: str
+    analysis_queue: Dict[str, Any] = {}
+    result_cache: Dict[str, Any] = {}
 
 class AnalysisRequest(BaseModel):
     file_path: str
     analysis_type: str
     options: Dict[str, Any] = {}
+    # R2 file of a paired-end run (file_path is R1)
+    mate_file_path: Optional[str] = None
+
+    def analysis_options(self) -> Dict[str, Any]:
+        """Options passed to the analyzers, including the mate file of a paired run."""
+        if self.mate_file_path:
+            return {**self.options, "mate_file_path": self.mate_file_path}
+        return self.options
+
+class BatchAnalysisRequest(BaseModel):
+    file_paths: List[str] = []
+    pattern: Optional[str] = None
+    analysis_type: str
+    options: Dict[str, Any] = {}
+
+class IndexRequest(BaseModel):
+    file_path: str
+
+class VariantVerificationRequest(BaseModel):
+    variants: List[Dict[str, Any]]
 
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
@@ -65,7 +208,9 @@ async def health_check():
         message="Genomic Analysis Engine is running",
         timestamp=datetime.now().isoformat(),
         service="analysis-engine",
-        version="1.0.0"
+        version="1.0.0",
+        analysis_queue=admission.metrics(),
+        result_cache=result_cache.stats()
     )
 
 # API info endpoint
@@ -80,63 +225,587 @@ async def api_info():
             "health": "/health",
             "docs": "/docs",
             "redoc": "/redoc",
-            "analyze": "/analyze"
+            "analyze": "/analyze",
+            "analyze_stream": "/analyze/stream",
+            "index": "/index",
+            "sequence": "/sequence",
+            "jobs": "/jobs",
+            "metrics": "/metrics"
         },
         "supported_formats": ["FASTA", "FASTQ"],
-        "analysis_types": ["basic", "mutation_detection", "gc_content"]
+        "analysis_types": ["basic", "mutation_detection", "gc_content", "kmer"]
     }
 
 
+async def lookup_cached_result(file_path: str, analysis_type: str, options: Dict[str, Any],
+                               hash_files: bool = True) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Look an analysis up in the result cache.
+
+    Args:
+        file_path (str): Path to the analyzed file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options
+        hash_files (bool): Hash input files that have no memoized hash; callers
+            without an admission slot pass False so they never read file content
+    
+    Returns:
+        Tuple[Optional[str], Optional[Dict[str, Any]]]: Cache key (None when caching is
+        disabled, the file is missing or not hashed yet) and the cached result, if any
+    """
+    # Incremental runs read only appended data; hashing the whole file would defeat that
+    if (not options.get("use_cache", True) or options.get("incremental") or options.get("profile")
+            or not os.path.isfile(file_path)):
+        return None, None
+    loop = asyncio.get_running_loop()
+    hashes = []
+    # Results also depend on the reference / mate file content
+    for path in [file_path, options.get("reference_path"), options.get("mate_file_path")]:
+        if path and os.path.isfile(path):
+            file_hash = memoized_file_hash(path, result_cache.hash_algorithm)
+            if file_hash is None:
+                if not hash_files:
+                    return None, None
+                file_hash = await loop.run_in_executor(None, calculate_file_hash, path, result_cache.hash_algorithm)
+            hashes.append(file_hash)
+    file_hash = "+".join(hashes)
+    from analyzers.runner import ANALYZER_VERSION
+
+    cache_key = ResultCache.make_key(file_hash, analysis_type, options, ANALYZER_VERSION)
+    cached = await loop.run_in_executor(None, result_cache.get, cache_key)
+    if cached is not None and "sequences_file" in cached:
+        from analyzers.columnar import is_current
+
+        if not is_current(cached["sequences_file"]):
+            # The columnar file of the cached run is gone or was rewritten; analyze again to rewrite it
+            cached = None
+    return cache_key, cached
+
+
+def single_flight_key(file_path: str, analysis_type: str, options: Dict[str, Any]) -> Optional[str]:
+    """
+    Key under which identical concurrent analyses are coalesced.
+
+    Input files are identified by path, size, mtime and inode, so requests
+    only share a computation while the files are unchanged, without hashing
+    their content.
+
+    Returns:
+        Optional[str]: Key, or None when the request must run on its own
+        (profiled runs, missing input files)
+    """
+    if options.get("profile"):
+        return None
+    identities = []
+    for path in [file_path, options.get("reference_path"), options.get("mate_file_path")]:
+        if path:
+            identity = file_identity(path)
+            if identity is None:
+                return None
+            identities.append(identity)
+    from analyzers.runner import ANALYZER_VERSION
+
+    # use_cache=false callers must not be handed a result the leader read from the cache
+    cache_mode = "cache" if options.get("use_cache", True) else "fresh"
+    key = ResultCache.make_key("+".join(identities), analysis_type, options, ANALYZER_VERSION)
+    return f"{cache_mode}:{key}"
+
+def record_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                    result: Dict[str, Any], elapsed: float) -> None:
+    """Account for a finished analysis in the service metrics."""
+    status = "error" if "error" in result else "success"
+    ANALYSES.inc(analysis_type=analysis_type, status=status)
+    ANALYSIS_LATENCY.observe(elapsed, analysis_type=analysis_type)
+    if status == "success":
+        size = sum(os.path.getsize(path) for path in [file_path, options.get("mate_file_path")]
+                   if path and os.path.isfile(path))
+        BYTES_PROCESSED.inc(size, analysis_type=analysis_type)
+        RECORDS_PROCESSED.inc(result.get("sequence_count", 0), analysis_type=analysis_type)
+
+def analysis_slots(analysis_type: str, options: Dict[str, Any]) -> int:
+    """
+    Admission slots an analysis must hold: one per chunk worker for parallel
+    runs (capped at the pool size), otherwise one.
+    """
+    from analyzers.runner import uses_parallel_analyzer
+
+    if options.get("profile") or not uses_parallel_analyzer(analysis_type, options):
+        return 1
+    from analyzers.parallel import get_worker_count
+
+    return min(get_worker_count(options.get("workers")), admission.max_in_flight)
+
+async def execute_analysis(file_path: str, analysis_type: str, options: Dict[str, Any],
+                           analysis_id: str) -> Dict[str, Any]:
+    """
+    Run an analysis on the analysis executor and record its telemetry.
+
+    The caller must hold analysis_slots(analysis_type, options) admission
+    slots. Parallel analyses split the file on a helper thread and keep at
+    most that many chunks in flight on the same analysis executor, so they
+    never start a pool of their own; profiled runs are analyzed in one worker
+    so that the profile covers all of the work.
+    """
+    from analyzers.runner import run_analysis, run_analysis_with_telemetry
+
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    slots = analysis_slots(analysis_type, options)
+    if slots > 1:
+        # Chunk stage timings are merged into this process's totals as chunks finish
+        result = await loop.run_in_executor(
+            None, run_analysis, file_path, analysis_type, {**options, "workers": slots}, None, analysis_executor
+        )
+        telemetry: Dict[str, Any] = {"stages": {}}
+    else:
+        worker_options = {key: value for key, value in options.items() if key != "parallel"}
+        result, telemetry = await loop.run_in_executor(
+            analysis_executor,
+            run_analysis_with_telemetry,
+            file_path,
+            analysis_type,
+            worker_options,
+            bool(options.get("profile"))
+        )
+    elapsed = time.monotonic() - started
+    stage_timings.merge(telemetry["stages"])
+    record_analysis(file_path, analysis_type, options, result, elapsed)
+    if "profile" in telemetry:
+        await loop.run_in_executor(None, profile_store.save, analysis_id, telemetry["profile"])
+    logger.info(
+        "analysis_finished",
+        analysis_id=analysis_id,
+        file_path=file_path,
+        analysis_type=analysis_type,
+        status="error" if "error" in result else "success",
+        seconds=round(elapsed, 3),
+        stages={stage: round(total["seconds"], 4) for stage, total in telemetry["stages"].items()}
+    )
+    return result
+
+async def analyze_or_reuse(file_path: str, analysis_type: str, options: Dict[str, Any],
+                           analysis_id: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Serve an analysis from the result cache, or run it and cache the result.
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: Result and whether it came from the cache
+
+    Raises:
+        AdmissionRejected: If no analysis slot is available
+    """
+    _, cached = await lookup_cached_result(file_path, analysis_type, options, hash_files=False)
+    if cached is not None:
+        return cached, True
+    async with admission.admit(analysis_slots(analysis_type, options)):
+        # Hashing reads the whole file, so it waits for a slot like the analysis itself
+        cache_key, cached = await lookup_cached_result(file_path, analysis_type, options)
+        if cached is not None:
+            return cached, True
+        result = await execute_analysis(file_path, analysis_type, options, analysis_id)
+    if cache_key is not None and "error" not in result:
+        await asyncio.get_running_loop().run_in_executor(None, result_cache.put, cache_key, result)
+    return result, False
+
+async def execute_job(job_id: str, file_path: str, analysis_type: str, options: Dict[str, Any]) -> str:
+    """
+    Run an admitted job: serve it from the result cache, or analyze it on the analysis executor.
+
+    Returns:
+        str: Final job state
+    """
+    loop = asyncio.get_running_loop()
+    store = job_manager.store
+    cache_key, cached = await lookup_cached_result(file_path, analysis_type, options)
+    if cached is not None:
+        await loop.run_in_executor(
+            None, save_job_result, store, job_id, COMPLETED, file_path, analysis_type, options, cached, 0.0
+        )
+        return COMPLETED
+    # Jobs run in one worker process, which reports progress and cannot fan chunks out to the pool
+    worker_options = {key: value for key, value in options.items() if key != "parallel"}
+    started = time.monotonic()
+    state, result, stages = await loop.run_in_executor(
+        analysis_executor, run_job, job_id, store.directory, file_path, analysis_type, worker_options
+    )
+    stage_timings.merge(stages)
+    if result is not None:
+        record_analysis(file_path, analysis_type, options, result, time.monotonic() - started)
+        if cache_key is not None:
+            await loop.run_in_executor(None, result_cache.put, cache_key, result)
+    logger.info("job_finished", job_id=job_id, file_path=file_path, analysis_type=analysis_type, state=state)
+    return state
+
+def check_page_options(options: Dict[str, Any]) -> None:
+    """Reject malformed pagination options before an analysis is queued."""
+    from analyzers.runner import resolve_page_options
+
+    try:
+        resolve_page_options(options)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def json_response(content: Dict[str, Any]) -> Response:
+    """Serialize a response body, timing it as the serialization stage."""
+    with span("serialization"):
+        body = json.dumps(content, default=str)
+    return Response(body, media_type="application/json")
+
 # Real analysis endpoint
 @app.post("/analyze")
 async def analyze_genomic_data(request: AnalysisRequest):
     """
     Analyze genomic data from uploaded files.
     """
+    # Determine file type by extension
+    ext = get_sequence_extension(request.file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        return {"error": f"Unsupported file extension: {ext}"}
+    options = request.analysis_options()
+    check_page_options(options)
+    analysis_id = uuid.uuid4().hex
+
+    # Identical requests arriving while an analysis runs wait for it instead of starting their own
+    key = single_flight_key(request.file_path, request.analysis_type, options)
     try:
-        file_path = request.file_path
-        # Determine file type by extension
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext in [".fasta", ".fa", ".fas"]:
-            analyzer = FastaAnalyzer()
-            result = analyzer.analyze_file(file_path)
-        elif ext in [".fastq", ".fq"]:
-            analyzer = FastqAnalyzer()
-            result = analyzer.analyze_file(file_path)
+        if key is None:
+            result, cached = await analyze_or_reuse(request.file_path, request.analysis_type, options, analysis_id)
+            coalesced = False
         else:
-            return {"error": f"Unsupported file extension: {ext}"}
-        return {
-            "status": "success" if "error" not in result else "error",
-            "analysis_type": request.analysis_type,
-            "timestamp": datetime.now().isoformat(),
-            "analysis": result
-        }
+            (result, cached), coalesced = await single_flight.run(
+                key, lambda: analyze_or_reuse(request.file_path, request.analysis_type, options, analysis_id)
+            )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    if coalesced:
+        COALESCED_REQUESTS.inc(analysis_type=request.analysis_type)
+    envelope = {
+        "status": "success" if "error" not in result else "error",
+        "analysis_id": analysis_id,
+        "analysis_type": request.analysis_type,
+        "timestamp": datetime.now().isoformat(),
+        "cached": cached,
+        "coalesced": coalesced,
+        "analysis": result
+    }
+    if options.get("profile"):
+        envelope["profile_url"] = f"/profiles/{analysis_id}"
+    return json_response(envelope)
+
+@app.post("/analyze/stream")
+async def stream_genomic_analysis(request: AnalysisRequest, http_request: Request):
+    """
+    Analyze genomic data and stream per-sequence rows as NDJSON while they are produced.
+    
+    The last line is a "summary" event with the aggregate statistics. The
+    analysis runs on the analysis executor and appends to a spool file that
+    the response tails; closing the stream early, or disconnecting before it
+    starts, cancels it.
+    """
+    ext = get_sequence_extension(request.file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file extension: {ext}")
+    check_page_options(request.analysis_options())
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(admission.admit())
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    from analyzers.runner import spool_stream_analysis
+
+    options = request.analysis_options()
+    loop = asyncio.get_running_loop()
+    try:
+        spool_fd, spool_path = tempfile.mkstemp(prefix="stream-", suffix=".ndjson", dir=STREAM_SPOOL_DIR)
+        spool = os.fdopen(spool_fd, "rb")
+    except BaseException:
+        await slot.aclose()
+        raise
+    cancel_path = f"{spool_path}.cancel"
+
+    async def run() -> Optional[Dict[str, Any]]:
+        """Run the analysis; returns an error event to append if it failed before finishing the spool."""
+        # The slot belongs to the analysis, not the response, so it is released
+        # even when the client goes away before the body starts
+        started = time.monotonic()
+        try:
+            final, stages = await loop.run_in_executor(
+                analysis_executor, spool_stream_analysis,
+                request.file_path, request.analysis_type, options, spool_path
+            )
+            stage_timings.merge(stages)
+            record_analysis(request.file_path, request.analysis_type, options, final, time.monotonic() - started)
+            return None
+        except Exception as e:
+            return {"type": "error", "error": f"Analysis failed: {str(e)}"}
+        finally:
+            await slot.aclose()
+            # The body keeps reading through its open handle
+            for path in [spool_path, cancel_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    analysis = asyncio.ensure_future(run())
+
+    async def watch_disconnect() -> None:
+        # The body's cleanup only runs once the response has started, so a client
+        # that leaves before then is noticed here
+        while not analysis.done():
+            if await http_request.is_disconnected():
+                if not analysis.done():
+                    open(cancel_path, "w").close()
+                return
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    analysis.add_done_callback(lambda _: watcher.cancel())
+
+    async def body():
+        try:
+            while True:
+                finished = analysis.done()
+                chunk = spool.read(STREAM_READ_SIZE)
+                if chunk:
+                    yield chunk
+                elif finished:
+                    break
+                else:
+                    await asyncio.sleep(STREAM_POLL_INTERVAL)
+            failure = analysis.result()
+            if failure is not None:
+                yield (json.dumps(failure) + "\n").encode()
+        finally:
+            spool.close()
+            if not analysis.done():
+                open(cancel_path, "w").close()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def analyze_batch_file(file_path: str, file_size: int, analysis_type: str,
+                             options: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze one file of a batch, waiting for an admission slot instead of failing when busy."""
+    started = time.monotonic()
+    cached = False
+    ext = get_sequence_extension(file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        result = {"error": f"Unsupported file extension: {ext}"}
+    elif file_size < 0:
+        result = {"error": f"File not found: {file_path}"}
+    else:
+        try:
+            cache_key, result = await lookup_cached_result(file_path, analysis_type, options, hash_files=False)
+            cached = result is not None
+            while result is None:
+                try:
+                    async with admission.admit(analysis_slots(analysis_type, options)):
+                        cache_key, result = await lookup_cached_result(file_path, analysis_type, options)
+                        cached = result is not None
+                        if not cached:
+                            result = await execute_analysis(file_path, analysis_type, options, uuid.uuid4().hex)
+                except AdmissionRejected as e:
+                    await asyncio.sleep(e.retry_after)
+            if cache_key is not None and not cached and "error" not in result:
+                await asyncio.get_running_loop().run_in_executor(None, result_cache.put, cache_key, result)
+        except Exception as e:
+            result = {"error": f"Analysis failed: {str(e)}"}
+    return {
+        "type": "file",
+        "file_path": file_path,
+        "file_size": file_size,
+        "status": "success" if "error" not in result else "error",
+        "cached": cached,
+        "processing_time": round(time.monotonic() - started, 3),
+        "analysis": result
+    }
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalysisRequest):
+    """
+    Analyze many files (explicit paths and/or a glob pattern) on the shared analysis workers.
+    
+    Files are scheduled largest first and streamed back as NDJSON "file" events in
+    completion order; the last line is a "summary" event for the whole run. A failing
+    file is reported in its event and does not stop the batch.
+    """
+    check_page_options(request.options)
+    files = order_largest_first(expand_batch_paths(request.file_paths, request.pattern))
+    if not files:
+        raise HTTPException(status_code=400, detail="No files matched the batch request")
+
+    async def body():
+        started = time.monotonic()
+        summary = BatchSummary()
+        pending = iter(files)
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            # Files are taken in order, so the largest ones start first
+            for file_path, file_size in pending:
+                await events.put(await analyze_batch_file(
+                    file_path, file_size, request.analysis_type, request.options
+                ))
 
-# Oracle integration endpoint (placeholder)
+        workers = [asyncio.create_task(worker()) for _ in range(min(BATCH_MAX_WORKERS, len(files)))]
+        try:
+            for _ in range(len(files)):
+                event = await events.get()
+                summary.add(event["file_path"], event["file_size"], event["analysis"], event["cached"])
+                yield (json.dumps(event, default=str) + "\n").encode()
+            yield (json.dumps({
+                "type": "summary",
+                "analysis_type": request.analysis_type,
+                "elapsed": round(time.monotonic() - started, 3),
+                **summary.to_dict()
+            }, default=str) + "\n").encode()
+        finally:
+            # Client went away: stop scheduling the remaining files
+            for task in workers:
+                task.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+# Indexed random access endpoints
+@app.post("/index")
+async def build_sequence_index(request: IndexRequest):
+    """
+    Build (or refresh) the .fai index of a FASTA/FASTQ file.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        index = await loop.run_in_executor(None, open_index, request.file_path)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Indexing failed: {str(e)}")
+    return {"file_path": request.file_path, "index_path": index.index_path, "records": len(index)}
+
+@app.get("/sequence")
+async def get_indexed_sequence(file_path: str, region: Optional[str] = None, id: Optional[str] = None):
+    """
+    Fetch one record by id, or a subsequence by samtools-style region (chrom:start-end).
+    """
+    if not region and not id:
+        raise HTTPException(status_code=400, detail="Either region or id is required")
+    loop = asyncio.get_running_loop()
+    try:
+        index = await loop.run_in_executor(None, open_index, file_path)
+        if id:
+            return await loop.run_in_executor(None, index.get_record, id)
+        return await loop.run_in_executor(None, index.fetch_region, region)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'\""))
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Asynchronous job endpoints
+@app.post("/jobs", status_code=202)
+async def submit_analysis_job(request: AnalysisRequest):
+    """
+    Submit a long-running analysis and return its job id immediately.
+    """
+    ext = get_sequence_extension(request.file_path)
+    if ext not in FASTA_EXTENSIONS + FASTQ_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file extension: {ext}")
+    check_page_options(request.analysis_options())
+    try:
+        return job_manager.submit(request.file_path, request.analysis_type, request.analysis_options())
+    except RuntimeError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+@app.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """Get job status and progress."""
+    status = job_manager.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.delete("/jobs/{job_id}")
+async def cancel_analysis_job(job_id: str):
+    """Cancel a queued or running job."""
+    status = job_manager.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.get("/jobs/{job_id}/result")
+async def get_analysis_job_result(job_id: str):
+    """Fetch the result envelope of a finished job."""
+    result = job_manager.result(job_id)
+    if result is not None:
+        return result
+    status = job_manager.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found or result expired")
+    raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+
+# Observability endpoints
+@app.get("/metrics")
+async def get_metrics():
+    """Service metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/profiles/{analysis_id}")
+async def get_analysis_profile(analysis_id: str):
+    """Download the sampling profile (folded stacks) of an analysis run with options.profile."""
+    path = profile_store.path(analysis_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{analysis_id}.folded")
+
+# Oracle integration endpoints
 @app.get("/oracle/status")
 async def oracle_status():
     """Check oracle service connectivity."""
+    health = await oracle_client.check_oracle_health()
     return {
-        "oracle_service": "connected",
+        "oracle_service": "connected" if health["oracle_service"] == "available" else "unavailable",
         "external_databases": {
             "ncbi": "available",
             "clinvar": "available",
             "ensembl": "available"
         },
-        "last_check": datetime.now().isoformat()
+        "client": oracle_client.metrics(),
+        "local_annotations": variant_verifier.metrics(),
+        "last_check": health["timestamp"]
+    }
+
+async def refresh_annotation_store() -> None:
+    """Open the local annotation store, rebuilding it first when the dump changed."""
+    if annotation_source:
+        # Reuses the open store; rebuilt only when the dump changes
+        variant_verifier.store = await asyncio.to_thread(open_annotation_store, annotation_source)
+
+@app.post("/oracle/variants")
+async def verify_variants(request: VariantVerificationRequest):
+    """Verify many variants (chromosome, position, alt_allele), locally first, then through the oracle service."""
+    try:
+        await refresh_annotation_store()
+    except Exception as e:
+        logger.error("annotation_store_failed", source=annotation_source, error=str(e))
+        raise HTTPException(status_code=503, detail=f"Local annotation store unavailable: {str(e)}")
+    try:
+        results = await variant_verifier.verify_variants(request.variants)
+    except (KeyError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid variant: {str(e)}")
+    return {
+        "results": results,
+        "total": len(results),
+        "verified_count": sum(1 for result in results if result.get("verified")),
+        "timestamp": datetime.now().isoformat()
     }
 
 if __name__ == "__main__":
-    print("[LOG] __main__ block entered.")
-    port = int(os.getenv("PORT", 8000))
-    print(f"[LOG] Starting uvicorn on port {port}...")
-    print(f"[LOG] Python executable: {os.sys.executable}")
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    # Kept for `python src/main.py`; serve.py avoids importing the app in the supervisor process
+    from serve import run_server
+
+    run_server()
\ No newline at end of file
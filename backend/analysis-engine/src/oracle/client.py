@@ -2,18 +2,226 @@
 Oracle client for external genomic data verification
 Integrates with NCBI, ClinVar, and other genomic databases
 """
+import os
+import random
+import time
 import httpx
 import asyncio
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Tuple, Union
 from datetime import datetime
 
+from analyzers.sequence_index import open_index
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+# Maximum variants per POST /variant/batch accepted by the oracle service
+VARIANT_BATCH_SIZE = 20
+
+VariantLike = Union[Dict[str, Any], Tuple[str, int, str]]
+
+
+def parse_variant(variant: VariantLike) -> Tuple[str, int, str]:
+    """
+    Normalize a variant dict or tuple to (chromosome, position, alt_allele).
+
+    Raises:
+        ValueError: If the position is not a positive integer
+    """
+    if isinstance(variant, dict):
+        chromosome, position, alt_allele = variant["chromosome"], variant["position"], variant["alt_allele"]
+    else:
+        chromosome, position, alt_allele = variant
+    position = int(position)
+    if position < 1:
+        raise ValueError(f"Position must be a positive 1-based coordinate, got {position}")
+    return str(chromosome), position, str(alt_allele)
+
+
+def variant_error(chromosome: str, position: int, alt_allele: str, message: str) -> Dict[str, Any]:
+    """Unverified variant result carrying an error message."""
+    return {
+        "error": message,
+        "variant_id": f"{chromosome}:{position}:{alt_allele}",
+        "verified": False
+    }
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class OracleClient:
-    """Client for connecting to oracle services and external genomic databases."""
+    """
+    Client for connecting to oracle services and external genomic databases.
     
-    def __init__(self, oracle_service_url: str = "http://localhost:3002"):
+    One pooled httpx.AsyncClient (keep-alive connections) is shared by every
+    call. Successful responses are kept in a TTL+LRU cache, concurrent lookups
+    of the same key share one request, and upstream calls are bounded by a
+    semaphore and retried with exponential backoff. Pass an httpx transport
+    (e.g. httpx.MockTransport or an ASGI transport) to run against a stub oracle.
+    """
+    
+    def __init__(self, oracle_service_url: str = "http://localhost:3002", reference_path: Optional[str] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_seconds: Optional[float] = None,
+                 max_backoff_seconds: Optional[float] = None, cache_ttl: Optional[float] = None, cache_entries: Optional[int] = None):
         self.oracle_service_url = oracle_service_url
+        # Local indexed reference FASTA used for get_reference_sequence
+        self.reference_path = reference_path or os.getenv("REFERENCE_FASTA")
         self.ncbi_base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
         self.ensembl_base_url = "https://rest.ensembl.org"
+        self.transport = transport
+        self.timeout = timeout if timeout is not None else float(os.getenv("ORACLE_TIMEOUT", 30))
+        self.max_connections = max_connections or int(os.getenv("ORACLE_MAX_CONNECTIONS", 20))
+        self.max_concurrency = max_concurrency or int(os.getenv("ORACLE_MAX_CONCURRENCY", 16))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("ORACLE_MAX_RETRIES", 3))
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else float(os.getenv("ORACLE_BACKOFF", 0.2))
+        # Longest wait before a retry; a larger Retry-After fails the request instead
+        self.max_backoff_seconds = max_backoff_seconds if max_backoff_seconds is not None else float(
+            os.getenv("ORACLE_MAX_BACKOFF", 10)
+        )
+        self.cache = TTLCache(
+            cache_entries or int(os.getenv("ORACLE_CACHE_ENTRIES", 10000)),
+            cache_ttl if cache_ttl is not None else float(os.getenv("ORACLE_CACHE_TTL", 3600))
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self.requests_sent = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared pooled HTTP client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.oracle_service_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "OracleClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, timeout: Optional[float] = None,
+                       json: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        Send one request through the pool, retrying transient failures.
+
+        Retries wait at most max_backoff_seconds; a response asking for a longer
+        Retry-After is returned as is rather than holding the caller.
+        
+        Raises:
+            httpx.HTTPError: If the request still fails after max_retries retries
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.requests_sent += 1
+                    response = await self.client.request(
+                        method, path, json=json, timeout=timeout if timeout is not None else self.timeout
+                    )
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else None
+                if delay is not None and delay > self.max_backoff_seconds:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+            if delay is None:
+                # Exponential backoff with jitter so retries from a batch do not align
+                delay = min(self.backoff_seconds * (2 ** attempt) * (1 + random.random()), self.max_backoff_seconds)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return a cached response, join an identical in-flight lookup, or fetch and cache."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(fetch())
+            self._register(key, pending)
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not cancel the lookup for the others
+        return await asyncio.shield(pending)
+
+    def _register(self, key: str, future: "asyncio.Future[Dict[str, Any]]") -> None:
+        self._inflight[key] = future
+
+        def finished(done: "asyncio.Future[Dict[str, Any]]") -> None:
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            if not done.cancelled() and done.exception() is None and "error" not in done.result():
+                self.cache.put(key, done.result())
+
+        future.add_done_callback(finished)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return request, retry, cache and coalescing counters."""
+        return {
+            "requests_sent": self.requests_sent,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "cache_entries": len(self.cache),
+            "in_flight": len(self._inflight)
+        }
         
     async def verify_gene_annotation(self, gene_symbol: str) -> Dict[str, Any]:
         """
@@ -25,13 +233,9 @@ class OracleClient:
         Returns:
             Dict[str, Any]: Verified gene information
         """
-        try:
-            async with httpx.AsyncClient() as client:
-                # This would call our oracle service
-                response = await client.get(
-                    f"{self.oracle_service_url}/gene/{gene_symbol}",
-                    timeout=30.0
-                )
+        async def fetch() -> Dict[str, Any]:
+            try:
+                response = await self._request("GET", f"/gene/{gene_symbol}")
                 
                 if response.status_code == 200:
                     return response.json()
@@ -42,12 +246,14 @@ class OracleClient:
                         "verified": False
                     }
                     
-        except Exception as e:
-            return {
-                "error": f"Failed to verify gene annotation: {str(e)}",
-                "gene_symbol": gene_symbol,
-                "verified": False
-            }
+            except Exception as e:
+                return {
+                    "error": f"Failed to verify gene annotation: {str(e)}",
+                    "gene_symbol": gene_symbol,
+                    "verified": False
+                }
+        
+        return await self._cached(f"gene:{gene_symbol.upper()}", fetch)
     
     async def verify_variant(self, chromosome: str, position: int, alt_allele: str) -> Dict[str, Any]:
         """
@@ -61,42 +267,115 @@ class OracleClient:
         Returns:
             Dict[str, Any]: Verified variant information
         """
-        try:
-            variant_id = f"{chromosome}:{position}:{alt_allele}"
-            
-            # Placeholder for oracle service call
-            return {
-                "variant_id": variant_id,
-                "chromosome": chromosome,
-                "position": position,
-                "alt_allele": alt_allele,
-                "clinical_significance": "unknown",
-                "population_frequency": None,
-                "verified": True,
-                "timestamp": datetime.now().isoformat(),
-                "note": "Placeholder response - Oracle service integration pending"
-            }
+        async def fetch() -> Dict[str, Any]:
+            try:
+                response = await self._request("GET", f"/variant/{chromosome}/{position}/{alt_allele}")
+                if response.status_code == 200:
+                    return response.json()
+                return variant_error(
+                    chromosome, position, alt_allele, f"Oracle service returned {response.status_code}"
+                )
+            except Exception as e:
+                return variant_error(chromosome, position, alt_allele, f"Failed to verify variant: {str(e)}")
+        
+        return await self._cached(f"variant:{chromosome}:{position}:{alt_allele.upper()}", fetch)
+    
+    async def verify_variants(self, variants: List[VariantLike]) -> List[Dict[str, Any]]:
+        """
+        Verify many variants with batched, concurrency-bounded oracle calls.
+        
+        Cached and in-flight variants are not requested again; the rest are
+        sent VARIANT_BATCH_SIZE at a time to POST /variant/batch and gathered
+        concurrently (bounded by max_concurrency, with retries).
+        
+        Args:
+            variants (List[VariantLike]): Dicts with chromosome/position/alt_allele,
+                or (chromosome, position, alt_allele) tuples
             
+        Returns:
+            List[Dict[str, Any]]: Verification results in input order
+        """
+        loop = asyncio.get_running_loop()
+        fields = [parse_variant(variant) for variant in variants]
+        keys = [f"variant:{c}:{p}:{a.upper()}" for c, p, a in fields]
+        futures: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        missing: List[Tuple[str, Tuple[str, int, str]]] = []
+        for key, variant in zip(keys, fields):
+            if key in futures:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                future = loop.create_future()
+                future.set_result(cached)
+            elif key in self._inflight:
+                self.coalesced += 1
+                future = self._inflight[key]
+            else:
+                future = loop.create_future()
+                self._register(key, future)
+                missing.append((key, variant))
+            futures[key] = future
+        
+        batches = [missing[i:i + VARIANT_BATCH_SIZE] for i in range(0, len(missing), VARIANT_BATCH_SIZE)]
+        # Shielded so a cancelled caller never leaves registered lookups unresolved
+        await asyncio.shield(asyncio.gather(*(self._verify_batch(batch, futures) for batch in batches)))
+        return list(await asyncio.gather(*(asyncio.shield(futures[key]) for key in keys)))
+    
+    async def _verify_batch(self, batch: List[Tuple[str, Tuple[str, int, str]]],
+                            futures: Dict[str, "asyncio.Future[Dict[str, Any]]"]) -> None:
+        """Send one POST /variant/batch and resolve the futures of its variants."""
+        results: List[Dict[str, Any]] = []
+        try:
+            response = await self._request("POST", "/variant/batch", json={"variants": [
+                {"chromosome": c, "position": p, "alt_allele": a} for _, (c, p, a) in batch
+            ]})
+            if response.status_code == 200:
+                results = response.json().get("batch_results", [])
+            else:
+                error = f"Oracle service returned {response.status_code}"
+                results = [variant_error(*variant, error) for _, variant in batch]
         except Exception as e:
-            return {
-                "error": f"Failed to verify variant: {str(e)}",
-                "variant_id": f"{chromosome}:{position}:{alt_allele}",
-                "verified": False
-            }
+            results = [variant_error(*variant, f"Failed to verify variant: {str(e)}") for _, variant in batch]
+        finally:
+            for index, (key, variant) in enumerate(batch):
+                future = futures[key]
+                if future.done():
+                    continue
+                if index < len(results):
+                    future.set_result(results[index])
+                else:
+                    future.set_result(variant_error(*variant, "Missing result in oracle batch response"))
     
     async def get_reference_sequence(self, chromosome: str, start: int, end: int) -> Dict[str, Any]:
         """
         Get reference sequence from oracle-verified sources.
         
+        When a local reference FASTA is configured (reference_path or the
+        REFERENCE_FASTA environment variable) the region is read from its .fai index.
+        
         Args:
             chromosome (str): Chromosome identifier
-            start (int): Start position
-            end (int): End position
+            start (int): Start position (1-based)
+            end (int): End position (inclusive)
             
         Returns:
             Dict[str, Any]: Reference sequence information
         """
         try:
+            if self.reference_path:
+                index = await asyncio.to_thread(open_index, self.reference_path)
+                region = await asyncio.to_thread(index.fetch, chromosome, start, end)
+                return {
+                    "chromosome": chromosome,
+                    "start": start,
+                    "end": end,
+                    "sequence": region,
+                    "source": "local-reference",
+                    "reference": self.reference_path,
+                    "timestamp": datetime.now().isoformat()
+                }
+            
             # Placeholder for oracle service call
             return {
                 "chromosome": chromosome,
@@ -117,21 +396,18 @@ class OracleClient:
     async def check_oracle_health(self) -> Dict[str, Any]:
         """Check if oracle service is available."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.oracle_service_url}/health",
-                    timeout=10.0
-                )
-                
-                return {
-                    "oracle_service": "available" if response.status_code == 200 else "unavailable",
-                    "status_code": response.status_code,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
+            # Health checks are not retried: they should report the current state
+            response = await self.client.get("/health", timeout=10.0)
+            
+            return {
+                "oracle_service": "available" if response.status_code == 200 else "unavailable",
+                "status_code": response.status_code,
+                "timestamp": datetime.now().isoformat()
+            }
+            
         except Exception as e:
             return {
                 "oracle_service": "unavailable",
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
-            }
\ No newline at end of file
+            }
@@ -1 +1,400 @@
-# Verification utilities
\ No newline at end of file
+"""
+Verification utilities
+Local memory-mapped variant annotation store with remote oracle fallback for misses
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+from array import array
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+from oracle.client import OracleClient, VariantLike, parse_variant, variant_error
+from utils.helpers import open_sequence_file
+
+# Positions occupy the low 40 bits of a key, the chromosome code the bits above
+_POSITION_BITS = 40
+_MAX_POSITION = (1 << _POSITION_BITS) - 1
+_STORE_FILES = ["keys.npy", "alts.npy", "offsets.npy", "payloads.jsonl", "meta.json"]
+# Column names accepted for the key fields of a TSV dump
+_TSV_COLUMNS = {
+    "chromosome": ["chromosome", "chrom", "chr", "#chrom"],
+    "position": ["position", "pos", "start"],
+    "alt_allele": ["alt_allele", "alt", "alternate_allele"]
+}
+
+
+def normalize_chromosome(chromosome: str) -> str:
+    """Canonical chromosome name ("chr1" -> "1", "chrM" -> "MT")."""
+    name = str(chromosome).strip()
+    if name.lower().startswith("chr"):
+        name = name[3:]
+    name = name.upper()
+    return "MT" if name == "M" else name
+
+
+def allele_code(allele: str) -> int:
+    """64-bit code of an allele (case-insensitive)."""
+    return int.from_bytes(hashlib.blake2b(allele.upper().encode(), digest_size=8).digest(), "little")
+
+
+def _parse_info(info: str) -> Dict[str, Any]:
+    fields = {}
+    for item in info.split(";"):
+        if not item or item == ".":
+            continue
+        key, _, value = item.partition("=")
+        fields[key] = value if value else True
+    return fields
+
+
+def _frequency(info: Dict[str, Any]) -> Optional[float]:
+    """First population allele frequency found in a ClinVar-style INFO field."""
+    for key in ["AF", "AF_EXAC", "AF_ESP", "AF_TGP"]:
+        if key in info:
+            try:
+                return float(str(info[key]).split(",")[0])
+            except ValueError:
+                continue
+    return None
+
+
+def iter_vcf_records(source_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one annotation per (chromosome, position, alt) of a VCF file (plain or gzip).
+
+    Args:
+        source_path (str): Path to a ClinVar-style VCF
+
+    Yields:
+        Dict[str, Any]: Annotation payload
+    """
+    with open_sequence_file(source_path) as handle:
+        for line in handle:
+            if line.startswith("#") or not line.strip():
+                continue
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) < 5:
+                raise ValueError(f"Malformed VCF line: {line[:80]}")
+            info = _parse_info(fields[7]) if len(fields) > 7 else {}
+            significance = info.get("CLNSIG")
+            for alt in fields[4].split(","):
+                if alt in (".", "*"):
+                    continue
+                yield {
+                    "chromosome": normalize_chromosome(fields[0]),
+                    "position": int(fields[1]),
+                    "id": fields[2] if fields[2] != "." else None,
+                    "ref_allele": fields[3],
+                    "alt_allele": alt,
+                    "clinical_significance": significance.replace("_", " ") if isinstance(significance, str) else None,
+                    "population_frequency": _frequency(info),
+                    "info": info
+                }
+
+
+def iter_tsv_records(source_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield annotations from a tab-separated dump with a header row.
+
+    The chromosome, position and alt allele columns are recognised by name
+    (see _TSV_COLUMNS); every other column is kept in the payload.
+
+    Args:
+        source_path (str): Path to the TSV file (plain or gzip)
+
+    Yields:
+        Dict[str, Any]: Annotation payload
+    """
+    with open_sequence_file(source_path) as handle:
+        header = [name.strip().lower() for name in handle.readline().rstrip("\r\n").split("\t")]
+        columns = {}
+        for field, aliases in _TSV_COLUMNS.items():
+            matches = [header.index(alias) for alias in aliases if alias in header]
+            if not matches:
+                raise ValueError(f"TSV header has no {field} column")
+            columns[field] = matches[0]
+        for line in handle:
+            if not line.strip():
+                continue
+            values = line.rstrip("\r\n").split("\t")
+            record = {name: value for name, value in zip(header, values) if value != ""}
+            for field, column in columns.items():
+                record.pop(header[column], None)
+            record["chromosome"] = normalize_chromosome(values[columns["chromosome"]])
+            record["position"] = int(values[columns["position"]])
+            record["alt_allele"] = values[columns["alt_allele"]]
+            yield record
+
+
+def build_annotation_store(source_path: str, store_dir: Optional[str] = None) -> str:
+    """
+    Build a sorted-array annotation store from a VCF or TSV dump.
+
+    The store holds keys.npy (chromosome code << 40 | position), alts.npy
+    (allele codes), offsets.npy (byte offsets into payloads.jsonl) and
+    meta.json (chromosome names), all sorted by (key, alt) so lookups are
+    binary searches over memory-mapped arrays. Payloads are streamed to disk
+    as they are read, so only the key arrays are held in memory. Records
+    whose position does not fit a key (below 1 or at least 2^40) are skipped
+    and counted in meta.json.
+
+    Args:
+        source_path (str): Path to a .vcf/.vcf.gz or .tsv/.tsv.gz file
+        store_dir (Optional[str]): Output directory (default: source_path + ".store")
+
+    Returns:
+        str: Path of the store directory
+    """
+    store_dir = store_dir or f"{source_path}.store"
+    name = source_path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    records = iter_vcf_records(source_path) if name.endswith(".vcf") else iter_tsv_records(source_path)
+
+    tmp_dir = f"{store_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    unsorted_path = os.path.join(tmp_dir, "unsorted.jsonl")
+    chromosomes: Dict[str, int] = {}
+    keys = array("Q")
+    alts = array("Q")
+    ends = array("q")
+    skipped = 0
+    with open(unsorted_path, "wb") as f:
+        for record in records:
+            if not 1 <= record["position"] <= _MAX_POSITION:
+                skipped += 1
+                continue
+            code = chromosomes.setdefault(record["chromosome"], len(chromosomes))
+            keys.append((code << _POSITION_BITS) | record["position"])
+            alts.append(allele_code(record["alt_allele"]))
+            f.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            ends.append(f.tell())
+
+    key_array = np.frombuffer(keys, dtype=np.uint64)
+    alt_array = np.frombuffer(alts, dtype=np.uint64)
+    unsorted_ends = np.frombuffer(ends, dtype=np.int64)
+    unsorted_starts = np.concatenate(([0], unsorted_ends[:-1])).astype(np.int64)
+    order = np.lexsort((alt_array, key_array))
+    offsets = np.concatenate(([0], np.cumsum(unsorted_ends[order] - unsorted_starts[order])))
+
+    np.save(os.path.join(tmp_dir, "keys.npy"), key_array[order])
+    np.save(os.path.join(tmp_dir, "alts.npy"), alt_array[order])
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    # Copy the payloads into key order; random reads from the page cache instead of a payload list in memory
+    with open(unsorted_path, "rb") as source, open(os.path.join(tmp_dir, "payloads.jsonl"), "wb") as f:
+        if len(order):
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as unsorted:
+                for index in order:
+                    f.write(unsorted[unsorted_starts[index]:unsorted_ends[index]])
+    os.remove(unsorted_path)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump({"source": os.path.abspath(source_path), "count": len(keys), "skipped": skipped,
+                   "chromosomes": list(chromosomes)}, f)
+    # Replace the files one by one; a concurrent reader reopens on the next stale check
+    os.makedirs(store_dir, exist_ok=True)
+    for file_name in _STORE_FILES:
+        os.replace(os.path.join(tmp_dir, file_name), os.path.join(store_dir, file_name))
+    os.rmdir(tmp_dir)
+    return store_dir
+
+
+class AnnotationStore:
+    """Read-only variant annotations looked up by (chromosome, position, alt) over memory-mapped arrays."""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "meta.json")) as f:
+            meta = json.load(f)
+        self.source = meta.get("source")
+        self.chromosomes: Dict[str, int] = {name: code for code, name in enumerate(meta["chromosomes"])}
+        self.keys = np.load(os.path.join(store_dir, "keys.npy"), mmap_mode="r")
+        self.alts = np.load(os.path.join(store_dir, "alts.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(store_dir, "offsets.npy"), mmap_mode="r")
+        self._file = open(os.path.join(store_dir, "payloads.jsonl"), "rb")
+        # mmap cannot map an empty file
+        self._payloads = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if len(self.keys) else b""
+
+    def close(self) -> None:
+        if isinstance(self._payloads, mmap.mmap):
+            self._payloads.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _key(self, chromosome: str, position: int) -> Optional[int]:
+        """Key of a position, or None for unknown chromosomes and positions outside the key range."""
+        code = self.chromosomes.get(normalize_chromosome(chromosome))
+        if code is None or not 0 <= int(position) <= _MAX_POSITION:
+            return None
+        return (code << _POSITION_BITS) | int(position)
+
+    def _payload(self, index: int) -> Dict[str, Any]:
+        return json.loads(self._payloads[int(self.offsets[index]):int(self.offsets[index + 1])])
+
+    def lookup(self, chromosome: str, position: int, alt_allele: str) -> Optional[Dict[str, Any]]:
+        """
+        Point lookup of one variant.
+
+        Args:
+            chromosome (str): Chromosome name (with or without "chr")
+            position (int): 1-based position
+            alt_allele (str): Alternative allele
+
+        Returns:
+            Optional[Dict[str, Any]]: Stored annotation, or None if unknown
+        """
+        return self.lookup_many([(chromosome, position, alt_allele)])[0]
+
+    def lookup_many(self, variants: List[Tuple[str, int, str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up many variants with one vectorized binary search.
+
+        Args:
+            variants (List[Tuple[str, int, str]]): (chromosome, position, alt_allele) tuples
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: Annotation or None for each variant, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(variants)
+        known = [(index, self._key(c, p)) for index, (c, p, _) in enumerate(variants)]
+        known = [(index, key) for index, key in known if key is not None]
+        if not known or len(self.keys) == 0:
+            return results
+        query_keys = np.array([key for _, key in known], dtype=np.uint64)
+        starts = np.searchsorted(self.keys, query_keys, side="left")
+        ends = np.searchsorted(self.keys, query_keys, side="right")
+        for (index, _), start, end in zip(known, starts, ends):
+            if start == end:
+                continue
+            code = allele_code(variants[index][2])
+            # Alts are sorted within one (chromosome, position)
+            hit = start + int(np.searchsorted(self.alts[start:end], np.uint64(code)))
+            if hit < end and int(self.alts[hit]) == code:
+                results[index] = self._payload(hit)
+        return results
+
+    def range(self, chromosome: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """
+        All annotations in a 1-based inclusive region.
+
+        Args:
+            chromosome (str): Chromosome name
+            start (int): First position
+            end (int): Last position
+
+        Returns:
+            List[Dict[str, Any]]: Annotations ordered by position
+        """
+        if end < start or end < 0 or start > _MAX_POSITION:
+            return []
+        first = self._key(chromosome, max(start, 0))
+        if first is None:
+            return []
+        last = self._key(chromosome, min(end, _MAX_POSITION))
+        lo = int(np.searchsorted(self.keys, np.uint64(first), side="left"))
+        hi = int(np.searchsorted(self.keys, np.uint64(last), side="right"))
+        return [self._payload(index) for index in range(lo, hi)]
+
+
+_open_stores: Dict[str, Tuple[float, AnnotationStore]] = {}
+_open_stores_lock = threading.Lock()
+
+
+def open_annotation_store(source_path: str, store_dir: Optional[str] = None) -> AnnotationStore:
+    """
+    Open the store of an annotation dump, (re)building it when missing or older than the dump.
+
+    Args:
+        source_path (str): Path to the VCF/TSV dump
+        store_dir (Optional[str]): Store directory (default: source_path + ".store")
+
+    Returns:
+        AnnotationStore: Store ready for lookups
+    """
+    store_dir = store_dir or f"{source_path}.store"
+    meta_path = os.path.join(store_dir, "meta.json")
+    with _open_stores_lock:
+        if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(source_path):
+            build_annotation_store(source_path, store_dir)
+        mtime = os.path.getmtime(meta_path)
+        cached = _open_stores.get(store_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        store = AnnotationStore(store_dir)
+        # Replaced stores are not closed: another request may still be reading them
+        _open_stores[store_dir] = (mtime, store)
+        return store
+
+
+def _annotation_result(chromosome: str, position: int, alt_allele: str, annotation: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a local annotation like an oracle service variant response."""
+    identifier = annotation.get("id")
+    return {
+        "variant_id": f"{chromosome}:{position}:{alt_allele}",
+        "chromosome": annotation["chromosome"],
+        "position": position,
+        "alt_allele": alt_allele,
+        "verified": True,
+        "clinical_significance": annotation.get("clinical_significance"),
+        "population_frequency": annotation.get("population_frequency"),
+        "dbsnp_id": identifier if isinstance(identifier, str) and identifier.startswith("rs") else None,
+        "annotation": annotation,
+        "source": "local-annotation"
+    }
+
+
+class VariantVerifier:
+    """Verifies variants against the local annotation store, asking the oracle only for misses."""
+
+    def __init__(self, store: Optional[AnnotationStore] = None, client: Optional[OracleClient] = None):
+        self.store = store
+        self.client = client
+        self.local_hits = 0
+        self.remote_lookups = 0
+
+    async def verify_variants(self, variants: List[VariantLike]) -> List[Dict[str, Any]]:
+        """
+        Verify variants locally first, then remotely for whatever the store does not know.
+
+        Args:
+            variants (List[VariantLike]): Dicts with chromosome/position/alt_allele,
+                or (chromosome, position, alt_allele) tuples
+
+        Returns:
+            List[Dict[str, Any]]: Verification results in input order
+        """
+        fields = [parse_variant(variant) for variant in variants]
+        annotations = self.store.lookup_many(fields) if self.store is not None else [None] * len(fields)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(fields)
+        misses = []
+        for index, (variant, annotation) in enumerate(zip(fields, annotations)):
+            if annotation is not None:
+                results[index] = _annotation_result(*variant, annotation)
+            else:
+                misses.append(index)
+        self.local_hits += len(fields) - len(misses)
+
+        if misses and self.client is not None:
+            self.remote_lookups += len(misses)
+            remote = await self.client.verify_variants([fields[index] for index in misses])
+            for index, result in zip(misses, remote):
+                results[index] = result
+        else:
+            for index in misses:
+                chromosome, position, alt_allele = fields[index]
+                results[index] = variant_error(
+                    chromosome, position, alt_allele, "Variant not found in local annotation store"
+                )
+        return results
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "annotations": len(self.store) if self.store is not None else 0,
+            "local_hits": self.local_hits,
+            "remote_lookups": self.remote_lookups
+        }
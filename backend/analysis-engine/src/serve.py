@@ -0,0 +1,98 @@
+"""
+Analysis engine server launcher
+Runs the service under uvicorn: one auto-reloading process in development, several workers without reload in production
+"""
+import argparse
+import os
+from typing import Dict, List, Any, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+
+from utils.log import configure_logging, get_logger
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_MODES = ["development", "production"]
+# Per-process pool sizes that default to the CPU count; with several workers they are split between them
+POOL_SIZE_SETTINGS = ["ANALYSIS_MAX_IN_FLIGHT", "ANALYSIS_WORKERS"]
+
+
+def server_options(mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    uvicorn settings for a launch mode.
+
+    Production runs WEB_CONCURRENCY worker processes (one per CPU by default)
+    without the file-watching reloader. Each worker imports the app and warms
+    up the analyzers on its own; the supervisor only imports uvicorn. Pool
+    sizes are split between the workers (see worker_pool_defaults).
+
+    Args:
+        mode (str): "development" or "production" (SERVER_MODE, default "development")
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for uvicorn.run
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    mode = mode or os.getenv("SERVER_MODE", "development")
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server mode: {mode} (expected one of {', '.join(SERVER_MODES)})")
+    options = {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", 8000)),
+        "app_dir": SRC_DIR,
+        "log_level": os.getenv("LOG_LEVEL", "info").lower()
+    }
+    if mode == "production":
+        options.update(
+            workers=int(os.getenv("WEB_CONCURRENCY", 0)) or os.cpu_count() or 1,
+            reload=False,
+            # Let in-flight requests finish when a worker is stopped
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 30))
+        )
+    else:
+        options.update(reload=True, reload_dirs=[SRC_DIR])
+    return options
+
+
+def worker_pool_defaults(workers: int, cpu_count: Optional[int] = None) -> Dict[str, str]:
+    """
+    Pool sizes for each of several server workers.
+
+    Every worker starts its own analysis pool, so CPU-count defaults in each
+    would oversubscribe the machine workers-fold. Settings already present in
+    the environment are left alone.
+
+    Args:
+        workers (int): Number of server worker processes
+        cpu_count (Optional[int]): CPUs to share (default: os.cpu_count())
+
+    Returns:
+        Dict[str, str]: Environment defaults to apply before the workers start
+    """
+    share = max(1, (cpu_count or os.cpu_count() or 1) // max(1, workers))
+    return {name: str(share) for name in POOL_SIZE_SETTINGS if not os.getenv(name)}
+
+
+def run_server(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the genomic analysis engine")
+    parser.add_argument("--mode", choices=SERVER_MODES, help="Launch mode (default: SERVER_MODE or development)")
+    args = parser.parse_args(argv)
+    load_dotenv()
+    options = server_options(args.mode)
+    # Workers inherit the environment, so each sizes its pools to its share of the CPUs
+    os.environ.update(worker_pool_defaults(options.get("workers", 1)))
+    configure_logging()
+    get_logger().info(
+        "server_starting",
+        mode=args.mode or os.getenv("SERVER_MODE", "development"),
+        port=options["port"],
+        workers=options.get("workers", 1),
+        reload=options["reload"]
+    )
+    uvicorn.run("main:app", **options)
+
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,151 @@
+"""
+Content-addressed result cache
+In-memory LRU tier over a size-bounded on-disk tier, keyed by file content and analysis options
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Options that change how an analysis runs but not what it returns
+EXECUTION_OPTIONS = ["parallel", "workers", "use_cache", "profile"]
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of analysis results."""
+
+    def __init__(self, directory: Optional[str] = None, max_memory_bytes: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv(
+            "CACHE_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-cache")
+        )
+        # Sized by the serialized JSON of each result: one result with per-sequence rows can be huge
+        self.max_memory_bytes = max_memory_bytes if max_memory_bytes is not None else int(
+            os.getenv("CACHE_MEMORY_BYTES", 64 * 1024 ** 2)
+        )
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else int(os.getenv("CACHE_MAX_BYTES", 1024 ** 3))
+        # "sha256" or the faster non-cryptographic "fingerprint" (see calculate_file_hash)
+        self.hash_algorithm = os.getenv("CACHE_HASH_ALGORITHM", "sha256")
+        os.makedirs(self.directory, exist_ok=True)
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self.memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(file_hash: str, analysis_type: str, options: Dict[str, Any], version: str) -> str:
+        """
+        Build a cache key from file content and everything that affects the result.
+
+        Args:
+            file_hash (str): Hash of the file content
+            analysis_type (str): Requested analysis type
+            options (Dict[str, Any]): Analysis options
+            version (str): Analyzer version, so upgrades never serve stale results
+
+        Returns:
+            str: Hex digest identifying the result
+        """
+        relevant = {k: v for k, v in options.items() if k not in EXECUTION_OPTIONS}
+        payload = json.dumps([file_hash, analysis_type, relevant, version], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any], size: int) -> None:
+        if key in self._memory:
+            self.memory_bytes -= self._memory.pop(key)[1]
+        if size > self.max_memory_bytes:
+            # Too big for the memory tier; served from disk only
+            return
+        self._memory[key] = (value, size)
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            self.memory_bytes -= self._memory.popitem(last=False)[1][1]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look a result up in memory, then on disk (promoting disk hits to memory)."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key][0]
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                data = f.read()
+            value = json.loads(data)
+            # Refresh mtime so disk eviction is least-recently-used
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, value, len(data))
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result in both tiers, evicting old disk entries beyond max_disk_bytes."""
+        data = json.dumps(value)
+        with self._lock:
+            self._remember(key, value, len(data))
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self.memory_bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                os.remove(entry.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self.memory_bytes
+            }
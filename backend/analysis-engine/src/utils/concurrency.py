@@ -0,0 +1,164 @@
+"""
+Concurrency utilities for the analysis engine
+Admission control for CPU-heavy analyses running on a dedicated executor and single-flight request coalescing
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """Raised when an analysis cannot be admitted."""
+
+    def __init__(self, status_code: int, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of the analysis executor.
+
+    At most max_in_flight slots are held at once and at most max_queued
+    analyses wait for one. Requests beyond that are rejected immediately with
+    429; requests that wait longer than queue_timeout seconds are rejected
+    with 503. An analysis that fans out over several pool processes holds one
+    slot per process.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queued: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_in_flight = max_in_flight or int(os.getenv("ANALYSIS_MAX_IN_FLIGHT", 0)) or os.cpu_count() or 1
+        if max_queued is None:
+            max_queued = int(os.getenv("ANALYSIS_MAX_QUEUED", self.max_in_flight * 2))
+        self.max_queued = max_queued
+        if queue_timeout is None:
+            queue_timeout = float(os.getenv("ANALYSIS_QUEUE_TIMEOUT", 30))
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        # Multi-slot requests gather their slots one at a time under this lock,
+        # so two of them can never deadlock on partial holdings
+        self._gathering = asyncio.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.timed_out_total = 0
+
+    async def _acquire(self, slots: int) -> None:
+        if slots == 1:
+            await self._slots.acquire()
+            return
+        acquired = 0
+        try:
+            async with self._gathering:
+                for _ in range(slots):
+                    await self._slots.acquire()
+                    acquired += 1
+        except BaseException:
+            for _ in range(acquired):
+                self._slots.release()
+            raise
+
+    @asynccontextmanager
+    async def admit(self, slots: int = 1) -> AsyncIterator[None]:
+        """
+        Hold analysis slots for the duration of the context.
+
+        Args:
+            slots (int): Slots to hold, one per pool process the analysis keeps
+                busy; capped at max_in_flight
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        slots = max(1, min(slots, self.max_in_flight))
+        if self.in_flight + self.queued >= self.max_in_flight + self.max_queued:
+            self.rejected_total += 1
+            raise AdmissionRejected(429, "Analysis queue is full, retry later")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._acquire(slots), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out_total += 1
+            raise AdmissionRejected(503, "Timed out waiting for an analysis slot")
+        finally:
+            self.queued -= 1
+        self.in_flight += slots
+        self.admitted_total += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= slots
+            for _ in range(slots):
+                self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue-depth metrics; cheap enough to call from /health."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "timed_out_total": self.timed_out_total
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation.
+
+    The first caller for a key starts the computation as a task; callers that
+    arrive while it is running wait for the same task and receive its result
+    (or exception). The task is shielded, so a caller that disconnects does not
+    cancel the work the others are waiting for. Keys are forgotten as soon as
+    the computation finishes; finished results are not kept.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+        self.started_total = 0
+        self.coalesced_total = 0
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run compute() once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Identity of the computation
+            compute (Callable[[], Awaitable[Any]]): Starts the computation; only
+                called when no computation for key is in flight
+
+        Returns:
+            Tuple[Any, bool]: Result and whether it was shared with an earlier caller
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced_total += 1
+        else:
+            flight = asyncio.ensure_future(compute())
+            self._flights[key] = flight
+            self.started_total += 1
+            flight.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(flight), shared
+
+    def _finish(self, key: str, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark the exception retrieved when every caller has gone away
+            flight.exception()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "in_flight": len(self._flights),
+            "started_total": self.started_total,
+            "coalesced_total": self.coalesced_total
+        }
@@ -3,10 +3,42 @@ Helper utilities for genomic analysis
 Common functions and data processing utilities
 """
 import os
+import base64
+import gzip
+import json
 import hashlib
-from typing import List, Dict, Any, Optional
+import mmap
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, IO, Callable, Iterable, Iterator, Tuple
 from pathlib import Path
 
+from utils.metrics import span, stage_timings
+
+try:
+    import xxhash
+except ImportError:  # optional, used for fast fingerprints when installed
+    xxhash = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+COMPRESSED_EXTENSIONS = [".gz", ".bgz"]
+FASTA_EXTENSIONS = [".fasta", ".fa", ".fas"]
+FASTQ_EXTENSIONS = [".fastq", ".fq"]
+
+# Hashing reads this much per call; large reads keep per-call overhead negligible
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+HASH_MEMO_ENTRIES = 1024
+_hash_memo: "OrderedDict[Tuple, str]" = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+# Called as progress_callback(bytes_processed, bytes_total) while a file is analyzed
+ProgressCallback = Callable[[int, int], None]
+
+class AnalysisCancelled(Exception):
+    """Raised from a progress callback to abort a running analysis."""
+
 def validate_file_format(file_path: str, supported_formats: List[str]) -> bool:
     """
     Validate if file format is supported.
@@ -21,31 +53,245 @@ def validate_file_format(file_path: str, supported_formats: List[str]) -> bool:
     file_extension = Path(file_path).suffix.lower().lstrip('.')
     return file_extension in [fmt.lower() for fmt in supported_formats]
 
-def calculate_file_hash(file_path: str) -> str:
+def is_gzip_file(file_path: str) -> bool:
     """
-    Calculate SHA-256 hash of a file for integrity verification.
+    Check whether a file is gzip compressed (this includes BGZF/bgzip files).
     
     Args:
         file_path (str): Path to the file
         
     Returns:
-        str: SHA-256 hash of the file
+        bool: True if the file starts with the gzip magic bytes
     """
-    sha256_hash = hashlib.sha256()
-    
     with open(file_path, "rb") as f:
-        # Read file in chunks to handle large files
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(chunk)
+        return f.read(2) == GZIP_MAGIC
+
+def open_sequence_file(file_path: str, mode: str = "rt") -> IO:
+    """
+    Open a sequence file for streaming, transparently decompressing gzip/bgzip input.
+    
+    Args:
+        file_path (str): Path to the file
+        mode (str): "rt" for a text handle, "rb" for a binary handle
+        
+    Returns:
+        IO: Open file handle positioned at the start of the (decompressed) data
+    """
+    if is_gzip_file(file_path):
+        return gzip.open(file_path, mode)
+    return open(file_path, mode)
+
+def get_raw_position(handle: IO) -> int:
+    """
+    Get how many bytes of the on-disk file a handle from open_sequence_file has consumed.
+    
+    Args:
+        handle (IO): Text or binary handle, optionally gzip compressed
+        
+    Returns:
+        int: Byte offset in the underlying (compressed) file
+    """
+    raw = getattr(handle, "buffer", handle)
+    # GzipFile exposes the compressed file object it reads from
+    raw = getattr(raw, "fileobj", None) or raw
+    return raw.tell()
+
+def encode_cursor(offset: int) -> str:
+    """
+    Encode a row offset as an opaque pagination cursor.
+    
+    Args:
+        offset (int): Index of the next row to return
+        
+    Returns:
+        str: URL-safe cursor string
+    """
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_cursor.
     
-    return sha256_hash.hexdigest()
+    Args:
+        cursor (str): Cursor string
+        
+    Returns:
+        int: Row offset
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset = decoded.split(":", 1)
+        if prefix != "offset":
+            raise ValueError(cursor)
+        return int(offset)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
 
-def get_file_info(file_path: str) -> Dict[str, Any]:
+def iter_ndjson(events: Iterable[Dict[str, Any]], batch_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Serialize events as newline-delimited JSON, grouped into chunks of about batch_bytes.
+    
+    Args:
+        events (Iterable[Dict[str, Any]]): Events to serialize, consumed lazily
+        batch_bytes (int): Approximate size of each yielded chunk
+        
+    Yields:
+        bytes: NDJSON chunks
+    """
+    lines = []
+    size = 0
+    # Only the encoding is timed, not producing the events
+    serialization_seconds = 0.0
+    try:
+        for event in events:
+            started = time.perf_counter()
+            line = json.dumps(event, default=str) + "\n"
+            serialization_seconds += time.perf_counter() - started
+            lines.append(line)
+            size += len(line)
+            if size >= batch_bytes:
+                yield "".join(lines).encode()
+                lines = []
+                size = 0
+        if lines:
+            yield "".join(lines).encode()
+    finally:
+        stage_timings.add("serialization", serialization_seconds)
+
+def get_sequence_extension(file_path: str) -> str:
+    """
+    Get the sequence format extension of a file, looking through compression suffixes.
+    
+    Args:
+        file_path (str): Path to the file, e.g. "reads.fastq.gz"
+        
+    Returns:
+        str: Lower-case extension such as ".fastq"
+    """
+    base, ext = os.path.splitext(file_path)
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        ext = os.path.splitext(base)[1]
+    return ext.lower()
+
+class _ChecksumFingerprint:
+    """CRC-32 + Adler-32 + length fingerprint, used when xxhash is not installed."""
+    
+    def __init__(self):
+        self.crc = 0
+        self.adler = 1
+        self.length = 0
+    
+    def update(self, data) -> None:
+        self.crc = zlib.crc32(data, self.crc)
+        self.adler = zlib.adler32(data, self.adler)
+        self.length += len(data)
+    
+    def hexdigest(self) -> str:
+        return f"{self.length:x}-{self.crc:08x}{self.adler:08x}"
+
+def _new_hasher(algorithm: str):
+    if algorithm == "fingerprint":
+        return xxhash.xxh3_128() if xxhash is not None else _ChecksumFingerprint()
+    return hashlib.new(algorithm)
+
+def _hash_prefix(algorithm: str) -> str:
+    # Fingerprints are tagged so keys from different hash functions never collide
+    if algorithm != "fingerprint":
+        return ""
+    return "xxh3:" if xxhash is not None else "crc32:"
+
+def file_identity(file_path: str) -> Optional[str]:
+    """
+    Cheap identity of a file's current version from its metadata (no content read).
+
+    Returns:
+        Optional[str]: Resolved path, size, mtime and inode, or None if the file is missing
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return f"{os.path.realpath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+
+def _hash_memo_key(file_path: str, stat: os.stat_result, algorithm: str) -> Tuple:
+    return (os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino, algorithm)
+
+def memoized_file_hash(file_path: str, algorithm: str = "sha256") -> Optional[str]:
+    """
+    Return the memoized hash of a file's current version without reading it.
+
+    Returns:
+        Optional[str]: Hash from an earlier calculate_file_hash call, or None if the
+        file is missing, changed since, or was never hashed
+    """
+    try:
+        memo_key = _hash_memo_key(file_path, os.stat(file_path), algorithm)
+    except OSError:
+        return None
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+    return None
+
+def calculate_file_hash(file_path: str, algorithm: str = "sha256", use_mmap: bool = False) -> str:
+    """
+    Calculate a hash of a file for integrity verification or cache keys.
+    
+    Results are memoized by (path, size, mtime, inode), so an unchanged file
+    is never hashed twice.
+    
+    Args:
+        file_path (str): Path to the file
+        algorithm (str): Any hashlib algorithm (default SHA-256), or
+            "fingerprint" for a fast non-cryptographic content fingerprint
+        use_mmap (bool): Hash a memory map of the file instead of buffered reads
+        
+    Returns:
+        str: Hex digest of the file (fingerprints carry an algorithm prefix)
+    """
+    stat = os.stat(file_path)
+    memo_key = _hash_memo_key(file_path, stat, algorithm)
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+    
+    hasher = _new_hasher(algorithm)
+    with span("hashing"), open(file_path, "rb") as f:
+        if use_mmap and stat.st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                for start in range(0, len(view), HASH_BUFFER_SIZE):
+                    hasher.update(view[start:start + HASH_BUFFER_SIZE])
+                view.release()
+        else:
+            # Read large chunks into one reusable buffer to handle large files
+            buffer = bytearray(HASH_BUFFER_SIZE)
+            view = memoryview(buffer)
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+    
+    digest = _hash_prefix(algorithm) + hasher.hexdigest()
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > HASH_MEMO_ENTRIES:
+            _hash_memo.popitem(last=False)
+    return digest
+
+def get_file_info(file_path: str, include_hash: bool = True) -> Dict[str, Any]:
     """
     Get basic file information.
     
     Args:
         file_path (str): Path to the file
+        include_hash (bool): Hash the file content (reads the whole file)
         
     Returns:
         Dict[str, Any]: File information including size, hash, etc.
@@ -55,16 +301,21 @@ def get_file_info(file_path: str) -> Dict[str, Any]:
     
     stat = os.stat(file_path)
     
-    return {
+    info = {
         "path": file_path,
         "name": os.path.basename(file_path),
         "size": stat.st_size,
         "size_mb": round(stat.st_size / (1024 * 1024), 2),
         "extension": Path(file_path).suffix.lower(),
-        "hash": calculate_file_hash(file_path),
         "created": stat.st_ctime,
-        "modified": stat.st_mtime
+        "modified": stat.st_mtime,
+        # Stable while a file is appended to; changes when it is replaced
+        "device": stat.st_dev,
+        "inode": stat.st_ino
     }
+    if include_hash:
+        info["hash"] = calculate_file_hash(file_path)
+    return info
 
 def format_analysis_results(results: Dict[str, Any]) -> Dict[str, Any]:
     """
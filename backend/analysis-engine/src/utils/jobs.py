@@ -0,0 +1,364 @@
+"""
+Asynchronous analysis jobs
+Job lifecycle on the service's analysis executor with a local on-disk result store and TTL eviction
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, AsyncContextManager, Awaitable, Callable, Optional, Tuple
+
+from utils.concurrency import AdmissionRejected
+from utils.helpers import AnalysisCancelled, format_analysis_results
+from utils.metrics import stage_timings
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = [COMPLETED, FAILED, CANCELLED]
+# Files kept per job in the result store
+JOB_FILE_KINDS = ["job.json", "result.json", "progress.json", "cancel"]
+
+
+class ResultStore:
+    """Local on-disk store for job results, progress and cancel markers."""
+
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        self.directory = directory or os.getenv(
+            "JOB_STORE_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-jobs")
+        )
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("JOB_RESULT_TTL", 24 * 3600))
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, job_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{kind}")
+
+    def _write_json(self, path: str, data: Dict[str, Any]) -> None:
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_result(self, job_id: str, envelope: Dict[str, Any]) -> None:
+        self._write_json(self._path(job_id, "result.json"), envelope)
+
+    def load_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(self._path(job_id, "result.json"))
+
+    def save_job(self, job_id: str, job: Dict[str, Any]) -> None:
+        self._write_json(self._path(job_id, "job.json"), job)
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(self._path(job_id, "job.json"))
+
+    def save_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        self._write_json(self._path(job_id, "progress.json"), progress)
+
+    def load_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(self._path(job_id, "progress.json"))
+
+    def request_cancel(self, job_id: str) -> None:
+        open(self._path(job_id, "cancel"), "w").close()
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, "cancel"))
+
+    def delete(self, job_id: str) -> None:
+        for kind in JOB_FILE_KINDS:
+            try:
+                os.remove(self._path(job_id, kind))
+            except FileNotFoundError:
+                pass
+
+    def evict_expired(self) -> List[str]:
+        """
+        Remove jobs whose files were all last written more than the TTL ago.
+
+        Jobs without a result (cancelled, or abandoned by a server worker that
+        went away) expire too; running jobs rewrite their progress regularly.
+
+        Returns:
+            List[str]: Ids of the evicted jobs
+        """
+        cutoff = time.time() - self.ttl_seconds
+        last_written: Dict[str, float] = {}
+        for name in os.listdir(self.directory):
+            kind = next((kind for kind in JOB_FILE_KINDS if name.endswith(f".{kind}")), None)
+            if kind is None:
+                continue
+            try:
+                modified = os.path.getmtime(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            job_id = name[:-len(kind) - 1]
+            last_written[job_id] = max(modified, last_written.get(job_id, 0.0))
+        evicted = [job_id for job_id, modified in last_written.items() if modified < cutoff]
+        for job_id in evicted:
+            self.delete(job_id)
+        return evicted
+
+
+class JobProgress:
+    """Progress callback run inside the worker: records progress and honours cancellation."""
+
+    def __init__(self, store: ResultStore, job_id: str, interval: float = 0.5):
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self._last_report = 0.0
+
+    def report(self, bytes_processed: int, bytes_total: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        if self.store.is_cancel_requested(self.job_id):
+            raise AnalysisCancelled(f"Job {self.job_id} was cancelled")
+        self.store.save_progress(self.job_id, {
+            "state": RUNNING,
+            "bytes_processed": bytes_processed,
+            "bytes_total": bytes_total,
+            "progress": round(bytes_processed / bytes_total, 4) if bytes_total else 0.0,
+            "updated_at": datetime.now().isoformat()
+        })
+
+    __call__ = report
+
+
+def save_job_result(store: ResultStore, job_id: str, state: str, file_path: str, analysis_type: str,
+                    options: Dict[str, Any], results: Dict[str, Any], processing_time: float) -> None:
+    """Persist the result envelope and final progress of a finished job."""
+    store.save_result(job_id, format_analysis_results({
+        "analysis_id": job_id,
+        "status": state,
+        "file_info": {"path": file_path, "analysis_type": analysis_type, "options": options},
+        "results": results,
+        "timestamp": datetime.now().isoformat(),
+        "processing_time": round(processing_time, 3)
+    }))
+    store.save_progress(job_id, {"state": state, "progress": 1.0, "updated_at": datetime.now().isoformat()})
+
+
+def run_job(job_id: str, store_directory: str, file_path: str, analysis_type: str,
+            options: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Execute one job in a worker process and persist its result envelope.
+
+    Args:
+        job_id (str): Job identifier, used as the analysis_id
+        store_directory (str): Directory of the ResultStore
+        file_path (str): Path to the FASTA/FASTQ file
+        analysis_type (str): Requested analysis type
+        options (Dict[str, Any]): Analysis options
+
+    Returns:
+        Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]: Final job state,
+        the results of a completed job (for the result cache) and the worker's
+        stage timings
+    """
+    # Imported here so the parent process does not need the analyzers loaded
+    from analyzers.runner import run_analysis
+
+    stage_timings.drain()
+    store = ResultStore(store_directory)
+    progress = JobProgress(store, job_id)
+    started = time.monotonic()
+    if store.is_cancel_requested(job_id):
+        store.save_progress(job_id, {"state": CANCELLED, "updated_at": datetime.now().isoformat()})
+        return CANCELLED, None, stage_timings.drain()
+    progress.report(0, 0, force=True)
+    try:
+        results = run_analysis(file_path, analysis_type, options, progress_callback=progress)
+        state = FAILED if "error" in results else COMPLETED
+    except AnalysisCancelled:
+        store.save_progress(job_id, {"state": CANCELLED, "updated_at": datetime.now().isoformat()})
+        return CANCELLED, None, stage_timings.drain()
+    except Exception as e:
+        results = {"error": f"Analysis failed: {str(e)}"}
+        state = FAILED
+
+    save_job_result(store, job_id, state, file_path, analysis_type, options, results, time.monotonic() - started)
+    return state, results if state == COMPLETED else None, stage_timings.drain()
+
+
+# Runs a job once it holds an admission slot: (job_id, file_path, analysis_type, options) -> final state
+JobExecutor = Callable[[str, str, str, Dict[str, Any]], Awaitable[str]]
+
+
+class JobManager:
+    """
+    Tracks the lifecycle of analysis jobs.
+
+    Jobs do not get a pool of their own: each waits for an admission slot
+    like any other analysis and is then handed to the execute coroutine
+    (result cache lookup, then run_job on the shared analysis executor).
+    Job records are also kept in the result store, so with several server
+    workers any of them can report on or cancel a job.
+    """
+
+    def __init__(self, store: Optional[ResultStore] = None, max_pending: Optional[int] = None,
+                 evict_interval: Optional[float] = None):
+        self.store = store or ResultStore()
+        self.max_pending = max_pending or int(os.getenv("JOB_MAX_PENDING", 100))
+        self.evict_interval = evict_interval or float(os.getenv("JOB_EVICT_INTERVAL", 600))
+        self._admit: Optional[Callable[[], AsyncContextManager]] = None
+        self._execute: Optional[JobExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running: set = set()
+        self._evictor: Optional[asyncio.Task] = None
+
+    def start(self, admit: Callable[[], AsyncContextManager], execute: JobExecutor) -> None:
+        """
+        Start accepting jobs and evicting expired ones in the background.
+
+        Args:
+            admit (Callable[[], AsyncContextManager]): Holds an admission slot while a
+                job runs; raises AdmissionRejected when busy
+            execute (JobExecutor): Runs an admitted job and returns its final state
+        """
+        self._admit = admit
+        self._execute = execute
+        self._evictor = asyncio.ensure_future(self._evict_periodically())
+
+    def pending_count(self) -> int:
+        return sum(1 for task in self._tasks.values() if not task.done())
+
+    def submit(self, file_path: str, analysis_type: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue an analysis and return its job record immediately.
+
+        Raises:
+            RuntimeError: If too many jobs are already pending
+        """
+        if self.pending_count() >= self.max_pending:
+            raise RuntimeError("Too many pending jobs, retry later")
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "file_path": file_path,
+            "analysis_type": analysis_type,
+            "submitted_at": datetime.now().isoformat(),
+            "finished_at": None
+        }
+        self.store.save_job(job_id, self._jobs[job_id])
+        self._tasks[job_id] = asyncio.ensure_future(self._run(job_id, file_path, analysis_type, options))
+        return self.status(job_id)
+
+    async def _run(self, job_id: str, file_path: str, analysis_type: str, options: Dict[str, Any]) -> str:
+        state = CANCELLED
+        try:
+            while True:
+                try:
+                    async with self._admit():
+                        if self.store.is_cancel_requested(job_id):
+                            break
+                        self._running.add(job_id)
+                        state = await self._execute(job_id, file_path, analysis_type, options)
+                        break
+                except AdmissionRejected as e:
+                    # Queue full or timed out: jobs wait for a slot instead of failing
+                    await asyncio.sleep(e.retry_after)
+        except asyncio.CancelledError:
+            state = CANCELLED
+        except Exception as e:
+            state = FAILED
+            save_job_result(self.store, job_id, FAILED, file_path, analysis_type, options,
+                            {"error": f"Analysis failed: {str(e)}"}, 0.0)
+        finally:
+            self._running.discard(job_id)
+        if state == CANCELLED:
+            self.store.save_progress(job_id, {"state": CANCELLED, "updated_at": datetime.now().isoformat()})
+        self._mark_finished(job_id)
+        return state
+
+    def _mark_finished(self, job_id: str) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job["finished_at"] = datetime.now().isoformat()
+            self.store.save_job(job_id, job)
+
+    def _state(self, job_id: str) -> str:
+        progress = self.store.load_progress(job_id) or {}
+        if progress.get("state") in FINISHED_STATES:
+            return progress["state"]
+        if self.store.is_cancel_requested(job_id):
+            return "cancelling"
+        return progress.get("state", QUEUED)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record with its current state and progress, or None if unknown."""
+        job = self._jobs.get(job_id) or self.store.load_job(job_id)
+        if job is None:
+            return None
+        state = self._state(job_id)
+        progress = self.store.load_progress(job_id) or {}
+        return {
+            **job,
+            "status": state,
+            "progress": 1.0 if state == COMPLETED else progress.get("progress", 0.0),
+            "bytes_processed": progress.get("bytes_processed"),
+            "bytes_total": progress.get("bytes_total")
+        }
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued job, or ask a running job to stop at its next progress report.
+
+        A job that has not started is cancelled at once, even when it was
+        submitted through another server worker: the marker keeps that
+        worker from ever starting it.
+        """
+        status = self.status(job_id)
+        if status is None or status["status"] in FINISHED_STATES:
+            return status
+        self.store.request_cancel(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None and job_id not in self._running:
+            task.cancel()
+        if status["status"] == QUEUED:
+            self.store.save_progress(job_id, {"state": CANCELLED, "updated_at": datetime.now().isoformat()})
+        return self.status(job_id)
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result envelope of a finished job."""
+        return self.store.load_result(job_id)
+
+    def evict_expired(self) -> int:
+        """Evict expired jobs from disk and forget the ones tracked here."""
+        evicted = self.store.evict_expired()
+        for job_id in evicted:
+            task = self._tasks.get(job_id)
+            if task is None or task.done():
+                self._jobs.pop(job_id, None)
+                self._tasks.pop(job_id, None)
+        return len(evicted)
+
+    async def _evict_periodically(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.evict_expired)
+            await asyncio.sleep(self.evict_interval)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"tracked": len(self._jobs), "pending": self.pending_count(), "running": len(self._running)}
+
+    def shutdown(self) -> None:
+        for task in [self._evictor, *self._tasks.values()]:
+            if task is not None and not task.done():
+                task.cancel()
+        self._evictor = None
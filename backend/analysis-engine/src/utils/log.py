@@ -0,0 +1,40 @@
+"""
+Structured logging
+structlog configuration shared by the service (JSON lines in production, readable console output locally)
+"""
+import logging
+import os
+import sys
+from typing import Optional
+
+import structlog
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None) -> None:
+    """
+    Configure structlog for the service.
+
+    Args:
+        level (str): Minimum level (LOG_LEVEL, default "info")
+        log_format (str): "json" or "console" (LOG_FORMAT, default "console")
+    """
+    level = (level or os.getenv("LOG_LEVEL", "info")).upper()
+    log_format = log_format or os.getenv("LOG_FORMAT", "console")
+    renderer = structlog.processors.JSONRenderer() if log_format == "json" else structlog.dev.ConsoleRenderer(colors=False)
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.format_exc_info,
+            renderer
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level, logging.INFO)),
+        logger_factory=structlog.PrintLoggerFactory(sys.stdout),
+        cache_logger_on_first_use=True
+    )
+
+
+def get_logger(name: str = "analysis-engine"):
+    """Return a bound structlog logger."""
+    return structlog.get_logger(name)
@@ -0,0 +1,289 @@
+"""
+Service metrics
+Prometheus-style counters, gauges and histograms, per-stage timing spans and HTTP latency middleware
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+
+# Seconds; request and analysis latencies span milliseconds to hours
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800, 7200)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, Any], float]
+# Returns (name, type, help, samples) families rendered at scrape time
+Collector = Callable[[], List[Tuple[str, str, str, List[Sample]]]]
+
+
+def _label_key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally labelled."""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with _bucket, _sum and _count series."""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (last one is +Inf), sum
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of a block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_sum", labels, total[0]))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))
+
+    def register_collector(self, collector: Collector) -> None:
+        """Add a callable producing metric families from live state when scraped."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (0.0.4)."""
+        families = [(metric.name, metric.metric_type, metric.documentation, metric.samples())
+                    for metric in list(self._metrics.values())]
+        for collector in list(self._collectors):
+            families.extend(collector())
+        lines = []
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class StageTimings:
+    """Per-process totals of time spent in each analysis stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float, calls: int = 1) -> None:
+        """Account for calls executions of a stage taking seconds in total."""
+        with self._lock:
+            total = self._totals.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += calls
+
+    def merge(self, timings: Dict[str, Dict[str, float]]) -> None:
+        """Fold in a snapshot taken in another process (see drain)."""
+        for stage, total in timings.items():
+            self.add(stage, total["seconds"], int(total["calls"]))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: {"seconds": seconds, "calls": calls} for stage, (seconds, calls) in self._totals.items()}
+
+    def drain(self) -> Dict[str, Dict[str, float]]:
+        """Return the totals and reset them."""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+        return {stage: {"seconds": seconds, "calls": calls} for stage, (seconds, calls) in totals.items()}
+
+
+# Process-wide stage totals; worker processes drain theirs back to the service
+stage_timings = StageTimings()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a block as one execution of an analysis stage.
+
+    Spans cost about a microsecond, so hot loops should accumulate their own
+    totals and report them once with stage_timings.add instead.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_timings.add(stage, time.perf_counter() - started)
+
+
+def collect_stage_timings() -> List[Tuple[str, str, str, List[Sample]]]:
+    """Scrape-time collector exposing the stage totals of this process."""
+    snapshot = stage_timings.snapshot()
+    return [
+        ("analysis_stage_seconds_total", "counter", "Time spent in each analysis stage",
+         [("analysis_stage_seconds_total", {"stage": stage}, total["seconds"]) for stage, total in snapshot.items()]),
+        ("analysis_stage_calls_total", "counter", "Executions of each analysis stage",
+         [("analysis_stage_calls_total", {"stage": stage}, total["calls"]) for stage, total in snapshot.items()])
+    ]
+
+
+registry = MetricsRegistry()
+registry.register_collector(collect_stage_timings)
+REQUEST_LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency until the response is fully sent")
+ANALYSES = registry.counter("analyses_total", "Finished analyses by type and status")
+ANALYSIS_LATENCY = registry.histogram("analysis_duration_seconds", "Analysis run time by type")
+BYTES_PROCESSED = registry.counter("analysis_bytes_processed_total", "Input bytes of successful analyses")
+RECORDS_PROCESSED = registry.counter("analysis_records_processed_total", "Records of successful analyses")
+COALESCED_REQUESTS = registry.counter(
+    "analysis_requests_coalesced_total", "Analysis requests answered by an identical analysis already in flight"
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency per route template, method and status."""
+
+    def __init__(self, app, histogram: Optional[Histogram] = None):
+        self.app = app
+        self.histogram = histogram or REQUEST_LATENCY
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        state = {"status": 500, "observed": False}
+
+        def observe() -> None:
+            if state["observed"]:
+                return
+            state["observed"] = True
+            # Route templates keep label cardinality bounded (/jobs/{job_id}, not every id)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - started, method=scope["method"], route=route,
+                                   status=state["status"])
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            observe()
@@ -0,0 +1,118 @@
+"""
+Sampling profiler
+Opt-in per-analysis stack sampling with folded-stack output and a small on-disk profile store
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Seconds between stack samples
+DEFAULT_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+# Deepest stack kept per sample (innermost frames win)
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack from a background thread.
+
+    Sampling only reads frames, so the profiled code runs unmodified and the
+    overhead is bounded by the interval rather than the number of calls.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = 0
+        self.started: Optional[float] = None
+        self.elapsed = 0.0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling the given thread (the calling thread by default)."""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """
+        Samples in the folded-stack format ("outer;inner count" per line).
+
+        The output can be fed to flamegraph.pl, speedscope or similar tools.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+class ProfileStore:
+    """On-disk store of folded profiles keyed by analysis id, keeping the most recent ones."""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: Optional[int] = None):
+        self.directory = directory or os.getenv(
+            "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "genomic-analysis-profiles")
+        )
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("PROFILE_MAX_ENTRIES", 100))
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, analysis_id: str) -> str:
+        return os.path.join(self.directory, f"{analysis_id}.folded")
+
+    def save(self, analysis_id: str, folded: str) -> None:
+        path = self._path(analysis_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(folded)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def path(self, analysis_id: str) -> Optional[str]:
+        """Path of a stored profile, or None if unknown (ids are hex only)."""
+        if not analysis_id.isalnum():
+            return None
+        path = self._path(analysis_id)
+        return path if os.path.isfile(path) else None
+
+    def _prune(self) -> None:
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".folded")]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,76 @@
+"""
+Service startup
+Analyzer warm-up and the cold-start time budget checked once per worker process
+"""
+import importlib
+import os
+import time
+from typing import Dict, Optional
+
+from utils.metrics import registry
+
+# Modules the service imports lazily: the runner pulls in every analyzer (BioPython, NumPy)
+WARM_UP_MODULES = ["analyzers.runner"]
+# Seconds from process start until a worker is ready (0 disables the check)
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", 5))
+# Fail worker startup instead of logging a warning when the budget is exceeded
+STARTUP_BUDGET_ENFORCE = os.getenv("STARTUP_BUDGET_ENFORCE", "false").lower() in ["1", "true", "yes"]
+
+STARTUP_SECONDS = registry.gauge("service_startup_seconds", "Worker startup time by phase")
+
+
+def warm_up() -> float:
+    """
+    Import the analyzer modules and their heavy dependencies.
+
+    Runs once in each HTTP worker during startup and as the initializer of
+    analysis pools, so no request pays for the imports.
+
+    Returns:
+        float: Seconds spent importing (close to zero once already imported)
+    """
+    started = time.perf_counter()
+    for module in WARM_UP_MODULES:
+        importlib.import_module(module)
+    return time.perf_counter() - started
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, including interpreter startup (Linux only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime (field 22) is in clock ticks since boot
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+
+
+def check_startup_budget(phases: Dict[str, float], total: float,
+                         budget: Optional[float] = None, enforce: Optional[bool] = None) -> bool:
+    """
+    Record startup timings and compare the total with the startup budget.
+
+    Args:
+        phases (Dict[str, float]): Seconds per startup phase (import, warm_up, ...)
+        total (float): Seconds from process start until ready
+        budget (float): Allowed seconds (STARTUP_BUDGET_SECONDS, 0 disables the check)
+        enforce (bool): Raise instead of returning False (STARTUP_BUDGET_ENFORCE)
+
+    Returns:
+        bool: Whether startup stayed within the budget
+
+    Raises:
+        RuntimeError: If the budget is exceeded and enforced
+    """
+    budget = STARTUP_BUDGET_SECONDS if budget is None else budget
+    enforce = STARTUP_BUDGET_ENFORCE if enforce is None else enforce
+    for phase, seconds in phases.items():
+        STARTUP_SECONDS.set(seconds, phase=phase)
+    STARTUP_SECONDS.set(total, phase="total")
+    within_budget = not budget or total <= budget
+    if not within_budget and enforce:
+        raise RuntimeError(f"Startup took {total:.2f}s, over the {budget:.2f}s budget")
+    return within_budget
@@ -0,0 +1,74 @@
+"""
+Reference results
+The original BioPython implementations of the FASTA/FASTQ analyzers, used as the expected output in tests
+"""
+from typing import Dict, Any
+
+from Bio import SeqIO
+from Bio.SeqUtils import gc_fraction
+
+
+def _composition(sequence) -> Dict[str, int]:
+    composition = {base: sequence.count(base) for base in "ATGCN"}
+    composition["other"] = len(sequence) - sum(composition.values())
+    return composition
+
+
+def baseline_fasta(file_path: str) -> Dict[str, Any]:
+    sequences = list(SeqIO.parse(file_path, "fasta"))
+    rows = []
+    gc_contents = []
+    for record in sequences:
+        rows.append({
+            "id": record.id,
+            "description": record.description,
+            "length": len(record.seq),
+            "gc_content": round(gc_fraction(record.seq) * 100, 2),
+            "composition": _composition(record.seq)
+        })
+        gc_contents.append(gc_fraction(record.seq) * 100)
+    total_length = sum(len(record.seq) for record in sequences)
+    return {
+        "file_type": "FASTA",
+        "sequence_count": len(sequences),
+        "sequences": rows,
+        "statistics": {
+            "total_length": total_length,
+            "average_length": round(total_length / len(sequences), 2),
+            "average_gc_content": round(sum(gc_contents) / len(gc_contents), 2),
+            "longest_sequence": max(len(record.seq) for record in sequences),
+            "shortest_sequence": min(len(record.seq) for record in sequences)
+        }
+    }
+
+
+def baseline_fastq(file_path: str) -> Dict[str, Any]:
+    sequences = list(SeqIO.parse(file_path, "fastq"))
+    rows = []
+    all_qualities = []
+    for record in sequences:
+        qualities = record.letter_annotations.get("phred_quality", [])
+        gc = record.seq.count("G") + record.seq.count("C")
+        rows.append({
+            "id": record.id,
+            "description": record.description,
+            "length": len(record.seq),
+            "average_quality": round(sum(qualities) / len(qualities), 2) if qualities else None,
+            "gc_content": round((gc / len(record.seq)) * 100 if len(record.seq) else 0.0, 2),
+            "composition": _composition(record.seq)
+        })
+        all_qualities.extend(qualities)
+    total_length = sum(len(record.seq) for record in sequences)
+    return {
+        "file_type": "FASTQ",
+        "sequence_count": len(sequences),
+        "sequences": rows,
+        "statistics": {
+            "total_length": total_length,
+            "average_length": round(total_length / len(sequences), 2),
+            "average_quality": round(sum(all_qualities) / len(all_qualities), 2) if all_qualities else None,
+            "average_gc_content": round(sum(row["gc_content"] for row in rows) / len(rows), 2),
+            "longest_sequence": max(len(record.seq) for record in sequences),
+            "shortest_sequence": min(len(record.seq) for record in sequences)
+        }
+    }
@@ -0,0 +1,75 @@
+"""
+Shared pytest fixtures for the analysis engine
+Puts src/ on the import path and writes small random FASTA/FASTQ files
+"""
+import os
+import random
+import sys
+from typing import Callable, List, Tuple
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def random_sequence(rng: random.Random, length: int, alphabet: str = "ACGT") -> str:
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def random_quality(rng: random.Random, length: int) -> str:
+    return "".join(chr(33 + rng.randint(2, 41)) for _ in range(length))
+
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(1234)
+
+
+@pytest.fixture
+def write_fasta(tmp_path) -> Callable[..., str]:
+    """Write (title, sequence) records as a FASTA file wrapped at width columns."""
+
+    def write(records: List[Tuple[str, str]], name: str = "sample.fasta", width: int = 60) -> str:
+        path = tmp_path / name
+        with open(path, "w") as f:
+            for title, sequence in records:
+                f.write(f">{title}\n")
+                for start in range(0, len(sequence), width):
+                    f.write(sequence[start:start + width] + "\n")
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def write_fastq(tmp_path) -> Callable[..., str]:
+    """Write (title, sequence, quality) records as a four-line FASTQ file."""
+
+    def write(records: List[Tuple[str, str, str]], name: str = "sample.fastq") -> str:
+        path = tmp_path / name
+        with open(path, "w") as f:
+            for title, sequence, quality in records:
+                f.write(f"@{title}\n{sequence}\n+\n{quality}\n")
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def fasta_records(rng) -> List[Tuple[str, str]]:
+    """Mixed-case records with IUPAC codes, Ns and an empty sequence."""
+    records = [(f"seq{i} sample record {i}", random_sequence(rng, rng.randint(1, 400), "ACGTACGTNacgtRYSWKM"))
+               for i in range(60)]
+    records.append(("empty", ""))
+    return records
+
+
+@pytest.fixture
+def fastq_records(rng) -> List[Tuple[str, str, str]]:
+    records = []
+    for i in range(200):
+        length = rng.randint(1, 150)
+        records.append((f"read{i}/1 lane=1", random_sequence(rng, length, "ACGTN"), random_quality(rng, length)))
+    return records
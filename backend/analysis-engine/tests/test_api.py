@@ -0,0 +1,273 @@
+"""
+HTTP endpoint tests
+Exercise the service through FastAPI's TestClient with the real analysis executor
+"""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    state = tmp_path_factory.mktemp("service")
+    os.environ.update(
+        CACHE_DIR=str(state / "cache"),
+        JOB_STORE_DIR=str(state / "jobs"),
+        STREAM_SPOOL_DIR=str(state),
+        PROFILE_DIR=str(state / "profiles")
+    )
+    import main
+
+    with TestClient(main.app) as client:
+        yield main, client
+
+
+@pytest.fixture
+def client(service):
+    return service[1]
+
+
+@pytest.fixture
+def main_module(service):
+    return service[0]
+
+
+def wait_until(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_identical_concurrent_requests_are_coalesced(client, main_module, monkeypatch, write_fasta, fasta_records):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = write_fasta(fasta_records, name="coalesced.fasta")
+    calls = []
+
+    async def slow_analysis(file_path, analysis_type, options, analysis_id):
+        calls.append(options.get("use_cache", True))
+        await asyncio.sleep(0.5)
+        return {"sequence_count": len(fasta_records)}, False
+
+    monkeypatch.setattr(main_module, "analyze_or_reuse", slow_analysis)
+    body = {"file_path": path, "analysis_type": "basic"}
+    fresh = {**body, "options": {"use_cache": False}}
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        responses = list(pool.map(lambda request: client.post("/analyze", json=request).json(),
+                                  [body, body, body, fresh, fresh]))
+
+    # One computation per cache mode; use_cache=false callers never share a cached leader
+    assert sorted(calls) == [False, True]
+    assert sorted(response["coalesced"] for response in responses[:3]) == [False, True, True]
+    assert sorted(response["coalesced"] for response in responses[3:]) == [False, True]
+    assert all(response["analysis"] == {"sequence_count": len(fasta_records)} for response in responses)
+    assert len({response["analysis_id"] for response in responses}) == 5
+
+
+def test_profiled_requests_are_not_coalesced(main_module, write_fasta, fasta_records):
+    path = write_fasta(fasta_records, name="keyed.fasta")
+    key = main_module.single_flight_key(path, "basic", {})
+    assert key == main_module.single_flight_key(path, "basic", {"parallel": True})
+    assert key != main_module.single_flight_key(path, "basic", {"use_cache": False})
+    assert key != main_module.single_flight_key(path, "gc_content", {})
+    assert main_module.single_flight_key(path, "basic", {"profile": True}) is None
+    with open(path, "a") as f:
+        f.write(">appended\nACGT\n")
+    assert main_module.single_flight_key(path, "basic", {}) != key
+
+
+def test_stream_matches_analyze(client, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    body = {"file_path": path, "analysis_type": "basic", "options": {"use_cache": False}}
+    events = [json.loads(line) for line in client.post("/analyze/stream", json=body).iter_lines() if line]
+    analysis = client.post("/analyze", json=body).json()["analysis"]
+
+    assert [event.pop("type") for event in events] == ["sequence"] * len(fastq_records) + ["summary"]
+    summary = events.pop()
+    assert events == analysis["sequences"]
+    assert summary["statistics"] == analysis["statistics"]
+
+
+def test_stream_error_event(client, tmp_path):
+    path = tmp_path / "missing.fasta"
+    events = [json.loads(line) for line in client.post(
+        "/analyze/stream", json={"file_path": str(path), "analysis_type": "basic"}
+    ).iter_lines() if line]
+    assert [event["type"] for event in events] == ["error"]
+
+
+def test_stream_releases_slot_without_reading_body(client, main_module, write_fasta, fasta_records):
+    path = write_fasta(fasta_records)
+    with client.stream("POST", "/analyze/stream", json={"file_path": path, "analysis_type": "basic"}) as response:
+        assert response.status_code == 200
+    assert wait_until(lambda: main_module.admission.in_flight == 0)
+    spool_dir = os.environ["STREAM_SPOOL_DIR"]
+    assert wait_until(lambda: not [name for name in os.listdir(spool_dir) if name.startswith("stream-")])
+
+
+def test_stream_cancelled_when_client_leaves_before_body(client, main_module, monkeypatch, write_fasta,
+                                                         fasta_records):
+    finals = []
+    monkeypatch.setattr(main_module, "record_analysis", lambda *args: finals.append(args[3]))
+    path = write_fasta(fasta_records * 200, name="disconnect.fasta")
+    body = json.dumps({"file_path": path, "analysis_type": "basic", "options": {"use_cache": False}}).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        # The client is gone before the response headers go out, so the body never starts
+        if message["type"] == "http.response.start":
+            await asyncio.sleep(3600)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/analyze/stream", "raw_path": b"/analyze/stream", "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("testclient", 50000), "server": ("testserver", 80)
+    }
+    client.portal.call(main_module.app, scope, receive, send)
+
+    assert wait_until(lambda: finals)
+    assert finals[0]["type"] == "error"
+    assert wait_until(lambda: main_module.admission.in_flight == 0)
+    spool_dir = os.environ["STREAM_SPOOL_DIR"]
+    assert wait_until(lambda: not [name for name in os.listdir(spool_dir) if name.startswith("stream-")])
+
+
+def test_job_runs_on_analysis_pool_and_reuses_cache(client, main_module, write_fasta, fasta_records):
+    path = write_fasta(fasta_records)
+    body = {"file_path": path, "analysis_type": "basic"}
+
+    def finished_job():
+        job = client.post("/jobs", json=body).json()
+        assert wait_until(lambda: client.get(f"/jobs/{job['job_id']}").json()["status"] == "completed")
+        return client.get(f"/jobs/{job['job_id']}/result").json()
+
+    first = finished_job()
+    hits = main_module.result_cache.stats()
+    second = finished_job()
+    after = main_module.result_cache.stats()
+
+    assert first["results"] == second["results"]
+    assert first["results"]["statistics"] == client.post("/analyze", json=body).json()["analysis"]["statistics"]
+    assert after["memory_hits"] + after["disk_hits"] > hits["memory_hits"] + hits["disk_hits"]
+    assert main_module.admission.in_flight == 0
+
+
+def test_analyze_reuses_cached_result(client, main_module, write_fasta, fasta_records):
+    from utils.helpers import memoized_file_hash
+
+    path = write_fasta(fasta_records, name="cached.fasta")
+    body = {"file_path": path, "analysis_type": "gc_content"}
+    algorithm = main_module.result_cache.hash_algorithm
+    assert memoized_file_hash(path, algorithm) is None
+
+    first = client.post("/analyze", json=body).json()
+    assert memoized_file_hash(path, algorithm) is not None
+    second = client.post("/analyze", json=body).json()
+    fresh = client.post("/analyze", json={**body, "options": {"use_cache": False}}).json()
+
+    assert (first["cached"], second["cached"], fresh["cached"]) == (False, True, False)
+    assert second["analysis"] == first["analysis"]
+    assert fresh["analysis"]["statistics"] == first["analysis"]["statistics"]
+
+
+@pytest.mark.parametrize("options", [{"offset": -1}, {"limit": -10}, {"cursor": "not-a-cursor"}])
+@pytest.mark.parametrize("endpoint", ["/analyze", "/analyze/stream", "/jobs"])
+def test_invalid_page_options_are_rejected(client, endpoint, options, write_fasta, fasta_records):
+    path = write_fasta(fasta_records)
+    response = client.post(endpoint, json={"file_path": path, "analysis_type": "basic", "options": options})
+    assert response.status_code == 422
+
+
+def test_invalid_variant_position_is_rejected(client):
+    response = client.post("/oracle/variants", json={"variants": [
+        {"chromosome": "1", "position": -5, "alt_allele": "T"}
+    ]})
+    assert response.status_code == 400
+
+
+def test_batch_leaves_slots_for_interactive_requests(client, main_module, write_fasta, write_fastq,
+                                                     fasta_records, fastq_records):
+    paths = [write_fasta(fasta_records, name=f"batch{index}.fasta") for index in range(3)]
+    paths.append(write_fastq(fastq_records, name="batch.fastq"))
+    lines = client.post("/analyze/batch", json={"file_paths": paths, "analysis_type": "basic"}).iter_lines()
+    events = [json.loads(line) for line in lines if line]
+
+    assert main_module.BATCH_MAX_WORKERS <= max(1, main_module.admission.max_in_flight // 2)
+    assert sorted(event["file_path"] for event in events if event["type"] == "file") == sorted(paths)
+    assert all(event["status"] == "success" for event in events if event["type"] == "file")
+    assert events[-1]["type"] == "summary"
+    assert main_module.admission.in_flight == 0
+
+
+def test_batch_reports_failing_files_without_aborting(client, tmp_path, write_fastq, fastq_records):
+    good = [write_fastq(fastq_records[:count], name=f"lane{count}.fastq") for count in (50, 150)]
+    broken = tmp_path / "lane0.fastq"
+    broken.write_text("@broken\nACGT\n-\nIIII\n")
+    missing = str(tmp_path / "missing.fastq")
+
+    response = client.post("/analyze/batch", json={
+        "file_paths": [missing], "pattern": str(tmp_path / "lane*.fastq"), "analysis_type": "basic"
+    })
+    events = [json.loads(line) for line in response.iter_lines() if line]
+    files = {event["file_path"]: event for event in events if event["type"] == "file"}
+
+    assert sorted(files) == sorted(good + [str(broken), missing])
+    assert [files[path]["status"] for path in good] == ["success", "success"]
+    assert files[str(broken)]["status"] == files[missing]["status"] == "error"
+    assert "error" in files[str(broken)]["analysis"]
+    summary = events[-1]
+    assert summary["type"] == "summary"
+    assert (summary["files_total"], summary["succeeded"], summary["failed"]) == (4, 2, 2)
+    assert sorted(failure["file_path"] for failure in summary["failures"]) == sorted([str(broken), missing])
+    assert summary["statistics"]["sequence_count"] == 200
+
+
+def test_parallel_analysis_holds_a_slot_per_worker(client, main_module, monkeypatch, write_fasta, fasta_records):
+    monkeypatch.setattr(main_module.admission, "max_in_flight", 4)
+    assert main_module.analysis_slots("basic", {}) == 1
+    assert main_module.analysis_slots("basic", {"parallel": True, "workers": 3}) == 3
+    assert main_module.analysis_slots("basic", {"parallel": True, "workers": 16}) == 4
+    assert main_module.analysis_slots("basic", {"parallel": True, "workers": 3, "profile": True}) == 1
+    assert main_module.analysis_slots("kmer", {"parallel": True, "workers": 3}) == 1
+    monkeypatch.undo()
+
+    # A parallel request never keeps more chunks in flight than the slots it reserved
+    path = write_fasta(fasta_records * 20, name="parallel.fasta")
+    body = {"file_path": path, "analysis_type": "basic",
+            "options": {"parallel": True, "workers": 4, "use_cache": False, "summary_only": True}}
+    analysis = client.post("/analyze", json=body).json()["analysis"]
+    assert "error" not in analysis
+    slots = main_module.analysis_slots("basic", body["options"])
+    assert analysis.get("execution", {}).get("workers", 1) <= slots
+    assert main_module.admission.in_flight == 0
+
+
+def test_annotation_store_failures_return_503(client, main_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(main_module.variant_verifier, "store", None)
+    variant = {"chromosome": "1", "position": 100, "alt_allele": "G"}
+
+    monkeypatch.setattr(main_module, "annotation_source", str(tmp_path / "missing.vcf"))
+    response = client.post("/oracle/variants", json={"variants": [variant]})
+    assert response.status_code == 503
+
+    source = tmp_path / "clinvar.vcf"
+    source.write_text("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n1\t100\trs1\tA\tG\t.\t.\tCLNSIG=Pathogenic\n")
+    monkeypatch.setattr(main_module, "annotation_source", str(source))
+    response = client.post("/oracle/variants", json={"variants": [variant]})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["source"] == "local-annotation"
+    # Bad input is still a client error once the store is open
+    response = client.post("/oracle/variants", json={"variants": [{**variant, "position": 0}]})
+    assert response.status_code == 400
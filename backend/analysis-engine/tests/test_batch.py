@@ -0,0 +1,69 @@
+"""
+Batch analysis tests
+Input expansion, largest-first ordering and the weighted run summary
+"""
+import os
+
+from analyzers.batch import BatchSummary, expand_batch_paths, order_largest_first
+
+
+def test_expand_explicit_paths_and_glob(tmp_path):
+    for name in ["run/a.fastq", "run/b.fastq", "run/lane2/c.fastq", "run/notes.txt"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("@r\nA\n+\nI\n")
+    (tmp_path / "run" / "dir.fastq").mkdir()
+    explicit = str(tmp_path / "run" / "b.fastq")
+
+    assert expand_batch_paths([explicit], str(tmp_path / "run" / "*.fastq")) == [
+        explicit, str(tmp_path / "run" / "a.fastq")
+    ]
+    assert expand_batch_paths([], str(tmp_path / "run" / "**" / "*.fastq")) == [
+        str(tmp_path / "run" / name) for name in ["a.fastq", "b.fastq", os.path.join("lane2", "c.fastq")]
+    ]
+    assert expand_batch_paths(["missing.fastq"], str(tmp_path / "none" / "*.fastq")) == ["missing.fastq"]
+
+
+def test_order_largest_first(tmp_path):
+    sizes = {"small.fasta": 10, "large.fasta": 300, "medium.fasta": 50}
+    for name, size in sizes.items():
+        (tmp_path / name).write_text("A" * size)
+    paths = [str(tmp_path / name) for name in sizes] + [str(tmp_path / "missing.fasta")]
+
+    assert order_largest_first(paths) == [
+        (str(tmp_path / "large.fasta"), 300),
+        (str(tmp_path / "medium.fasta"), 50),
+        (str(tmp_path / "small.fasta"), 10),
+        (str(tmp_path / "missing.fasta"), -1)
+    ]
+
+
+def test_summary_weights_statistics():
+    summary = BatchSummary()
+    summary.add("a.fastq", 1000, {"sequence_count": 10, "statistics": {
+        "total_length": 1000, "longest_sequence": 150, "shortest_sequence": 50,
+        "average_gc_content": 40.0, "average_quality": 30.0, "q30_fraction": 0.5
+    }})
+    summary.add("b.fastq", 4000, {"sequence_count": 30, "statistics": {
+        "total_length": 3000, "longest_sequence": 120, "shortest_sequence": 80,
+        "average_gc_content": 60.0, "average_quality": 20.0, "q30_fraction": 0.1
+    }}, cached=True)
+    summary.add("c.fastq", 500, {"error": "Invalid FASTQ format"})
+    summary.add("empty.fasta", 0, {"sequence_count": 0, "statistics": {"total_length": 0}})
+
+    result = summary.to_dict()
+    assert result["files_total"] == 4
+    assert (result["succeeded"], result["failed"], result["cached"]) == (3, 1, 1)
+    assert result["total_bytes"] == 5000
+    assert result["failures"] == [{"file_path": "c.fastq", "error": "Invalid FASTQ format"}]
+    assert result["statistics"] == {
+        "sequence_count": 40,
+        "total_length": 4000,
+        "average_length": 100.0,
+        "longest_sequence": 150,
+        "shortest_sequence": 50,
+        # GC content weighted by reads, quality by bases
+        "average_gc_content": 55.0,
+        "average_quality": 22.5,
+        "q30_fraction": 0.2
+    }
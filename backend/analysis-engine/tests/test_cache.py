@@ -0,0 +1,34 @@
+"""
+Result cache tests
+Memory tier sizing and disk fallback of the two-tier result cache
+"""
+import json
+
+from utils.cache import ResultCache
+
+
+def result_of_size(size: int):
+    return {"sequences": "A" * size}
+
+
+def test_memory_tier_is_capped_by_size(tmp_path):
+    cache = ResultCache(str(tmp_path), max_memory_bytes=1000)
+    for index in range(5):
+        cache.put(f"key{index}", result_of_size(300))
+
+    stats = cache.stats()
+    assert stats["memory_bytes"] <= 1000
+    assert stats["memory_entries"] == 3
+    assert cache.get("key0") == result_of_size(300)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_oversized_result_is_served_from_disk(tmp_path):
+    cache = ResultCache(str(tmp_path), max_memory_bytes=100)
+    cache.put("small", {"value": 1})
+    cache.put("large", result_of_size(500))
+
+    assert cache.stats()["memory_entries"] == 1
+    assert cache.get("large") == result_of_size(500)
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_bytes"] == len(json.dumps({"value": 1}))
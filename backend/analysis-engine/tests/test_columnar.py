@@ -0,0 +1,67 @@
+"""
+Columnar output tests
+Parquet / Arrow IPC files must round-trip the per-sequence rows of a normal run
+"""
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from analyzers.columnar import columnar_path, is_current, read_columnar
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.runner import export_analysis
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_round_trip(output_format, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    expected = FastqAnalyzer().analyze_file(path)
+
+    results = export_analysis(path, "basic", {"output_format": output_format})
+    sequences_file = results.pop("sequences_file")
+    assert sequences_file["rows"] == len(fastq_records)
+    assert sequences_file["path"] == columnar_path(path, output_format, "basic", {"output_format": output_format})
+    assert results["statistics"] == expected["statistics"]
+    assert read_columnar(sequences_file["path"]).to_pylist() == expected["sequences"]
+
+    pruned = read_columnar(sequences_file["path"], ["id", "length"])
+    assert pruned.column_names == ["id", "length"]
+    assert pruned.to_pylist() == [{"id": row["id"], "length": row["length"]} for row in expected["sequences"]]
+
+
+def test_paths_differ_per_analysis(tmp_path):
+    path = str(tmp_path / "reads.fastq")
+    basic = columnar_path(path, "parquet")
+    assert basic == columnar_path(path, "parquet", "basic", {"parallel": True, "use_cache": False})
+    assert len({
+        basic,
+        columnar_path(path, "arrow"),
+        columnar_path(path, "parquet", "gc_content"),
+        columnar_path(path, "parquet", "mutation_detection", {"reference_path": "ref.fasta"}),
+        columnar_path(path, "parquet", "basic", {"mate_file_path": "reads_2.fastq"}),
+        columnar_path(path, "parquet", "basic", {"mate_file_path": "reads_2.fastq", "min_overlap": 20})
+    }) == 6
+    with pytest.raises(ValueError):
+        columnar_path(path, "csv")
+
+
+def test_rewritten_file_is_not_current(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    sequences_file = export_analysis(path, "basic", {"output_format": "arrow"})["sequences_file"]
+    assert is_current(sequences_file)
+
+    export_analysis(path, "basic", {"output_format": "arrow"})
+    assert not is_current(sequences_file)
+    os.remove(sequences_file["path"])
+    assert not is_current(sequences_file)
+
+
+def test_failed_analysis_leaves_no_file(tmp_path, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    with open(path, "a") as f:
+        f.write("@broken\nACGT\n-\nIIII\n")
+
+    results = export_analysis(path, "basic", {"output_format": "parquet"})
+    assert "error" in results
+    assert sorted(os.listdir(tmp_path)) == ["sample.fastq"]
@@ -0,0 +1,55 @@
+"""
+Composition engine tests
+Vectorized counts and GC content against Bio.Seq / Bio.SeqUtils and the original analyzers
+"""
+import pytest
+from Bio.Seq import Seq
+from Bio.SeqUtils import gc_fraction as bio_gc_fraction
+
+from analyzers.composition import (
+    base_counts, batch_base_counts, batch_gc_percent, batch_nucleotide_composition,
+    gc_fraction, gc_percent, nucleotide_composition
+)
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from baseline import baseline_fasta, baseline_fastq
+from conftest import random_sequence
+
+
+@pytest.mark.parametrize("sequence", ["", "ACGT", "acgtNNNN", "GCGCSSWW", "RYKMBDHVN", "ACGU", "-.*ACG"])
+def test_single_sequence_matches_biopython(sequence):
+    counts = base_counts(sequence)
+    assert nucleotide_composition(counts) == {
+        **{base: Seq(sequence).count(base) for base in "ATGCN"},
+        "other": len(sequence) - sum(Seq(sequence).count(base) for base in "ATGCN")
+    }
+    assert gc_fraction(counts) == bio_gc_fraction(Seq(sequence))
+    strict = Seq(sequence).count("G") + Seq(sequence).count("C")
+    assert gc_percent(counts) == ((strict / len(sequence)) * 100 if sequence else 0.0)
+
+
+def test_batch_matches_single(rng):
+    sequences = [random_sequence(rng, rng.randint(0, 300), "ACGTNacgtRY") for _ in range(50)]
+    counts = batch_base_counts([sequence.encode() for sequence in sequences])
+    assert batch_nucleotide_composition(counts) == [nucleotide_composition(base_counts(s)) for s in sequences]
+    assert batch_gc_percent(counts) == [gc_percent(base_counts(s)) for s in sequences]
+    assert (batch_base_counts(sequences) == counts).all()
+
+
+def test_fasta_analyzer_matches_baseline(write_fasta, fasta_records):
+    path = write_fasta(fasta_records)
+    expected = baseline_fasta(path)
+    results = FastaAnalyzer().analyze_file(path)
+    assert results["sequences"] == expected["sequences"]
+    assert results["sequence_count"] == expected["sequence_count"]
+    for key, value in expected["statistics"].items():
+        assert results["statistics"][key] == value
+
+
+def test_fastq_analyzer_matches_baseline(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    expected = baseline_fastq(path)
+    results = FastqAnalyzer().analyze_file(path)
+    assert results["sequences"] == expected["sequences"]
+    for key, value in expected["statistics"].items():
+        assert results["statistics"][key] == value
@@ -0,0 +1,124 @@
+"""
+Concurrency primitive tests
+Request coalescing and admission control
+"""
+import asyncio
+
+import pytest
+
+from utils.concurrency import AdmissionController, AdmissionRejected, SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.run("key", compute) for _ in range(5)))
+        other = await flights.run("other", compute)
+        return flights, results, other
+
+    flights, results, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(result == {"value": 42} for result, _ in results)
+    assert other == ({"value": 42}, False)
+    assert flights.metrics() == {"in_flight": 0, "started_total": 2, "coalesced_total": 4}
+
+
+def test_errors_are_shared_and_keys_forgotten():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flights = SingleFlight()
+        outcomes = await asyncio.gather(*(flights.run("key", fail) for _ in range(3)), return_exceptions=True)
+        return flights, outcomes
+
+    flights, outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert flights.metrics()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        flights = SingleFlight()
+        leader = asyncio.ensure_future(flights.run("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_admission_rejects_when_queue_is_full():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queued=0)
+        async with admission.admit():
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with admission.admit():
+                    pass
+        return rejected.value, admission.in_flight
+
+    rejected, in_flight = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert in_flight == 0
+
+
+def test_multi_slot_admission_holds_every_slot():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=4, max_queued=4, queue_timeout=0.2)
+        order = []
+
+        async def single(name):
+            async with admission.admit():
+                order.append(name)
+                await asyncio.sleep(0.05)
+
+        async with admission.admit(3):
+            held = admission.in_flight
+            await single("fits")
+            # Only one slot is left, so a second three-slot request times out
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with admission.admit(3):
+                    pass
+            after_timeout = admission.in_flight
+        async with admission.admit(10):
+            capped = admission.in_flight
+        return held, order, rejected.value.status_code, after_timeout, capped, admission.in_flight
+
+    held, order, status_code, after_timeout, capped, in_flight = asyncio.run(scenario())
+    assert held == 3
+    assert order == ["fits"]
+    assert status_code == 503
+    assert after_timeout == 3
+    assert capped == 4
+    assert in_flight == 0
+
+
+def test_multi_slot_requests_do_not_deadlock():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=3, max_queued=4, queue_timeout=5)
+        finished = []
+
+        async def run(name, slots):
+            async with admission.admit(slots):
+                await asyncio.sleep(0.02)
+                finished.append(name)
+
+        await asyncio.gather(run("a", 2), run("b", 2), run("c", 3), run("d", 1))
+        return sorted(finished), admission.in_flight
+
+    assert asyncio.run(scenario()) == (["a", "b", "c", "d"], 0)
@@ -0,0 +1,91 @@
+"""
+File hashing tests
+Buffered and memory-mapped digests, the metadata memo and the fingerprint fallback
+"""
+import hashlib
+import os
+
+import pytest
+
+from utils import helpers
+from utils.helpers import calculate_file_hash, memoized_file_hash
+
+
+@pytest.fixture
+def data_file(tmp_path, rng):
+    path = tmp_path / "reads.fastq"
+    path.write_bytes(bytes(rng.getrandbits(8) for _ in range(10_000)))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def small_buffers(monkeypatch):
+    # Several buffers per file so chunk boundaries are exercised
+    monkeypatch.setattr(helpers, "HASH_BUFFER_SIZE", 1024)
+    monkeypatch.setattr(helpers, "_hash_memo", type(helpers._hash_memo)())
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "md5"])
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_digest_matches_hashlib(algorithm, use_mmap, data_file, tmp_path):
+    with open(data_file, "rb") as f:
+        expected = hashlib.new(algorithm, f.read()).hexdigest()
+    assert calculate_file_hash(data_file, algorithm, use_mmap=use_mmap) == expected
+
+    empty = tmp_path / "empty.fastq"
+    empty.write_bytes(b"")
+    assert calculate_file_hash(str(empty), algorithm, use_mmap=use_mmap) == hashlib.new(algorithm).hexdigest()
+
+
+def test_memo_is_keyed_by_file_metadata(data_file, tmp_path):
+    assert memoized_file_hash(data_file) is None
+    original = calculate_file_hash(data_file)
+    assert memoized_file_hash(data_file) == original
+    stat = os.stat(data_file)
+
+    def rewrite(path, content, mtime_ns):
+        with open(path, "r+b") as f:
+            f.write(content)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    # Same size, mtime and inode: served from the memo without reading the file
+    rewrite(data_file, b"X" * 10, stat.st_mtime_ns)
+    assert calculate_file_hash(data_file) == original
+
+    rewrite(data_file, b"X" * 10, stat.st_mtime_ns + 1_000_000)
+    assert memoized_file_hash(data_file) is None
+    changed = calculate_file_hash(data_file)
+    assert changed != original
+
+    with open(data_file, "ab") as f:
+        f.write(b"\n")
+    os.utime(data_file, ns=(stat.st_mtime_ns + 1_000_000,) * 2)
+    assert memoized_file_hash(data_file) is None
+
+    # A replacement file with identical size and mtime still has a new inode
+    with open(data_file, "rb") as f:
+        content = f.read()
+    replacement = tmp_path / "replacement"
+    replacement.write_bytes(content[::-1])
+    os.utime(replacement, ns=(stat.st_mtime_ns + 1_000_000,) * 2)
+    calculate_file_hash(data_file)
+    os.replace(replacement, data_file)
+    assert memoized_file_hash(data_file) is None
+    assert calculate_file_hash(data_file) == hashlib.sha256(content[::-1]).hexdigest()
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_checksum_fingerprint_fallback(use_mmap, monkeypatch, data_file, tmp_path):
+    monkeypatch.setattr(helpers, "xxhash", None)
+    with open(data_file, "rb") as f:
+        content = f.read()
+    copy = tmp_path / "copy.fastq"
+    copy.write_bytes(content)
+    other = tmp_path / "other.fastq"
+    other.write_bytes(content[:-1] + bytes([content[-1] ^ 1]))
+
+    fingerprint = calculate_file_hash(data_file, "fingerprint", use_mmap=use_mmap)
+    assert fingerprint.startswith("crc32:")
+    assert calculate_file_hash(str(copy), "fingerprint", use_mmap=not use_mmap) == fingerprint
+    assert calculate_file_hash(str(other), "fingerprint", use_mmap=use_mmap) != fingerprint
+    assert fingerprint != calculate_file_hash(data_file, "sha256")
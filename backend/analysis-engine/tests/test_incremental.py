@@ -0,0 +1,108 @@
+"""
+Incremental analysis tests
+Resumed runs over growing, interrupted and rewritten files must match a full run
+"""
+import pytest
+
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.incremental import CheckpointStore, IncrementalAnalyzer
+from utils.helpers import AnalysisCancelled
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    return IncrementalAnalyzer(CheckpointStore(str(tmp_path / "checkpoints")), checkpoint_bytes=4096)
+
+
+def _full(path):
+    analyzer = FastaAnalyzer() if path.endswith(".fasta") else FastqAnalyzer()
+    return analyzer.analyze_file(path, include_sequences=False)
+
+
+def _append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def _fastq_text(records):
+    return "".join(f"@{title}\n{sequence}\n+\n{quality}\n" for title, sequence, quality in records)
+
+
+@pytest.mark.parametrize("fixture", ["fasta", "fastq"])
+def test_appends_match_full_run(fixture, analyzer, write_fasta, write_fastq, fasta_records, fastq_records):
+    if fixture == "fasta":
+        records = [record for record in fasta_records if record[1]]
+        path = write_fasta(records[:30])
+        appended = "".join(f">{title}\n{sequence}\n" for title, sequence in records[30:])
+    else:
+        records = fastq_records
+        path = write_fastq(records[:120])
+        appended = _fastq_text(records[120:])
+
+    first = analyzer.analyze_file(path)
+    assert first.pop("incremental")["resumed_from"] == 0
+    assert first == _full(path)
+
+    _append(path, appended)
+    second = analyzer.analyze_file(path)
+    incremental = second.pop("incremental")
+    assert incremental["resumed_from"] > 0
+    assert incremental["bytes_processed"] < incremental["file_size"]
+    assert second == _full(path)
+    assert second["sequence_count"] == len(records)
+
+
+def test_interrupted_run_resumes_from_checkpoint(analyzer, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    calls = []
+
+    def interrupt(done, total):
+        calls.append(done)
+        if len(calls) == 3:
+            raise AnalysisCancelled()
+
+    with pytest.raises(AnalysisCancelled):
+        analyzer.analyze_file(path, progress_callback=interrupt)
+
+    results = analyzer.analyze_file(path)
+    assert results.pop("incremental")["resumed_from"] == calls[-1]
+    assert results == _full(path)
+
+
+@pytest.mark.parametrize("change", ["rewrite", "truncate"])
+def test_stale_checkpoint_is_ignored(change, analyzer, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    analyzer.analyze_file(path)
+
+    if change == "rewrite":
+        # Same inode and size, different content
+        records = [(title, sequence[::-1], quality) for title, sequence, quality in fastq_records]
+        with open(path, "r+") as f:
+            f.write(_fastq_text(records))
+    else:
+        with open(path, "w") as f:
+            f.write(_fastq_text(fastq_records[:20]))
+
+    results = analyzer.analyze_file(path)
+    assert results.pop("incremental")["resumed_from"] == 0
+    assert results == _full(path)
+
+
+def test_partial_trailing_record_is_pending(analyzer, write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    expected = _full(path)
+    analyzer.analyze_file(path)
+
+    for fragment in ["@r99\nACGT\n", "+\nII"]:
+        _append(path, fragment)
+        results = analyzer.analyze_file(path)
+        assert "error" not in results
+        assert results.pop("incremental")["pending_bytes"] > 0
+        assert results == expected
+
+    _append(path, "II\n")
+    results = analyzer.analyze_file(path)
+    assert results.pop("incremental")["pending_bytes"] == 0
+    assert results == _full(path)
+    assert results["sequence_count"] == len(fastq_records) + 1
@@ -0,0 +1,81 @@
+"""
+Job lifecycle tests
+Cancellation across server workers and TTL eviction in the on-disk result store
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from utils.jobs import CANCELLED, COMPLETED, JobManager, ResultStore
+
+
+@asynccontextmanager
+async def free_slot():
+    yield
+
+
+def test_queued_job_cancelled_from_another_worker(tmp_path):
+    executed = []
+
+    async def execute(job_id, file_path, analysis_type, options):
+        executed.append(job_id)
+        return COMPLETED
+
+    async def scenario():
+        submitter = JobManager(ResultStore(str(tmp_path)))
+        other_worker = JobManager(ResultStore(str(tmp_path)))
+
+        @asynccontextmanager
+        async def blocked_slot():
+            # The job stays queued until the other worker has cancelled it
+            while not other_worker.store.is_cancel_requested(job["job_id"]):
+                await asyncio.sleep(0.01)
+            yield
+
+        submitter.start(blocked_slot, execute)
+        job = submitter.submit("reads.fastq", "basic", {})
+        assert other_worker.status(job["job_id"])["status"] == "queued"
+        assert other_worker.cancel(job["job_id"])["status"] == CANCELLED
+        assert await submitter._tasks[job["job_id"]] == CANCELLED
+        submitter.shutdown()
+        return job["job_id"]
+
+    job_id = asyncio.run(scenario())
+    assert executed == []
+    assert JobManager(ResultStore(str(tmp_path))).status(job_id)["status"] == CANCELLED
+
+
+def test_completed_job(tmp_path):
+    async def execute(job_id, file_path, analysis_type, options):
+        manager.store.save_progress(job_id, {"state": COMPLETED})
+        return COMPLETED
+
+    async def scenario():
+        manager.start(free_slot, execute)
+        job = manager.submit("reads.fastq", "basic", {})
+        await manager._tasks[job["job_id"]]
+        manager.shutdown()
+        return manager.status(job["job_id"])
+
+    manager = JobManager(ResultStore(str(tmp_path)))
+    status = asyncio.run(scenario())
+    assert status["status"] == COMPLETED
+    assert status["finished_at"] is not None
+
+
+def test_eviction_covers_jobs_without_result(tmp_path):
+    store = ResultStore(str(tmp_path), ttl_seconds=60)
+    store.save_job("abandoned", {"job_id": "abandoned"})
+    store.save_progress("abandoned", {"state": "running"})
+    store.save_job("cancelled", {"job_id": "cancelled"})
+    store.request_cancel("cancelled")
+    store.save_job("fresh", {"job_id": "fresh"})
+    store.save_result("fresh", {"status": COMPLETED})
+    expired = time.time() - 120
+    for name in os.listdir(tmp_path):
+        if not name.startswith("fresh."):
+            os.utime(tmp_path / name, (expired, expired))
+
+    assert sorted(store.evict_expired()) == ["abandoned", "cancelled"]
+    assert sorted(os.listdir(tmp_path)) == ["fresh.job.json", "fresh.result.json"]
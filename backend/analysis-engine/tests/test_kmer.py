@@ -0,0 +1,32 @@
+"""
+K-mer counting tests
+Exact counts against a brute-force count, and 64-bit counters
+"""
+from collections import Counter
+
+import numpy as np
+
+from analyzers.kmer import KmerAnalyzer
+
+
+def test_exact_counts_match_brute_force(write_fasta, fasta_records):
+    path = write_fasta(fasta_records)
+    results = KmerAnalyzer(k=5, top_n=10).analyze_file(path)
+    expected = Counter(
+        kmer for _, sequence in fasta_records for kmer in
+        (sequence.upper()[i:i + 5] for i in range(len(sequence) - 4)) if set(kmer) <= set("ACGT")
+    )
+    assert results["mode"] == "exact"
+    assert results["total_kmers"] == sum(expected.values())
+    assert results["distinct_kmers"] == len(expected)
+    assert [entry["count"] for entry in results["top_kmers"]] == [count for _, count in expected.most_common(10)]
+    assert all(expected[entry["kmer"]] == entry["count"] for entry in results["top_kmers"])
+
+
+def test_counters_do_not_wrap_at_32_bits():
+    from analyzers.kmer import _ExactCounter
+
+    counter = _ExactCounter(KmerAnalyzer(k=2))
+    counter.counts[3] = np.iinfo(np.uint32).max
+    counter.add(np.array([3, 3], dtype=np.uint64))
+    assert int(counter.counts[3]) == np.iinfo(np.uint32).max + 2
@@ -0,0 +1,29 @@
+"""
+Stage timing tests
+The parse stage is counted per record for every input format
+"""
+import pytest
+
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from utils.metrics import stage_timings
+
+
+@pytest.mark.parametrize("fixture", ["fasta", "fastq"])
+def test_parse_stage_counts_records(fixture, write_fasta, write_fastq, fasta_records, fastq_records):
+    if fixture == "fasta":
+        path, records, analyzer = write_fasta(fasta_records), fasta_records, FastaAnalyzer()
+    else:
+        path, records, analyzer = write_fastq(fastq_records), fastq_records, FastqAnalyzer()
+    stage_timings.drain()
+    results = analyzer.analyze_file(path)
+    assert results["sequence_count"] == len(records)
+    assert stage_timings.drain()["parse"]["calls"] == len(records)
+
+
+def test_paired_parse_stage_counts_both_mates(write_fastq, fastq_records):
+    read1 = write_fastq(fastq_records, name="r1.fastq")
+    read2 = write_fastq(fastq_records[:-3], name="r2.fastq")
+    stage_timings.drain()
+    FastqAnalyzer().analyze_pair(read1, read2)
+    assert stage_timings.drain()["parse"]["calls"] == 2 * len(fastq_records) - 3
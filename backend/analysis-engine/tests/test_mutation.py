@@ -0,0 +1,86 @@
+"""
+Mutation detection tests
+Batched detection must match per-record detection, and unalignable or unmatched records must not fail the file
+"""
+import os
+import random
+
+import pytest
+
+import analyzers.sequence_index as sequence_index
+from analyzers.mutation_detector import NO_REFERENCE, UNALIGNABLE, MutationAnalyzer, MutationDetector
+
+
+def mutate(reference: str, rng: random.Random) -> str:
+    bases = list(reference)
+    for _ in range(rng.randint(0, 6)):
+        position = rng.randrange(len(bases))
+        kind = rng.choice(["substitution", "insertion", "deletion"])
+        if kind == "substitution":
+            bases[position] = rng.choice([base for base in "ACGT" if base != bases[position]])
+        elif kind == "insertion":
+            bases.insert(position, "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 4))))
+        else:
+            del bases[position:position + rng.randint(1, 4)]
+    return "".join(bases)
+
+
+@pytest.fixture
+def reference():
+    rng = random.Random(11)
+    return "".join(rng.choice("ACGT") for _ in range(600))
+
+
+def test_detect_many_matches_detect(reference):
+    rng = random.Random(5)
+    queries = [mutate(reference, rng) for _ in range(40)]
+    detector = MutationDetector(reference)
+    assert detector.detect_many(queries) == [detector.detect(query) for query in queries]
+
+
+def test_detected_substitutions_and_indels(reference):
+    detector = MutationDetector(reference)
+    query = reference[:100] + ("A" if reference[100] != "A" else "C") + reference[101:300] + "GGT" + reference[300:]
+    mutations = detector.detect(query)
+    assert {"position": 101, "reference": reference[100], "variant": query[100], "type": "substitution"} in mutations
+    assert any(mutation["type"] == "insertion" and mutation["length"] == 3 for mutation in mutations)
+
+
+def test_unalignable_record_is_reported(tmp_path, reference, write_fasta):
+    rng = random.Random(3)
+    reference_path = write_fasta([("ref", reference)], name="reference.fasta")
+    divergent = "".join(rng.choice("ACGT") for _ in range(len(reference)))
+    path = write_fasta([("a", mutate(reference, rng)), ("b", divergent), ("c", mutate(reference, rng))])
+
+    # Small enough that only the unanchored random record needs too many cells
+    results = MutationAnalyzer(reference_path, max_dp_cells=20_000).analyze_file(path)
+
+    assert "error" not in results
+    assert results["sequence_count"] == 3
+    assert results["statistics"]["unaligned_sequences"] == 1
+    rows = {row["id"]: row for row in results["sequences"]}
+    assert rows["b"]["error"] == UNALIGNABLE
+    assert "error" not in rows["a"] and "error" not in rows["c"]
+
+    detector = MutationDetector(reference, max_dp_cells=20_000)
+    with pytest.raises(ValueError):
+        detector.detect_many([divergent])
+
+
+def test_record_without_reference_is_reported(tmp_path, monkeypatch, reference, write_fasta):
+    rng = random.Random(7)
+    monkeypatch.setattr(sequence_index, "INDEX_CACHE_DIR", str(tmp_path / "indexes"))
+    other = "".join(rng.choice("ACGT") for _ in range(300))
+    reference_path = write_fasta([("chr1", reference), ("chr2", other)], name="reference.fasta")
+    path = write_fasta([("chr1", mutate(reference, rng)), ("chrX", reference), ("chr2", mutate(other, rng))])
+
+    results = MutationAnalyzer(reference_path).analyze_file(path)
+
+    assert "error" not in results
+    assert results["statistics"]["unaligned_sequences"] == 1
+    rows = {row["id"]: row for row in results["sequences"]}
+    assert rows["chrX"] == {"id": "chrX", "reference_id": None, "length": len(reference), "error": NO_REFERENCE}
+    assert rows["chr1"]["reference_id"] == "chr1" and rows["chr2"]["reference_id"] == "chr2"
+    # The reference index is kept in the cache directory, not next to the user's file
+    assert not os.path.exists(f"{reference_path}.fai")
+    assert os.listdir(tmp_path / "indexes") == [os.path.basename(sequence_index.cached_index_path(reference_path))]
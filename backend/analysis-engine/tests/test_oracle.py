@@ -0,0 +1,125 @@
+"""
+Oracle client tests
+Retry, caching, coalescing and batching behaviour of the pooled client against a stub oracle
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from oracle.client import OracleClient
+
+
+def stub_client(responses, **options):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    client = OracleClient(transport=httpx.MockTransport(handler), **{"backoff_seconds": 0.01, **options})
+    return client, calls
+
+
+def test_retries_honour_short_retry_after():
+    client, calls = stub_client([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"gene_symbol": "BRCA1", "verified": True})
+    ])
+    result = asyncio.run(client.verify_gene_annotation("BRCA1"))
+    assert result["verified"] is True
+    assert len(calls) == 2
+
+
+def test_long_retry_after_fails_fast():
+    client, calls = stub_client([httpx.Response(503, headers={"Retry-After": "3600"})], max_backoff_seconds=1)
+    started = time.monotonic()
+    result = asyncio.run(client.verify_gene_annotation("BRCA1"))
+    assert time.monotonic() - started < 1
+    assert result["error"] == "Oracle service returned 503"
+    assert len(calls) == 1
+
+
+def test_backoff_is_capped():
+    client, calls = stub_client([httpx.Response(502)], max_retries=3, backoff_seconds=60, max_backoff_seconds=0.01)
+    started = time.monotonic()
+    result = asyncio.run(client.verify_gene_annotation("BRCA1"))
+    assert time.monotonic() - started < 1
+    assert result["verified"] is False
+    assert len(calls) == 4
+
+
+def variant_handler(calls, delay=0.0):
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(delay)
+        if request.url.path == "/variant/batch":
+            variants = json.loads(request.content)["variants"]
+            return httpx.Response(200, json={"batch_results": [
+                {"variant_id": f"{v['chromosome']}:{v['position']}:{v['alt_allele']}", "verified": True}
+                for v in variants
+            ]})
+        _, _, chromosome, position, alt_allele = request.url.path.split("/")
+        return httpx.Response(200, json={"variant_id": f"{chromosome}:{position}:{alt_allele}", "verified": True})
+
+    return handler
+
+
+def test_cached_lookups_expire():
+    calls = []
+    client = OracleClient(transport=httpx.MockTransport(variant_handler(calls)), cache_ttl=0.2)
+
+    async def lookups():
+        first = await client.verify_variant("chr1", 100, "A")
+        second = await client.verify_variant("chr1", 100, "a")
+        await asyncio.sleep(0.25)
+        third = await client.verify_variant("chr1", 100, "A")
+        return first, second, third
+
+    first, second, third = asyncio.run(lookups())
+    assert first == second == third
+    assert len(calls) == 2
+    assert client.metrics()["cache_hits"] == 1
+
+
+def test_errors_are_not_cached():
+    client, calls = stub_client([httpx.Response(404), httpx.Response(200, json={"verified": True})])
+
+    async def lookups():
+        return [await client.verify_gene_annotation("BRCA1") for _ in range(3)]
+
+    results = asyncio.run(lookups())
+    assert [result["verified"] for result in results] == [False, True, True]
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_lookups_share_one_request():
+    calls = []
+    client = OracleClient(transport=httpx.MockTransport(variant_handler(calls, delay=0.05)))
+
+    async def lookups():
+        return await asyncio.gather(*(client.verify_variant("chr2", 5, "T") for _ in range(10)))
+
+    results = asyncio.run(lookups())
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert client.metrics()["coalesced"] == 9
+    assert client.metrics()["in_flight"] == 0
+
+
+def test_variant_batches_are_chunked():
+    calls = []
+    client = OracleClient(transport=httpx.MockTransport(variant_handler(calls)))
+    variants = [("chr1", position, "G") for position in range(1, 46)]
+
+    async def verify():
+        await client.verify_variant("chr1", 1, "G")
+        # Duplicates and the cached variant are not sent again
+        return await client.verify_variants(variants + variants[:5])
+
+    results = asyncio.run(verify())
+    batch_sizes = [len(json.loads(call.content)["variants"]) for call in calls if call.url.path == "/variant/batch"]
+    assert batch_sizes == [20, 20, 4]
+    positions = list(range(1, 46)) + list(range(1, 6))
+    assert [result["variant_id"] for result in results] == [f"chr1:{position}:G" for position in positions]
@@ -0,0 +1,22 @@
+"""
+Pagination tests
+Row windows selected by offset and limit
+"""
+import pytest
+
+from analyzers.pagination import SequencePage
+
+
+def test_window_and_metadata():
+    page = SequencePage(offset=2, limit=3)
+    for index in range(10):
+        page.add({"index": index})
+    assert [row["index"] for row in page.rows] == [2, 3, 4]
+    assert page.pagination()["total"] == 10
+    assert page.pagination()["next_cursor"] is not None
+
+
+@pytest.mark.parametrize("offset, limit", [(-1, None), (0, -5)])
+def test_negative_window_is_rejected(offset, limit):
+    with pytest.raises(ValueError):
+        SequencePage(offset, limit)
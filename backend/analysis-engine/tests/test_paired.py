@@ -0,0 +1,107 @@
+"""
+Paired-end analysis tests
+Lockstep R1/R2 streaming: leftover reads, mate id checks, insert sizes and streamed rows
+"""
+import pytest
+
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.mutation_detector import MutationAnalyzer
+from analyzers.pairing import overlap_insert_size, reverse_complement
+from analyzers.runner import stream_analysis
+from conftest import random_quality, random_sequence
+
+
+def make_pairs(rng, count, fragment_lengths, read_length=60):
+    """Mates sequenced from both ends of random fragments, so each pair's insert size is its fragment length."""
+    pairs = []
+    for index in range(count):
+        fragment = random_sequence(rng, rng.choice(fragment_lengths))
+        read1 = fragment[:read_length]
+        read2 = reverse_complement(fragment[-read_length:])
+        pairs.append((f"pair{index}", read1, read2))
+    return pairs
+
+
+@pytest.fixture
+def write_pair(write_fastq, rng):
+    def write(pairs, mate_titles=None):
+        mate_titles = mate_titles or [f"{title}/2" for title, _, _ in pairs]
+        read1 = [(f"{title}/1", sequence, random_quality(rng, len(sequence))) for title, sequence, _ in pairs]
+        read2 = [(mate_title, sequence, random_quality(rng, len(sequence)))
+                 for mate_title, (_, _, sequence) in zip(mate_titles, pairs)]
+        return write_fastq(read1, name="reads_1.fastq"), write_fastq(read2, name="reads_2.fastq")
+
+    return write
+
+
+def test_insert_sizes(rng, write_pair):
+    pairs = make_pairs(rng, 40, [80, 100, 110])
+    path1, path2 = write_pair(pairs)
+
+    results = FastqAnalyzer().analyze_pair(path1, path2)
+
+    insert_size = results["statistics"]["insert_size"]
+    assert insert_size["overlapping_pairs"] == 40
+    assert {insert_size["min"], insert_size["max"]} <= {80, 100, 110}
+    sizes = [overlap_insert_size(read1, read2) for _, read1, read2 in pairs]
+    assert insert_size["mean"] == round(sum(sizes) / len(sizes), 2)
+    assert [row["insert_size"] for row in results["sequences"]] == sizes
+    assert sum(insert_size["histogram"]) == 40
+    # Fragments longer than both reads leave no overlap
+    _, read1, read2 = make_pairs(rng, 1, [200])[0]
+    assert overlap_insert_size(read1, read2) is None
+
+
+def test_unequal_files_count_leftover_reads_as_unpaired(rng, write_pair):
+    pairs = make_pairs(rng, 12, [100])
+    path1, path2 = write_pair(pairs)
+    with open(path2) as f:
+        lines = f.readlines()
+    with open(path2, "w") as f:
+        f.writelines(lines[:9 * 4])
+
+    results = FastqAnalyzer().analyze_pair(path1, path2)
+    assert results["sequence_count"] == 9
+    assert results["statistics"]["unpaired_reads"] == {"read1": 3, "read2": 0}
+    assert results["read1"]["sequence_count"] == results["read2"]["sequence_count"] == 9
+
+    swapped = FastqAnalyzer().analyze_pair(path2, path1)
+    assert swapped["statistics"]["unpaired_reads"] == {"read1": 0, "read2": 3}
+
+
+def test_mismatched_mate_ids(rng, write_pair):
+    pairs = make_pairs(rng, 10, [100])
+    mate_titles = [f"{title}/2" if index % 3 else f"other{index}/2" for index, (title, _, _) in enumerate(pairs)]
+    path1, path2 = write_pair(pairs, mate_titles)
+
+    results = FastqAnalyzer().analyze_pair(path1, path2)
+    statistics = results["statistics"]
+    assert statistics["id_mismatches"] == statistics["discordant_pairs"]["id_mismatch"] == 4
+    assert [row["ids_match"] for row in results["sequences"]] == [bool(index % 3) for index in range(10)]
+    assert all(row["id"] == f"pair{index}" for index, row in enumerate(results["sequences"]))
+
+
+def test_stream_matches_paired_analysis(rng, write_pair):
+    path1, path2 = write_pair(make_pairs(rng, 30, [90, 120]))
+    expected = FastqAnalyzer().analyze_pair(path1, path2)
+
+    events = list(stream_analysis(path1, "basic", {"mate_file_path": path2}))
+    assert [event.pop("type") for event in events] == ["sequence"] * 30 + ["summary"]
+    summary = events.pop()
+    assert events == expected.pop("sequences")
+    assert summary == expected
+
+
+def test_stream_matches_mutation_analysis(rng, write_fasta):
+    reference = random_sequence(rng, 300)
+    reference_path = write_fasta([("ref", reference)], name="reference.fasta")
+    path = write_fasta([(f"read{index}", reference[index:index + 200]) for index in range(0, 60, 3)])
+    expected = MutationAnalyzer(reference_path).analyze_file(path, offset=5, limit=4)
+    expected.pop("pagination")
+
+    events = list(stream_analysis(path, "mutation_detection",
+                                  {"reference_path": reference_path, "offset": 5, "limit": 4}))
+    assert [event.pop("type") for event in events] == ["sequence"] * 4 + ["summary"]
+    summary = events.pop()
+    assert events == expected.pop("sequences")
+    assert summary == expected
@@ -0,0 +1,70 @@
+"""
+Parallel analysis tests
+Chunked runs must match the serial analyzers, including pages of per-sequence rows
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from analyzers.fasta_analyzer import FastaAnalyzer
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.parallel import ParallelAnalyzer, has_four_line_layout, split_file
+
+
+def _serial(path, **kwargs):
+    analyzer = FastaAnalyzer() if path.endswith(".fasta") else FastqAnalyzer()
+    return analyzer.analyze_file(path, **kwargs)
+
+
+@pytest.mark.parametrize("fixture", ["fasta", "fastq"])
+@pytest.mark.parametrize("page", [{}, {"offset": 0, "limit": 10}, {"offset": 37, "limit": 25},
+                                  {"offset": 195, "limit": 50}, {"include_sequences": False}])
+def test_parallel_matches_serial(fixture, page, write_fasta, write_fastq, fasta_records, fastq_records):
+    path = write_fasta(fasta_records * 4) if fixture == "fasta" else write_fastq(fastq_records)
+    expected = _serial(path, **page)
+    results = ParallelAnalyzer(workers=2, chunk_size=2048).analyze_file(path, **page)
+    execution = results.pop("execution")
+    assert results == expected
+    assert execution["chunks"] > 2
+    assert execution["workers"] == 2
+
+
+def test_reported_workers_capped_by_chunks(write_fastq, fastq_records):
+    path = write_fastq(fastq_records[:40])
+    results = ParallelAnalyzer(workers=8, chunk_size=2048).analyze_file(path)
+    assert results["execution"]["workers"] == results["execution"]["chunks"] < 8
+
+
+def test_shared_executor(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = ParallelAnalyzer(workers=2, chunk_size=2048, executor=executor).analyze_file(path, limit=5)
+        small = ParallelAnalyzer(workers=2, chunk_size=1 << 30, executor=executor).analyze_file(path, limit=5)
+    assert results.pop("execution")["mode"] == "parallel"
+    assert results == small == _serial(path, limit=5)
+
+
+def test_wrapped_fastq_is_not_split(tmp_path, fastq_records):
+    path = tmp_path / "wrapped.fastq"
+    with open(path, "w") as f:
+        for title, sequence, quality in fastq_records:
+            f.write(f"@{title}\n{sequence[:20]}\n{sequence[20:]}\n+\n{quality[:20]}\n{quality[20:]}\n")
+    assert not has_four_line_layout(str(path))
+    results = ParallelAnalyzer(workers=2, chunk_size=2048).analyze_file(str(path))
+    assert "execution" not in results
+    assert results == _serial(str(path))
+
+
+def test_boundaries_skip_quality_lines_starting_with_at(tmp_path):
+    path = tmp_path / "at.fastq"
+    with open(path, "w") as f:
+        for i in range(300):
+            f.write(f"@r{i}\nACGTACGT\n+\n@@@@+@@@\n")
+    chunks = split_file(str(path), "fastq", 256)
+    assert len(chunks) > 2
+    with open(path, "rb") as f:
+        for start, _ in chunks:
+            f.seek(start)
+            assert f.read(2) == b"@r"
+    results = ParallelAnalyzer(workers=2, chunk_size=256).analyze_file(str(path))
+    assert results["sequence_count"] == 300
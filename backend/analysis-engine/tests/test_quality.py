@@ -0,0 +1,77 @@
+"""
+Quality engine tests
+Histogram-based quality statistics against BioPython's decoded phred_quality values
+"""
+import numpy as np
+import pytest
+from Bio import SeqIO
+
+import analyzers.quality as quality_module
+from analyzers.fastq_analyzer import FastqAnalyzer
+from analyzers.quality import QualityAccumulator, decode_qualities
+
+
+def test_decode_matches_biopython(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    for record, (_, _, quality) in zip(SeqIO.parse(path, "fastq"), fastq_records):
+        assert decode_qualities(quality).tolist() == record.letter_annotations["phred_quality"]
+
+
+def test_invalid_quality_character():
+    with pytest.raises(ValueError):
+        decode_qualities(" ")
+
+
+def test_statistics_match_biopython(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    records = list(SeqIO.parse(path, "fastq"))
+    scores = np.concatenate([record.letter_annotations["phred_quality"] for record in records])
+    accumulator = QualityAccumulator()
+    means = accumulator.add_batch([quality for _, _, quality in fastq_records])
+
+    assert means == [np.mean(record.letter_annotations["phred_quality"]) for record in records]
+    statistics = accumulator.to_statistics()
+    assert statistics["average_quality"] == round(float(scores.mean()), 2)
+    assert statistics["median_quality"] == float(np.median(scores))
+    assert statistics["q20_fraction"] == round(float((scores >= 20).mean()), 4)
+    assert statistics["q30_fraction"] == round(float((scores >= 30).mean()), 4)
+
+    report = accumulator.to_report()
+    longest = max(len(record) for record in records)
+    assert len(report["per_cycle_mean"]) == longest
+    first_cycle = [record.letter_annotations["phred_quality"][0] for record in records]
+    assert report["per_cycle_mean"][0] == round(float(np.mean(first_cycle)), 2)
+    assert report["per_cycle_median"][0] == float(np.median(first_cycle))
+
+
+def test_merge_equals_single_pass(fastq_records):
+    qualities = [quality for _, _, quality in fastq_records]
+    whole = QualityAccumulator()
+    whole.add_batch(qualities)
+    first, second = QualityAccumulator(), QualityAccumulator()
+    first.add_batch(qualities[:70])
+    second.add_batch(qualities[70:])
+    merged = QualityAccumulator.from_state(first.merge(second).to_state())
+    assert merged.to_statistics() == whole.to_statistics()
+    assert merged.to_report() == whole.to_report()
+
+
+def test_long_reads_are_binned(monkeypatch):
+    monkeypatch.setattr(quality_module, "MAX_CYCLES", 10)
+    accumulator = QualityAccumulator()
+    accumulator.add_batch([b"I" * 75, b"5" * 12])
+    # 10 exact cycles, then [10, 20), [20, 40), [40, 80)
+    assert accumulator.cycle_histograms.shape[0] == 13
+    assert accumulator.base_count == 87
+    report = accumulator.to_report()
+    assert len(report["per_cycle_mean"]) == 10
+    assert [(bin["start"], bin["end"]) for bin in report["long_read_cycles"]] == [(10, 19), (20, 39), (40, 79)]
+    assert report["long_read_cycles"][0]["mean"] == round((10 * 40 + 2 * 20) / 12, 2)
+
+
+def test_fastq_analyzer_quality_matches_biopython(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    results = FastqAnalyzer().analyze_file(path)
+    records = list(SeqIO.parse(path, "fastq"))
+    for row, record in zip(results["sequences"], records):
+        assert row["average_quality"] == round(float(np.mean(record.letter_annotations["phred_quality"])), 2)
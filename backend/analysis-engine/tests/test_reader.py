@@ -0,0 +1,99 @@
+"""
+Native reader tests
+read_fasta/read_fastq must return what BioPython parses (or fail where it fails) at any block size
+"""
+import io
+import random
+
+import pytest
+from Bio import SeqIO
+from Bio.SeqIO.QualityIO import FastqGeneralIterator
+
+from analyzers.reader import read_fasta, read_fastq
+from conftest import random_sequence
+
+FASTA_BLOCK_SIZES = [1, 3, 7, 64, 1 << 20]
+FASTQ_BLOCK_SIZES = [1, 5, 13, 64, 256, 1 << 20]
+
+
+def _parse(parser, data: bytes):
+    try:
+        return parser(data)
+    except Exception as e:
+        return ("error", type(e).__name__)
+
+
+def biopython_fasta(data: bytes):
+    records = SeqIO.parse(io.TextIOWrapper(io.BytesIO(data)), "fasta")
+    return [(record.description, bytes(record.seq)) for record in records]
+
+
+def biopython_fastq(data: bytes):
+    return [(title, sequence.encode(), quality.encode())
+            for title, sequence, quality in FastqGeneralIterator(io.TextIOWrapper(io.BytesIO(data)))]
+
+
+def random_fasta(rng: random.Random) -> bytes:
+    newline = rng.choice(["\n", "\r\n"])
+    records = []
+    for index in range(rng.randint(0, 30)):
+        sequence = random_sequence(rng, rng.randint(0, 200), "ACGTNacgt")
+        width = rng.choice([10, 60, 1000])
+        lines = [sequence[start:start + width] for start in range(0, len(sequence), width)]
+        if rng.random() < 0.1:
+            lines.insert(rng.randint(0, len(lines)), "")
+        if rng.random() < 0.05:
+            lines.append("AC GT ")
+        title = rng.choice([f"id{index} desc x", f"id{index}", "", f"id{index}  "])
+        records.append(">" + title + newline + newline.join(lines))
+    data = newline.join(records) + rng.choice(["", newline, newline * 2])
+    if rng.random() < 0.03:
+        data = "junk" + newline + data
+    return data.encode()
+
+
+def random_fastq(rng: random.Random) -> bytes:
+    newline = rng.choice(["\n", "\r\n"])
+    records = []
+    for index in range(rng.randint(0, 30)):
+        length = rng.randint(0, 60)
+        sequence = random_sequence(rng, length, "ACGTN")
+        quality = "".join(rng.choice("!#+@5IJ") for _ in range(length))
+        if rng.random() < 0.15:
+            # Multi-line records
+            width = rng.choice([5, 20])
+            sequence_lines = [sequence[start:start + width] for start in range(0, length, width)] or [""]
+            quality_lines = [quality[start:start + width] for start in range(0, length, width)] or [""]
+        else:
+            sequence_lines, quality_lines = [sequence], [quality]
+        title = rng.choice([f"r{index}/1 x", f"r{index}", f"r{index} "])
+        separator = "+" + (title if rng.random() < 0.1 else "")
+        if rng.random() < 0.02:
+            quality_lines = [quality[:-1]] if quality else ["I"]
+        if rng.random() < 0.02:
+            separator = "+other"
+        records.append(newline.join(["@" + title] + sequence_lines + [separator] + quality_lines))
+    data = newline.join(records) + rng.choice(["", newline, newline * 2])
+    if rng.random() < 0.03:
+        data = data[:rng.randint(0, len(data))]
+    return data.encode()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_read_fasta_matches_biopython(seed):
+    rng = random.Random(seed)
+    for _ in range(15):
+        data = random_fasta(rng)
+        expected = _parse(biopython_fasta, data)
+        for block_size in FASTA_BLOCK_SIZES:
+            assert _parse(lambda d: [tuple(r) for r in read_fasta(io.BytesIO(d), block_size)], data) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_read_fastq_matches_biopython(seed):
+    rng = random.Random(seed)
+    for _ in range(15):
+        data = random_fastq(rng)
+        expected = _parse(biopython_fastq, data)
+        for block_size in FASTQ_BLOCK_SIZES:
+            assert _parse(lambda d: [tuple(r) for r in read_fastq(io.BytesIO(d), block_size)], data) == expected
@@ -0,0 +1,47 @@
+"""
+Sequence index tests
+FASTA/FASTQ .fai indexes must give random access equal to a full parse, and reject malformed files
+"""
+import os
+
+import pytest
+from Bio import SeqIO
+
+from analyzers.sequence_index import SequenceIndex, build_fastq_index
+
+
+def test_fasta_random_access(write_fasta, fasta_records):
+    path = write_fasta([(f"seq{index}", sequence) for index, (_, sequence) in enumerate(fasta_records)], width=50)
+    index = SequenceIndex(path)
+    try:
+        for record in SeqIO.parse(path, "fasta"):
+            assert index.fetch(record.id) == str(record.seq)
+            assert index.fetch(record.id, 3, 40) == str(record.seq)[2:40]
+    finally:
+        index.close()
+
+
+def test_fastq_records(write_fastq, fastq_records):
+    path = write_fastq(fastq_records)
+    index = SequenceIndex(path)
+    try:
+        for record in SeqIO.parse(path, "fastq"):
+            fetched = index.get_record(record.id)
+            assert fetched["sequence"] == str(record.seq)
+            assert [ord(char) - 33 for char in fetched["quality"]] == record.letter_annotations["phred_quality"]
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("content, message", [
+    ("@r1\nACGT\n+\nIIII\n@r2\nACGT\nIIII\n@r3\nACGT\n+\nIIII\n", "separator"),
+    ("@r1\nACGT\n+\nIII\n", "lengths differ"),
+    ("@r1\nACGT\n+\nIIIII\n@r2\nAC\n+\nII\n", "lengths differ"),
+    ("@r1\nACGT\n", "Truncated"),
+])
+def test_malformed_fastq_is_rejected(tmp_path, content, message):
+    path = tmp_path / "bad.fastq"
+    path.write_text(content)
+    with pytest.raises(ValueError, match=message):
+        build_fastq_index(str(path))
+    assert not os.path.exists(f"{path}.fai")
@@ -0,0 +1,25 @@
+"""
+Server launcher tests
+Production pool sizing is split between the uvicorn workers
+"""
+from serve import server_options, worker_pool_defaults
+
+
+def test_pools_are_split_between_workers(monkeypatch):
+    for name in ["ANALYSIS_MAX_IN_FLIGHT", "ANALYSIS_WORKERS"]:
+        monkeypatch.delenv(name, raising=False)
+    assert worker_pool_defaults(4, cpu_count=16) == {"ANALYSIS_MAX_IN_FLIGHT": "4", "ANALYSIS_WORKERS": "4"}
+    assert worker_pool_defaults(8, cpu_count=4) == {"ANALYSIS_MAX_IN_FLIGHT": "1", "ANALYSIS_WORKERS": "1"}
+
+
+def test_explicit_pool_sizes_are_kept(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_IN_FLIGHT", "6")
+    monkeypatch.delenv("ANALYSIS_WORKERS", raising=False)
+    assert worker_pool_defaults(4, cpu_count=16) == {"ANALYSIS_WORKERS": "4"}
+
+
+def test_production_options(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    options = server_options("production")
+    assert options["workers"] == 3
+    assert options["reload"] is False
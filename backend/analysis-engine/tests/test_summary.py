@@ -0,0 +1,61 @@
+"""
+Sequence summary tests
+Exact Nx/Lx and distributions must survive buffering, merging and state round trips
+"""
+import random
+
+import pytest
+
+import analyzers.summary as summary_module
+from analyzers.summary import SequenceSummary
+
+
+def brute_force_nx(lengths, percent):
+    ordered = sorted(lengths, reverse=True)
+    total = sum(ordered)
+    covered = 0
+    for count, length in enumerate(ordered, 1):
+        covered += length
+        if covered * 100 >= total * percent:
+            return length, count
+    return None, None
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_nx_matches_brute_force_after_merge(seed, monkeypatch):
+    # A tiny buffer forces many compactions
+    monkeypatch.setattr(summary_module, "LENGTH_BUFFER_SIZE", 7)
+    rng = random.Random(seed)
+    for trial in range(30):
+        lengths = [rng.choice([rng.randint(0, 50), rng.randint(1, 100000)]) for _ in range(rng.randint(1, 60))]
+        if sum(lengths) == 0:
+            continue
+        left, right = SequenceSummary(), SequenceSummary()
+        for index, length in enumerate(lengths):
+            (left if index % 2 else right).add(length, rng.random() * 100)
+        if trial % 3 == 0:
+            left = SequenceSummary.from_state(left.to_state())
+        left.merge(right)
+
+        for percent in summary_module.NX_PERCENTS:
+            assert left.nx(percent) == brute_force_nx(lengths, percent)
+        distributions = left.to_distributions()
+        assert sum(entry["count"] for entry in distributions["length_histogram"].values()) == len(lengths)
+        assert sum(entry["bases"] for entry in distributions["length_histogram"].values()) == sum(lengths)
+        assert sum(distributions["gc_histogram"].values()) == len(lengths)
+
+
+def test_length_bins():
+    lengths = [0, 1, 2, 4, 5, 9, 10, 19, 20, 49, 50, 99, 100, 150, 999, 1000, 12345]
+    assert [summary_module._length_bin(length) for length in lengths] == [
+        0, 1, 2, 2, 5, 5, 10, 10, 20, 20, 50, 50, 100, 100, 500, 1000, 10000
+    ]
+
+
+def test_statistics_include_nx():
+    summary = SequenceSummary()
+    for length in [100, 80, 60, 40, 20]:
+        summary.add(length, 50.0)
+    statistics = summary.to_statistics()
+    assert (statistics["n50"], statistics["l50"]) == (80, 2)
+    assert (statistics["n90"], statistics["l90"]) == (40, 4)
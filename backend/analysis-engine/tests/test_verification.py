@@ -0,0 +1,56 @@
+"""
+Annotation store tests
+Sorted-array store built from a VCF dump: lookups, ranges and out-of-range positions
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+from oracle.verification import AnnotationStore, VariantVerifier, build_annotation_store
+
+VCF = """##fileformat=VCFv4.1
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO
+chr2\t500\trs2\tG\tA,T\t.\t.\tCLNSIG=Benign;AF=0.25
+1\t100\trs1\tA\tG\t.\t.\tCLNSIG=Pathogenic
+1\t-5\t.\tC\tT\t.\t.\t.
+1\t1099511627776\t.\tC\tT\t.\t.\t.
+chrM\t73\t.\tA\tG\t.\t.\tAF=0.9
+1\t100\t.\tA\tC\t.\t.\t.
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    source = tmp_path / "clinvar.vcf"
+    source.write_text(VCF)
+    store = AnnotationStore(build_annotation_store(str(source)))
+    yield store
+    store.close()
+
+
+def test_lookups(store):
+    with open(os.path.join(store.store_dir, "meta.json")) as f:
+        meta = json.load(f)
+    assert (meta["count"], meta["skipped"]) == (5, 2)
+    assert store.lookup("chr1", 100, "G")["id"] == "rs1"
+    assert store.lookup("1", 100, "c")["alt_allele"] == "C"
+    assert store.lookup("2", 500, "T")["population_frequency"] == 0.25
+    assert store.lookup("M", 73, "G")["chromosome"] == "MT"
+    assert store.lookup("1", 101, "G") is None
+    assert store.lookup("X", 100, "G") is None
+
+
+def test_out_of_range_positions_miss(store):
+    assert store.lookup_many([("1", -5, "T"), ("1", 1 << 40, "T"), ("1", 100, "G")])[:2] == [None, None]
+    assert [record["alt_allele"] for record in store.range("1", -10, 1 << 50)] == ["C", "G"]
+    assert store.range("1", 1 << 41, 1 << 42) == []
+
+
+def test_verifier_rejects_non_positive_positions(store):
+    verifier = VariantVerifier(store)
+    with pytest.raises(ValueError):
+        asyncio.run(verifier.verify_variants([("1", -5, "T")]))
+    result = asyncio.run(verifier.verify_variants([("1", 100, "G")]))[0]
+    assert result["verified"] is True